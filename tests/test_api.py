@@ -176,3 +176,72 @@ def test_healthz_stale_returns_503():
         assert json.loads(exc.value.read())["status"] == "stale"
     finally:
         srv.stop()
+
+
+# -- /api/history -------------------------------------------------------------
+
+
+def test_history_query(tmp_path):
+    from wanwatcher.history import HistoryLog
+
+    log = HistoryLog(str(tmp_path / "h"))
+    log.record_change("1.1.1.1", "2.2.2.2", None, None, ts=100)
+    log.record_change("2.2.2.2", "3.3.3.3", "::1", "::2", ts=200)
+    port = _free_port()
+    srv = StatusServer(
+        APIConfig(enabled=True, bind="127.0.0.1", port=port),
+        status_provider=lambda: {},
+        metrics=Metrics(),
+        history_provider=log.query,
+    )
+    srv.start()
+    time.sleep(0.3)
+    try:
+        _, _, body = _get(port, "/api/history?since=150&family=ipv4")
+        assert json.loads(body) == {
+            "count": 1,
+            "entries": [
+                {"ts": 200, "family": "ipv4", "old": "2.2.2.2", "new": "3.3.3.3"}
+            ],
+        }
+        _, _, body = _get(port, "/api/history?until=1970-01-01T00:02:30Z")
+        assert json.loads(body)["count"] == 1
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(port, "/api/history?since=yesterday")
+        assert exc.value.code == 400
+    finally:
+        srv.stop()
+
+
+def test_history_disabled_404(server):
+    port, _ = server
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        _get(port, "/api/history")
+    assert exc.value.code == 404
+
+
+def test_checks_query():
+    from wanwatcher.samples import CheckSamples
+
+    samples = CheckSamples(capacity=16)
+    samples.append(100.0, 0.5, "ipv4", "ok", "ipify")
+    samples.append(100.0, 0.75, "ipv6", "failed")
+    port = _free_port()
+    srv = StatusServer(
+        APIConfig(enabled=True, bind="127.0.0.1", port=port),
+        status_provider=lambda: {},
+        metrics=Metrics(),
+        samples_provider=samples.query,
+    )
+    srv.start()
+    time.sleep(0.3)
+    try:
+        _, _, body = _get(port, "/api/checks?family=ipv6")
+        payload = json.loads(body)
+        assert payload["count"] == 1
+        assert payload["samples"][0]["result"] == "failed"
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(port, "/api/checks?family=ipx")
+        assert exc.value.code == 400
+    finally:
+        srv.stop()
@@ -1,6 +1,7 @@
 """Tests for the Application orchestration logic."""
 
 import os
+import time
 from unittest.mock import MagicMock
 
 import pytest
@@ -27,7 +28,7 @@ def app(config):
     application.detector = MagicMock()
     application.notifications = MagicMock()
     application.notifications.providers = [MagicMock()]
-    application.notifications.send_to_all.return_value = {"DiscordNotifier": True}
+    application.notifications.send_change.return_value = {"DiscordNotifier": True}
     application.state = application.store.load()
     return application
 
@@ -35,7 +36,7 @@ def app(config):
 def test_first_run_notifies_and_saves(app):
     app.detector.get_ipv4.return_value = "1.2.3.4"
     assert app.check_ip() is True
-    app.notifications.send_to_all.assert_called_once()
+    app.notifications.send_change.assert_called_once()
     assert app.state.ipv4 == "1.2.3.4"
     assert os.path.exists(app.config.ip_db_file)
 
@@ -43,39 +44,93 @@ def test_first_run_notifies_and_saves(app):
 def test_unchanged_ip_does_not_notify(app):
     app.detector.get_ipv4.return_value = "1.2.3.4"
     app.check_ip()  # first run
-    app.notifications.send_to_all.reset_mock()
+    app.notifications.send_change.reset_mock()
     app.detector.get_ipv4.return_value = "1.2.3.4"
     mtime_before = os.path.getmtime(app.config.ip_db_file)
     import time
 
     time.sleep(0.02)
     app.check_ip()
-    app.notifications.send_to_all.assert_not_called()
+    app.notifications.send_change.assert_not_called()
     # State file is still refreshed so the healthcheck sees a live loop.
     assert os.path.getmtime(app.config.ip_db_file) > mtime_before
 
 
+def test_check_pushes_heartbeat_expiry(app):
+    app.detector.get_ipv4.return_value = "1.2.3.4"
+    app.check_ip()
+    alive = app.config.ip_db_file + ".alive"
+    assert os.stat(alive).st_mtime > time.time()
+    app.shutdown()
+    assert not os.path.exists(alive)
+
+
 def test_change_notifies_and_records_history(app):
     app.detector.get_ipv4.return_value = "1.2.3.4"
     app.check_ip()
-    app.notifications.send_to_all.reset_mock()
+    app.notifications.send_change.reset_mock()
     app.detector.get_ipv4.return_value = "5.6.7.8"
     app.check_ip()
-    app.notifications.send_to_all.assert_called_once()
+    app.notifications.send_change.assert_called_once()
     assert app.state.ipv4 == "5.6.7.8"
     assert len(app.state.history) == 1
     assert app.state.history[0]["old_ipv4"] == "1.2.3.4"
     assert app.state.history[0]["new_ipv4"] == "5.6.7.8"
 
 
+def test_change_is_appended_to_history_log(app):
+    app.detector.get_ipv4.return_value = "1.2.3.4"
+    app.check_ip()  # first run is not a change
+    app.detector.get_ipv4.return_value = "5.6.7.8"
+    app.check_ip()
+    entries = app.history.query()
+    assert [(e["family"], e["old"], e["new"]) for e in entries] == [
+        ("ipv4", "1.2.3.4", "5.6.7.8")
+    ]
+
+
+def test_sqlite_backend_records_changes_and_deliveries(config):
+    config.state_backend = "sqlite"
+    application = Application(config)
+    application.detector = MagicMock()
+    application.notifications = MagicMock()
+    application.notifications.send_change.return_value = {"DiscordNotifier": True}
+    application.state = application.store.load()
+    application.detector.get_ipv4.return_value = "1.2.3.4"
+    application.check_ip()
+    application.detector.get_ipv4.return_value = "5.6.7.8"
+    application.check_ip()
+    application.store.close()
+
+    assert [e["new"] for e in application.history.query()] == ["5.6.7.8"]
+    assert len(application.state_db.checks()) == 2
+    assert [d["provider"] for d in application.state_db.deliveries()] == [
+        "DiscordNotifier",
+        "DiscordNotifier",
+    ]
+    assert not os.path.exists(config.ip_db_file)  # JSON file is not written
+
+
+def test_detections_are_sampled(app):
+    app.detector.answered = {"ipv4": "ipify"}
+    app.detector.get_ipv4.return_value = "1.2.3.4"
+    app.check_ip()
+    app.check_ip()
+    app.detector.get_ipv4.return_value = None
+    app.check_ip()
+    samples = app.samples.query(family="ipv4")
+    assert [s["result"] for s in samples] == ["changed", "ok", "failed"]
+    assert samples[0]["source"] == "ipify"
+
+
 def test_detector_none_keeps_stored_value(app):
     app.detector.get_ipv4.return_value = "1.2.3.4"
     app.check_ip()
-    app.notifications.send_to_all.reset_mock()
+    app.notifications.send_change.reset_mock()
     # A transient detection failure must not wipe the stored address.
     app.detector.get_ipv4.return_value = None
     app.check_ip()
-    app.notifications.send_to_all.assert_not_called()
+    app.notifications.send_change.assert_not_called()
     assert app.state.ipv4 == "1.2.3.4"
 
 
@@ -113,6 +168,24 @@ def test_run_exits_promptly_when_shutdown_set(app, monkeypatch):
     assert rc == 0
 
 
+def test_network_change_ends_wait_early(app):
+    import threading
+
+    timer = threading.Timer(0.05, app._on_network_change)
+    timer.start()
+    started = time.monotonic()
+    assert app._sleep(5) is False
+    assert time.monotonic() - started < 2
+    assert "wanwatcher_network_change_wakeups_total 1" in app.metrics.render()
+    assert not app.wake_event.is_set()
+
+
+def test_sleep_reports_shutdown(app):
+    app.shutdown_event.set()
+    app.wake_event.set()
+    assert app._sleep(5) is True
+
+
 def test_next_wait_steady_state(app):
     # No failures: wait the full configured interval.
     app.consecutive_failures = 0
@@ -154,6 +227,51 @@ def test_heartbeat_emitted_when_due(config):
     assert app.notifications.notify_event.call_args.args[0] == "Heartbeat"
 
 
+def test_update_check_saves_under_the_state_lock(app, monkeypatch):
+    import threading
+
+    from wanwatcher import app as app_module
+
+    monkeypatch.setattr(
+        app_module,
+        "check_for_updates",
+        lambda *args, **kwargs: {"latest_version": "9.9.9"},
+    )
+    app.notifications.notify_update.return_value = {"DiscordNotifier": True}
+    app.store = MagicMock()
+    with app._lock:  # held by observe() on another thread
+        worker = threading.Thread(target=app._run_update_check)
+        worker.start()
+        worker.join(timeout=0.2)
+        assert worker.is_alive()
+        app.store.save.assert_not_called()
+    worker.join(timeout=2)
+    app.store.save.assert_called_once_with(app.state)
+    assert app.state.update_notified_version == "9.9.9"
+
+
+def test_timed_out_delivery_is_counted_as_timeout_not_error(app):
+    app.notifications.send_change.return_value = {"DiscordNotifier": None}
+    app.detector.get_ipv4.return_value = "1.2.3.4"
+    app.check_ip()
+    out = app.metrics.render()
+    assert 'provider="DiscordNotifier",result="timeout"} 1' in out
+    assert 'result="error"' not in out
+
+
+def test_update_notice_past_deadline_is_not_sent_again(app, monkeypatch):
+    from wanwatcher import app as app_module
+
+    monkeypatch.setattr(
+        app_module,
+        "check_for_updates",
+        lambda *args, **kwargs: {"latest_version": "9.9.9"},
+    )
+    app.notifications.notify_update.return_value = {"DiscordNotifier": None}
+    app._run_update_check()
+    assert app.state.update_notified_version == "9.9.9"
+
+
 def test_status_snapshot_has_freshness_fields(app):
     app.detector.get_ipv4.return_value = "1.2.3.4"
     app.check_ip()
@@ -163,10 +281,18 @@ def test_status_snapshot_has_freshness_fields(app):
     assert snap["seconds_since_last_check"] >= 0
 
 
+def test_status_snapshot_includes_source_health(config):
+    application = Application(config)
+    assert application.detector.adaptive_order is True
+    application.detector.scores.record("ipv4", "ipify", 0.2, True)
+    snap = application.status_snapshot()
+    assert snap["sources"]["ipv4"][0]["source"] == "ipify"
+
+
 def test_notification_exception_is_isolated(app):
     # A notifier blowing up must not count as a check failure or trigger outage.
     app.detector.get_ipv4.return_value = "1.2.3.4"
-    app.notifications.send_to_all.side_effect = RuntimeError("notifier exploded")
+    app.notifications.send_change.side_effect = RuntimeError("notifier exploded")
     result = app.check_ip()
     assert result is True  # detection succeeded
     assert app.consecutive_failures == 0  # no false outage
@@ -217,3 +343,94 @@ def test_status_snapshot_concurrent_with_check_is_consistent(app):
     t1.join(5)
     t2.join(5)
     assert not errors
+
+
+def test_families_are_detected_concurrently(app):
+    import threading
+
+    app.config.monitor_ipv6 = True
+    barrier = threading.Barrier(2, timeout=2)
+
+    def ipv4(previous=None):
+        barrier.wait()  # only passes if IPv6 runs at the same time
+        return "1.2.3.4"
+
+    def ipv6(previous=None):
+        barrier.wait()
+        return "2606:4700:4700::1111"
+
+    app.detector.get_ipv4.side_effect = ipv4
+    app.detector.get_ipv6.side_effect = ipv6
+    assert app.check_ip() is True
+    assert app.state.ipv4 == "1.2.3.4"
+    assert app.state.ipv6 == "2606:4700:4700::1111"
+    out = app.metrics.render()
+    assert 'wanwatcher_detection_duration_seconds{family="ipv4"}' in out
+    assert 'wanwatcher_detection_duration_seconds{family="ipv6"}' in out
+
+
+def test_family_missing_deadline_is_undetermined(app):
+    import threading
+
+    app.config.monitor_ipv6 = True
+    app.config.detection_deadline = 0.2
+    release = threading.Event()
+
+    def slow_ipv6(previous=None):
+        release.wait(5)
+        return "2606:4700:4700::1111"
+
+    app.detector.get_ipv4.return_value = "1.2.3.4"
+    app.detector.get_ipv6.side_effect = slow_ipv6
+    try:
+        assert app.check_ip() is True
+    finally:
+        release.set()
+    assert app.state.ipv4 == "1.2.3.4"
+    assert app.state.ipv6 is None
+    assert (
+        'wanwatcher_detection_deadline_exceeded_total{family="ipv6"} 1'
+        in app.metrics.render()
+    )
+
+
+def test_straggling_family_is_skipped_until_it_finishes(app):
+    import threading
+
+    app.config.monitor_ipv6 = True
+    app.config.detection_deadline = 0.2
+    release = threading.Event()
+    calls = []
+
+    def slow_ipv6(previous=None):
+        calls.append(1)
+        release.wait(5)
+        return "2606:4700:4700::1111"
+
+    app.detector.get_ipv4.return_value = "1.2.3.4"
+    app.detector.get_ipv6.side_effect = slow_ipv6
+    try:
+        app.check_ip()
+        app.check_ip()
+        assert calls == [1]  # no second detection alongside the first
+    finally:
+        release.set()
+    app._detections["ipv6"].result(timeout=2)
+    app.check_ip()
+    assert calls == [1, 1]
+
+
+def test_automatic_detection_deadline_covers_every_source(config):
+    from wanwatcher.detector import IPV4_SOURCES, IPV6_SOURCES
+
+    config.http_timeout = 7
+    app = Application(config)
+    sources = max(len(IPV4_SOURCES), len(IPV6_SOURCES))
+    assert app.config.detection_deadline == 0
+    assert app.detection_deadline() == 7 * sources
+
+
+def test_detector_exception_counts_as_failure(app):
+    app.detector.get_ipv4.side_effect = RuntimeError("boom")
+    assert app.check_ip() is False
+    assert app.consecutive_failures == 1
@@ -30,6 +30,7 @@ _ENV_PREFIXES = (
     "ROUTE53_",
     "API_",
     "MQTT_",
+    "OUTBOX_",
     "HEARTBEAT_",
     "OUTAGE_",
     "UPDATE_",
@@ -42,6 +43,7 @@ _ENV_PREFIXES = (
     "LOG_",
     "IPINFO_",
     "HTTP_",
+    "PIPELINE_",
 )
 
 
@@ -164,6 +166,30 @@ class TestConfigFromEnv:
         assert config.ip_db_file == "/data/ipinfo.db"
         assert config.http_timeout == 10
         assert config.change_confirmation is True
+        assert config.detection_mode == "sequential"
+        assert config.detection_fanout == 3
+        assert config.detection_deadline == 0
+        assert config.source_scoring is True
+        assert config.hedge_percentile == 90
+        assert config.hedge_delay_ms == 1000
+        assert config.dns_sources == "off"
+        assert config.local_detection is False
+        assert config.local_natpmp is False
+        assert config.check_on_network_change is False
+        assert config.network_change_debounce == 2
+        assert config.check_engine == "threaded"
+        assert config.task_deadline == 120
+        assert config.notify_deadline == 60
+        assert config.notify_coalesce_window == 0
+        assert config.notify_rate_limit == 20
+        assert config.notify_rate_burst == 5
+        assert config.pipeline.enabled is False
+        assert config.pipeline.queue_size == 100
+        assert config.pipeline.concurrency == {}
+        assert config.outbox.enabled is False
+        assert config.outbox.retry_max == 900
+        assert config.http.pool_connections == 10
+        assert config.http.pool_maxsize == 4
         assert config.discord.enabled is False
         assert config.telegram.parse_mode == "HTML"
         assert config.email.smtp_port == 587
@@ -206,6 +232,8 @@ class TestConfigFromEnv:
         monkeypatch.setenv("HEARTBEAT_INTERVAL", "7200")
         monkeypatch.setenv("OUTAGE_THRESHOLD", "5")
         monkeypatch.setenv("UPDATE_CHECK_ENABLED", "false")
+        monkeypatch.setenv("IP_DETECTION_MODE", "Parallel")
+        monkeypatch.setenv("IP_DETECTION_FANOUT", "2")
 
         config = Config.from_env()
         assert config.server_name == "Casa"
@@ -227,6 +255,8 @@ class TestConfigFromEnv:
         assert config.events.heartbeat_interval == 7200
         assert config.events.outage_threshold == 5
         assert config.updates.enabled is False
+        assert config.detection_mode == "parallel"  # lowercased
+        assert config.detection_fanout == 2
 
     def test_blank_string_falls_back_to_default(self, monkeypatch):
         monkeypatch.setenv("SERVER_NAME", "   ")
@@ -235,6 +265,27 @@ class TestConfigFromEnv:
         assert config.server_name == "WANwatcher Docker"
         assert config.bot_name == "WANwatcher"
 
+    def test_timeout_for_falls_back_to_http_timeout(self, monkeypatch):
+        monkeypatch.setenv("HTTP_TIMEOUT", "12")
+        monkeypatch.setenv("HTTP_TIMEOUT_DDNS", "30")
+        config = Config.from_env()
+        assert config.timeout_for("ddns") == 30
+        assert config.timeout_for("detector") == 12
+        assert config.timeout_for("geo") == 12
+        assert config.timeout_for("unknown") == 12
+
+    def test_pipeline_concurrency_parsing(self, monkeypatch):
+        monkeypatch.setenv("PIPELINE_ENABLED", "true")
+        monkeypatch.setenv("PIPELINE_CONCURRENCY", "notify=2, MQTT=3, bogus, ddns=x")
+        config = Config.from_env()
+        assert config.pipeline.enabled is True
+        assert config.pipeline.concurrency == {"notify": 2, "mqtt": 3}
+
+    def test_latency_buckets_parsing(self, monkeypatch):
+        monkeypatch.setenv("METRICS_LATENCY_BUCKETS", "2.5, 0.1, bogus, 1")
+        config = Config.from_env()
+        assert config.api.latency_buckets == [0.1, 1.0, 2.5]
+
     def test_any_notifier_enabled(self):
         config = Config.from_env()
         assert config.any_notifier_enabled() is False
@@ -47,7 +47,7 @@ def _duck(domains):
     return DuckDNSClient(DuckDNSConfig(token="secret", domains=domains))
 
 
-@patch("wanwatcher.ddns.duckdns.requests.get")
+@patch("requests.Session.get")
 def test_duckdns_ok(mock_get):
     mock_get.return_value = MagicMock(ok=True, status_code=200, text="OK")
     client = _duck(["home"])
@@ -55,14 +55,14 @@ def test_duckdns_ok(mock_get):
     assert result == {"home": True}
 
 
-@patch("wanwatcher.ddns.duckdns.requests.get")
+@patch("requests.Session.get")
 def test_duckdns_ko_marks_failure(mock_get):
     mock_get.return_value = MagicMock(ok=True, status_code=200, text="KO")
     client = _duck(["home"])
     assert client.update("1.2.3.4", None) == {"home": False}
 
 
-@patch("wanwatcher.ddns.duckdns.requests.get")
+@patch("requests.Session.get")
 def test_duckdns_strips_suffix(mock_get):
     mock_get.return_value = MagicMock(ok=True, status_code=200, text="OK")
     client = _duck(["home.duckdns.org"])
@@ -79,28 +79,28 @@ def _dyn(hostnames, server="https://dynupdate.no-ip.com"):
     )
 
 
-@patch("wanwatcher.ddns.dyndns2.requests.get")
+@patch("requests.Session.get")
 def test_dyndns2_good(mock_get):
     mock_get.return_value = MagicMock(status_code=200, text="good 1.2.3.4")
     client = _dyn(["host.example.com"])
     assert client.update("1.2.3.4", None) == {"host.example.com": True}
 
 
-@patch("wanwatcher.ddns.dyndns2.requests.get")
+@patch("requests.Session.get")
 def test_dyndns2_nochg_is_success(mock_get):
     mock_get.return_value = MagicMock(status_code=200, text="nochg 1.2.3.4")
     client = _dyn(["host.example.com"])
     assert client.update("1.2.3.4", None) == {"host.example.com": True}
 
 
-@patch("wanwatcher.ddns.dyndns2.requests.get")
+@patch("requests.Session.get")
 def test_dyndns2_badauth_fails(mock_get):
     mock_get.return_value = MagicMock(status_code=200, text="badauth")
     client = _dyn(["host.example.com"])
     assert client.update("1.2.3.4", None) == {"host.example.com": False}
 
 
-@patch("wanwatcher.ddns.dyndns2.requests.get")
+@patch("requests.Session.get")
 def test_dyndns2_sends_user_agent(mock_get):
     mock_get.return_value = MagicMock(status_code=200, text="good")
     client = _dyn(["host.example.com"])
@@ -108,7 +108,7 @@ def test_dyndns2_sends_user_agent(mock_get):
     assert "WANwatcher" in mock_get.call_args.kwargs["headers"]["User-Agent"]
 
 
-@patch("wanwatcher.ddns.dyndns2.requests.get")
+@patch("requests.Session.get")
 def test_dyndns2_dual_stack_comma_joined(mock_get):
     mock_get.return_value = MagicMock(status_code=200, text="good")
     client = _dyn(["host.example.com"])
@@ -124,7 +124,7 @@ def test_dyndns2_forces_https():
 # -- base class behavior ----------------------------------------------------
 
 
-@patch("wanwatcher.ddns.duckdns.requests.get")
+@patch("requests.Session.get")
 def test_noop_when_unchanged(mock_get):
     mock_get.return_value = MagicMock(ok=True, status_code=200, text="OK")
     metrics = Metrics()
@@ -135,9 +135,13 @@ def test_noop_when_unchanged(mock_get):
     client.update("1.2.3.4", None)
     assert mock_get.call_count == 1
     assert 'result="noop"' in metrics.render()
+    assert (
+        'wanwatcher_ddns_update_duration_seconds_count{provider="duckdns"} 1'
+        in metrics.render()
+    )
 
 
-@patch("wanwatcher.ddns.duckdns.requests.get")
+@patch("requests.Session.get")
 def test_retry_after_failure(mock_get):
     # First attempt fails, address is not cached, so it retries next time.
     mock_get.return_value = MagicMock(ok=True, status_code=200, text="KO")
@@ -149,7 +153,7 @@ def test_retry_after_failure(mock_get):
     assert mock_get.call_count == 2
 
 
-@patch("wanwatcher.ddns.duckdns.requests.get")
+@patch("requests.Session.get")
 def test_update_never_raises(mock_get):
     import requests
 
@@ -174,7 +178,7 @@ def _cf():
     )
 
 
-@patch("wanwatcher.ddns.cloudflare.requests.request")
+@patch("requests.Session.request")
 def test_cloudflare_creates_missing_record(mock_req):
     def respond(method, url, **kwargs):
         if "/zones" in url and url.endswith("/zones"):
@@ -199,7 +203,7 @@ def test_cloudflare_creates_missing_record(mock_req):
     assert result == {"home.example.com/A": True}
 
 
-@patch("wanwatcher.ddns.cloudflare.requests.request")
+@patch("requests.Session.request")
 def test_cloudflare_updates_existing_record(mock_req):
     def respond(method, url, **kwargs):
         if url.endswith("/zones"):
@@ -228,7 +232,7 @@ def test_cloudflare_updates_existing_record(mock_req):
     assert any(c.args[0] == "PUT" for c in mock_req.call_args_list)
 
 
-@patch("wanwatcher.ddns.cloudflare.requests.request")
+@patch("requests.Session.request")
 def test_cloudflare_zone_failure_marks_all_failed(mock_req):
     mock_req.return_value = MagicMock(
         status_code=403, json=lambda: {"success": False, "errors": ["nope"]}
@@ -304,7 +308,7 @@ def test_sigv4_headers_deterministic():
     assert h1["x-amz-date"] == "20260613T120000Z"
 
 
-@patch("wanwatcher.ddns.route53.requests.post")
+@patch("requests.Session.post")
 def test_route53_upsert_success(mock_post):
     mock_post.return_value = MagicMock(status_code=200, text="<ChangeInfo/>")
     client = _r53(["home.example.com"])
@@ -318,14 +322,14 @@ def test_route53_upsert_success(mock_post):
     assert "Authorization" in mock_post.call_args.kwargs["headers"]
 
 
-@patch("wanwatcher.ddns.route53.requests.post")
+@patch("requests.Session.post")
 def test_route53_failure_marks_families(mock_post):
     mock_post.return_value = MagicMock(status_code=403, text="<Error>denied</Error>")
     client = _r53(["home.example.com"])
     assert client.update("1.2.3.4", None) == {"home.example.com/A": False}
 
 
-@patch("wanwatcher.ddns.route53.requests.post")
+@patch("requests.Session.post")
 def test_route53_network_error_never_raises(mock_post):
     import requests as _r
 
@@ -334,7 +338,7 @@ def test_route53_network_error_never_raises(mock_post):
     assert client.update("1.2.3.4", None) == {"home.example.com/A": False}
 
 
-@patch("wanwatcher.ddns.route53.requests.post")
+@patch("requests.Session.post")
 def test_route53_only_one_request_for_batch(mock_post):
     mock_post.return_value = MagicMock(status_code=200, text="<ChangeInfo/>")
     client = _r53(["a.example.com", "b.example.com"])
@@ -98,7 +98,7 @@ class TestIsValidIPv6:
         assert not is_valid_ipv6(ip)
 
 
-@patch("wanwatcher.detector.requests.get")
+@patch("requests.Session.get")
 class TestResponseParsing:
     def test_json_source(self, mock_get):
         mock_get.return_value = make_response(json_data={"ip": PUBLIC_V4_A})
@@ -134,7 +134,7 @@ class TestResponseParsing:
         assert detector.get_ipv4() == PUBLIC_V4_B
 
 
-@patch("wanwatcher.detector.requests.get")
+@patch("requests.Session.get")
 class TestAddressRejection:
     def test_private_ipv4_is_skipped_and_next_source_used(self, mock_get):
         mock_get.side_effect = [
@@ -158,7 +158,7 @@ class TestAddressRejection:
         assert mock_get.call_count == len(IPV4_SOURCES)
 
 
-@patch("wanwatcher.detector.requests.get")
+@patch("requests.Session.get")
 class TestRotation:
     def test_offset_advances_between_calls(self, mock_get):
         mock_get.return_value = make_response(json_data={"ip": PUBLIC_V4_A})
@@ -187,7 +187,40 @@ class TestRotation:
         assert urls[-1] == IPV4_SOURCES[0].url
 
 
-@patch("wanwatcher.detector.requests.get")
+@patch("requests.Session.get")
+class TestAdaptiveOrder:
+    def test_failing_source_is_tried_last(self, mock_get):
+        bad = IPV4_SOURCES[0].url
+
+        def side_effect(url, timeout=None):
+            if url == bad:
+                raise requests.exceptions.ConnectionError("down")
+            return make_response(text=PUBLIC_V4_A, json_data={"ip": PUBLIC_V4_A})
+
+        mock_get.side_effect = side_effect
+        detector = IPDetector(adaptive_order=True)
+        detector.get_ipv4(previous=PUBLIC_V4_A)
+        mock_get.reset_mock()
+
+        # Rotation alone would start with the broken source again after a
+        # full lap; the scoreboard keeps it behind the healthy ones.
+        for _ in range(len(IPV4_SOURCES)):
+            detector.get_ipv4(previous=PUBLIC_V4_A)
+        urls = [call.args[0] for call in mock_get.call_args_list]
+        assert bad not in urls
+
+    def test_outcomes_recorded_without_adaptive_order(self, mock_get):
+        mock_get.return_value = make_response(
+            text=PUBLIC_V4_A, json_data={"ip": PUBLIC_V4_A}
+        )
+        detector = IPDetector()
+        detector.get_ipv4()
+        entries = detector.scores.snapshot()["ipv4"]
+        assert [e["source"] for e in entries] == [IPV4_SOURCES[0].name]
+        assert entries[0]["successes"] == 1
+
+
+@patch("requests.Session.get")
 class TestChangeConfirmation:
     def _dispatch(self, mapping):
         """Build a side_effect returning canned responses per URL."""
@@ -216,6 +249,7 @@ class TestChangeConfirmation:
         detector = IPDetector()
         assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_B
         assert mock_get.call_count == 2
+        assert detector.answered["ipv4"] == IPV4_SOURCES[1].name
 
     def test_source_disagreement_keeps_previous(self, mock_get):
         mock_get.side_effect = self._dispatch(
@@ -227,6 +261,7 @@ class TestChangeConfirmation:
         detector = IPDetector()
         assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_A
         assert mock_get.call_count == 2
+        assert detector.answered["ipv4"] is None
 
     def test_single_source_fallback_when_others_unreachable(self, mock_get):
         mapping = {
@@ -252,7 +287,7 @@ class TestChangeConfirmation:
         assert mock_get.call_count == 1
 
 
-@patch("wanwatcher.detector.requests.get")
+@patch("requests.Session.get")
 class TestFailureModes:
     def test_all_sources_failing_returns_none(self, mock_get):
         mock_get.side_effect = requests.exceptions.ConnectionError("offline")
@@ -271,3 +306,157 @@ class TestFailureModes:
         mock_get.side_effect = requests.exceptions.Timeout("timed out")
         detector = IPDetector()
         assert detector.get_ipv4() is None
+
+
+@patch("requests.Session.get")
+class TestParallelMode:
+    def _dispatch(self, mapping, delays=None):
+        """Canned responses per URL, optionally delayed to control arrival order."""
+        import time
+
+        delays = delays or {}
+
+        def side_effect(url, timeout=None):
+            if url in delays:
+                time.sleep(delays[url])
+            result = mapping[url]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return side_effect
+
+    def test_unknown_mode_falls_back_to_sequential(self, mock_get):
+        assert IPDetector(mode="bogus").mode == "sequential"
+
+    def test_first_answer_wins_when_unchanged(self, mock_get):
+        mapping = {
+            source.url: make_response(text=PUBLIC_V4_A) for source in IPV4_SOURCES
+        }
+        mapping[IPV4_SOURCES[0].url] = make_response(json_data={"ip": PUBLIC_V4_A})
+        mapping[IPV4_SOURCES[1].url] = make_response(text=f"ip={PUBLIC_V4_A}")
+        mock_get.side_effect = self._dispatch(mapping)
+        detector = IPDetector(mode="parallel", fanout=2)
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_A
+        # Only the first wave is launched; nobody needed to replace a failure.
+        assert mock_get.call_count <= 2
+        assert detector.answered["ipv4"] in (IPV4_SOURCES[0].name, IPV4_SOURCES[1].name)
+
+    def test_slow_source_does_not_delay_answer(self, mock_get):
+        import time
+
+        mock_get.side_effect = self._dispatch(
+            {
+                IPV4_SOURCES[0].url: make_response(json_data={"ip": PUBLIC_V4_A}),
+                IPV4_SOURCES[1].url: make_response(text=f"ip={PUBLIC_V4_A}"),
+            },
+            delays={IPV4_SOURCES[0].url: 1.0},
+        )
+        detector = IPDetector(mode="parallel", fanout=2)
+        started = time.monotonic()
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_A
+        assert time.monotonic() - started < 0.9
+
+    def test_change_needs_two_agreeing_sources(self, mock_get):
+        mock_get.side_effect = self._dispatch(
+            {
+                IPV4_SOURCES[0].url: make_response(json_data={"ip": PUBLIC_V4_B}),
+                IPV4_SOURCES[1].url: make_response(text=f"ip={PUBLIC_V4_B}"),
+            }
+        )
+        detector = IPDetector(mode="parallel", fanout=2)
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_B
+
+    def test_disagreement_keeps_previous(self, mock_get):
+        mock_get.side_effect = self._dispatch(
+            {
+                IPV4_SOURCES[0].url: make_response(json_data={"ip": PUBLIC_V4_B}),
+                IPV4_SOURCES[1].url: make_response(text=f"ip={PUBLIC_V4_C}"),
+            }
+        )
+        detector = IPDetector(mode="parallel", fanout=2)
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_A
+
+    def test_failed_sources_are_replaced_by_the_next_ones(self, mock_get):
+        mapping = {
+            source.url: requests.exceptions.ConnectionError("down")
+            for source in IPV4_SOURCES
+        }
+        mapping[IPV4_SOURCES[3].url] = make_response(text=PUBLIC_V4_A)
+        mock_get.side_effect = self._dispatch(mapping)
+        detector = IPDetector(mode="parallel", fanout=2)
+        assert detector.get_ipv4() == PUBLIC_V4_A
+        assert mock_get.call_count >= 4
+
+    def test_single_answer_accepted_when_no_confirmation_possible(self, mock_get):
+        mapping = {
+            source.url: requests.exceptions.ConnectionError("down")
+            for source in IPV4_SOURCES
+        }
+        mapping[IPV4_SOURCES[2].url] = make_response(text=PUBLIC_V4_B)
+        mock_get.side_effect = self._dispatch(mapping)
+        detector = IPDetector(mode="parallel", fanout=3)
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_B
+        assert mock_get.call_count == len(IPV4_SOURCES)
+
+    def test_all_sources_failing_returns_none(self, mock_get):
+        mock_get.side_effect = requests.exceptions.ConnectionError("offline")
+        detector = IPDetector(mode="parallel")
+        assert detector.get_ipv4() is None
+        assert detector.get_ipv6() is None
+
+
+@patch("requests.Session.get")
+class TestHedgedMode:
+    _dispatch = TestParallelMode._dispatch
+
+    def test_fast_source_is_not_hedged(self, mock_get):
+        mock_get.side_effect = self._dispatch(
+            {IPV4_SOURCES[0].url: make_response(json_data={"ip": PUBLIC_V4_A})}
+        )
+        detector = IPDetector(mode="hedged", hedge_delay=0.5)
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_A
+        assert mock_get.call_count == 1
+
+    def test_stalled_source_is_hedged(self, mock_get):
+        import time
+
+        from wanwatcher.metrics import Metrics
+
+        mock_get.side_effect = self._dispatch(
+            {
+                IPV4_SOURCES[0].url: make_response(json_data={"ip": PUBLIC_V4_A}),
+                IPV4_SOURCES[1].url: make_response(text=f"ip={PUBLIC_V4_A}"),
+            },
+            delays={IPV4_SOURCES[0].url: 1.0},
+        )
+        metrics = Metrics()
+        detector = IPDetector(mode="hedged", hedge_delay=0.1, metrics=metrics)
+        started = time.monotonic()
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_A
+        assert time.monotonic() - started < 0.9
+        assert mock_get.call_count == 2
+        assert 'wanwatcher_detection_hedges_total{family="ipv4"} 1' in metrics.render()
+        assert (
+            'wanwatcher_source_query_duration_seconds_count{family="ipv4"}'
+            in metrics.render()
+        )
+
+    def test_hedge_delay_follows_latency_history(self, mock_get):
+        detector = IPDetector(mode="hedged", hedge_percentile=90, hedge_delay=2.0)
+        source = IPV4_SOURCES[0]
+        assert detector._hedge_after(source, "ipv4") == 2.0
+        for latency in (0.1, 0.1, 0.2, 0.2, 0.3, 0.3, 0.4, 0.4, 0.5, 0.9):
+            detector.scores.record("ipv4", source.name, latency, True)
+        assert detector._hedge_after(source, "ipv4") == 0.5
+
+    def test_change_is_confirmed_by_next_source(self, mock_get):
+        mock_get.side_effect = self._dispatch(
+            {
+                IPV4_SOURCES[0].url: make_response(json_data={"ip": PUBLIC_V4_B}),
+                IPV4_SOURCES[1].url: make_response(text=f"ip={PUBLIC_V4_B}"),
+            }
+        )
+        detector = IPDetector(mode="hedged", hedge_delay=0.5)
+        assert detector.get_ipv4(previous=PUBLIC_V4_A) == PUBLIC_V4_B
+        assert mock_get.call_count == 2
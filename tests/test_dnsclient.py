@@ -0,0 +1,171 @@
+"""Tests for wanwatcher.dnsclient against a local stub DNS server."""
+
+import socket
+import struct
+import threading
+
+import pytest
+
+from wanwatcher import dnsclient
+from wanwatcher.detector import DNSSource, IPDetector, is_valid_ipv4
+from wanwatcher.dnsclient import CLASS_CH, CLASS_IN, TYPE_A, TYPE_AAAA, TYPE_TXT
+
+
+def _txt(*strings):
+    return b"".join(bytes([len(s)]) + s.encode() for s in strings)
+
+
+class StubDNSServer:
+    """Answers queries from a table of (name, type, class) -> rdata list.
+
+    ``rcode`` and ``truncate`` let tests force error responses; a name listed
+    in ``silent`` gets no answer at all.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.rcode = 0
+        self.truncate = False
+        self.silent = set()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                data, peer = self.sock.recvfrom(512)
+            except OSError:
+                return
+            labels, pos = [], 12
+            while data[pos]:
+                labels.append(data[pos + 1 : pos + 1 + data[pos]].decode())
+                pos += 1 + data[pos]
+            question_end = pos + 5
+            qtype, qclass = struct.unpack_from("!HH", data, pos + 1)
+            name = ".".join(labels)
+            if name in self.silent:
+                continue
+            answers = self.records.get((name, qtype, qclass), [])
+            flags = 0x8000 | self.rcode | (0x0200 if self.truncate else 0)
+            header = struct.pack("!HHHHHH", data[0] << 8 | data[1], flags, 1, 0, 0, 0)
+            header = header[:6] + struct.pack("!H", len(answers)) + header[8:]
+            body = data[12:question_end]
+            for rdata in answers:
+                # Answer names use a compression pointer to the question.
+                body += struct.pack("!HHHIH", 0xC00C, qtype, qclass, 60, len(rdata))
+                body += rdata
+            self.sock.sendto(header + body, peer)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def server():
+    stub = StubDNSServer()
+    yield stub
+    stub.close()
+
+
+def test_a_record(server):
+    server.records[("myip.opendns.com", TYPE_A, CLASS_IN)] = [bytes([8, 8, 8, 8])]
+    answers = dnsclient.query(
+        "127.0.0.1", "myip.opendns.com", TYPE_A, port=server.port, timeout=2
+    )
+    assert answers == ["8.8.8.8"]
+
+
+def test_aaaa_record(server):
+    server.records[("myip.opendns.com", TYPE_AAAA, CLASS_IN)] = [
+        bytes.fromhex("26064700470000000000000000001111")
+    ]
+    answers = dnsclient.query(
+        "127.0.0.1", "myip.opendns.com", TYPE_AAAA, port=server.port, timeout=2
+    )
+    assert answers == ["2606:4700:4700::1111"]
+
+
+def test_chaos_txt_record(server):
+    server.records[("whoami.cloudflare", TYPE_TXT, CLASS_CH)] = [_txt("9.9.9.9")]
+    answers = dnsclient.query(
+        "127.0.0.1",
+        "whoami.cloudflare",
+        TYPE_TXT,
+        CLASS_CH,
+        port=server.port,
+        timeout=2,
+    )
+    assert answers == ["9.9.9.9"]
+
+
+def test_multi_string_txt_is_joined(server):
+    server.records[("o-o.myaddr.l.google.com", TYPE_TXT, CLASS_IN)] = [
+        _txt("9.9.", "9.9")
+    ]
+    answers = dnsclient.query(
+        "127.0.0.1", "o-o.myaddr.l.google.com", TYPE_TXT, port=server.port, timeout=2
+    )
+    assert answers == ["9.9.9.9"]
+
+
+def test_error_rcode_raises(server):
+    server.rcode = 3
+    with pytest.raises(dnsclient.DNSError, match="NXDOMAIN"):
+        dnsclient.query("127.0.0.1", "nope.example", TYPE_A, port=server.port)
+
+
+def test_truncated_response_raises(server):
+    server.truncate = True
+    with pytest.raises(dnsclient.DNSError, match="truncated"):
+        dnsclient.query("127.0.0.1", "myip.opendns.com", TYPE_A, port=server.port)
+
+
+def test_timeout_raises(server):
+    server.silent.add("myip.opendns.com")
+    with pytest.raises(dnsclient.DNSError):
+        dnsclient.query(
+            "127.0.0.1", "myip.opendns.com", TYPE_A, port=server.port, timeout=0.2
+        )
+
+
+def test_mismatched_id_rejected():
+    reply = struct.pack("!HHHHHH", 1, 0x8000, 0, 0, 0, 0)
+    with pytest.raises(dnsclient.DNSError):
+        dnsclient.parse_response(reply, 2, TYPE_A)
+
+
+def test_detector_uses_dns_source(server):
+    server.records[("o-o.myaddr.l.google.com", TYPE_TXT, CLASS_IN)] = [
+        _txt("edns0-client-subnet 10.0.0.0/24"),
+        _txt("8.8.8.8"),
+    ]
+    source = DNSSource(
+        "stub", "127.0.0.1", "o-o.myaddr.l.google.com", TYPE_TXT, port=server.port
+    )
+    detector = IPDetector(timeout=2, ipv4_sources=[source])
+    assert detector.get_ipv4() == "8.8.8.8"
+    assert detector.scores.snapshot()["ipv4"][0]["successes"] == 1
+
+
+def test_detector_dns_failure_is_a_failed_source(server):
+    server.rcode = 2
+    source = DNSSource(
+        "stub", "127.0.0.1", "myip.opendns.com", TYPE_A, port=server.port
+    )
+    detector = IPDetector(timeout=2, ipv4_sources=[source])
+    assert detector.get_ipv4() is None
+
+
+def test_dns_modes_build_source_lists():
+    assert IPDetector().ipv4_sources[0].name == "ipify"
+    prefer = IPDetector(dns_sources="prefer").ipv4_sources
+    assert isinstance(prefer[0], DNSSource)
+    assert not isinstance(prefer[-1], DNSSource)
+    only = IPDetector(dns_sources="only").ipv6_sources
+    assert all(isinstance(source, DNSSource) for source in only)
+    assert all(
+        is_valid_ipv4(s.server) for s in IPDetector(dns_sources="only").ipv4_sources
+    )
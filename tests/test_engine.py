@@ -0,0 +1,91 @@
+"""Tests for the optional asyncio engine."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from wanwatcher.app import Application
+from wanwatcher.config import Config, DiscordConfig
+from wanwatcher.engine import AsyncEngine
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = Config(
+        ip_db_file=str(tmp_path / "state.json"),
+        log_file=str(tmp_path / "ww.log"),
+        monitor_ipv4=True,
+        monitor_ipv6=False,
+        discord=DiscordConfig(enabled=True, webhook_url="https://discord.com/x"),
+        check_engine="asyncio",
+    )
+    application = Application(config)
+    application.detector = MagicMock()
+    application.detector.get_ipv4.return_value = "1.2.3.4"
+    application.notifications = MagicMock()
+    application.notifications.providers = [MagicMock()]
+    application.notifications.send_change.return_value = {"DiscordNotifier": True}
+    application.state = application.store.load()
+    return application
+
+
+def _rounds(app, count):
+    """Let the engine sleep ``count`` times for a moment, then shut down."""
+    calls = {"n": 0}
+
+    def fake_sleep(timeout):
+        calls["n"] += 1
+        if calls["n"] > count:
+            return True
+        time.sleep(0.05)
+        return False
+
+    app._sleep = fake_sleep
+
+
+def test_initial_check_runs_side_effects(app):
+    _rounds(app, 0)
+    AsyncEngine(app).run()
+    assert app.check_count == 1
+    app.notifications.send_change.assert_called_once()
+
+
+def test_slow_side_effect_does_not_delay_next_check(app):
+    release = threading.Event()
+    app.notifications.send_change.side_effect = lambda *a, **k: (release.wait(2) and {})
+    checks_while_blocked = []
+
+    original_observe = app.observe
+
+    def observe():
+        result = original_observe()
+        checks_while_blocked.append(not release.is_set())
+        return result
+
+    app.observe = observe
+    _rounds(app, 2)
+    engine = AsyncEngine(app)
+    timer = threading.Timer(0.5, release.set)
+    timer.start()
+    engine.run()
+    timer.cancel()
+    # All three checks ran while the first notification was still blocked.
+    assert checks_while_blocked == [True, True, True]
+
+
+def test_task_missing_deadline_is_abandoned_and_skipped(app):
+    release = threading.Event()
+    app.detector.get_ipv4.side_effect = lambda previous=None: (
+        release.wait(2) and "1.2.3.4"
+    )
+    _rounds(app, 1)
+    engine = AsyncEngine(app)
+    engine.deadline = 0.05
+    engine.run()
+    release.set()
+    text = app.metrics.render()
+    assert 'wanwatcher_task_deadline_exceeded_total{task="observe"} 1' in text
+    # The second round found the first observe still running and skipped it.
+    assert app.check_count == 1
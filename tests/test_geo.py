@@ -9,7 +9,7 @@ def test_no_token_returns_none():
     assert get_geo_data("") is None
 
 
-@patch("wanwatcher.geo.requests.get")
+@patch("requests.Session.get")
 def test_successful_lookup(mock_get):
     resp = MagicMock()
     resp.raise_for_status = MagicMock()
@@ -28,7 +28,7 @@ def test_successful_lookup(mock_get):
     assert "Bearer token" in mock_get.call_args.kwargs["headers"]["Authorization"]
 
 
-@patch("wanwatcher.geo.requests.get")
+@patch("requests.Session.get")
 def test_network_error_returns_none(mock_get):
     import requests
 
@@ -36,7 +36,7 @@ def test_network_error_returns_none(mock_get):
     assert get_geo_data("token") is None
 
 
-@patch("wanwatcher.geo.requests.get")
+@patch("requests.Session.get")
 def test_non_dict_payload_returns_none(mock_get):
     resp = MagicMock()
     resp.raise_for_status = MagicMock()
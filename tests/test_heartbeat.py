@@ -0,0 +1,68 @@
+"""Tests for the heartbeat file and the healthcheck script's fast path."""
+
+import importlib.util
+import os
+import time
+
+import pytest
+
+from wanwatcher.heartbeat import Heartbeat, stale_after
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def healthcheck():
+    path = os.path.join(ROOT, "scripts", "healthcheck.py")
+    spec = importlib.util.spec_from_file_location("healthcheck", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_beat_sets_mtime_to_expiry(tmp_path):
+    path = str(tmp_path / "state.json.alive")
+    heartbeat = Heartbeat(path, ttl=600)
+    heartbeat.beat(now=1_000_000)
+    assert os.stat(path).st_mtime == 1_000_600
+    heartbeat.beat(now=1_000_100)
+    assert os.stat(path).st_mtime == 1_000_700
+
+
+def test_clear_removes_file(tmp_path):
+    heartbeat = Heartbeat(str(tmp_path / "x.alive"), ttl=60)
+    heartbeat.beat()
+    heartbeat.clear()
+    assert not os.path.exists(heartbeat.path)
+    heartbeat.clear()  # already gone
+
+
+def test_unwritable_location_is_not_fatal(tmp_path, caplog):
+    heartbeat = Heartbeat(str(tmp_path / "missing" / "x.alive"), ttl=60)
+    heartbeat.beat()
+    heartbeat.beat()
+    assert len([r for r in caplog.records if "heartbeat" in r.message]) == 1
+
+
+def test_stale_after_matches_healthz_threshold():
+    assert stale_after(60) == 1800 + 120
+    assert stale_after(3600) == 3 * 3600 + 120
+
+
+def test_healthcheck_heartbeat(tmp_path, healthcheck):
+    path = str(tmp_path / "state.json.alive")
+    assert healthcheck.check_heartbeat(path) is None
+    Heartbeat(path, ttl=60).beat()
+    assert healthcheck.check_heartbeat(path) is True
+    Heartbeat(path, ttl=60).beat(now=time.time() - 120)
+    assert healthcheck.check_heartbeat(path) is False
+
+
+def test_healthcheck_prefers_heartbeat(tmp_path, monkeypatch, healthcheck):
+    state_file = str(tmp_path / "state.json")
+    monkeypatch.setenv("IP_DB_FILE", state_file)
+    monkeypatch.setenv("API_ENABLED", "true")
+    monkeypatch.setattr(healthcheck, "check_api", lambda port: False)
+    assert healthcheck.main() == 1  # no heartbeat: falls back to the API
+    Heartbeat(state_file + ".alive", ttl=60).beat()
+    assert healthcheck.main() == 0
@@ -0,0 +1,148 @@
+"""Tests for wanwatcher.history: the append-only change history log."""
+
+import json
+import os
+
+import pytest
+
+from wanwatcher.history import INDEX_STRIDE, HistoryLog, parse_time
+
+DAY = 86400
+
+
+@pytest.fixture
+def log(tmp_path):
+    history = HistoryLog(str(tmp_path / "ipinfo.db.history"))
+    history.open()
+    return history
+
+
+def fill(log, count, start=1_000_000, step=60):
+    for n in range(count):
+        log.record_change(
+            f"10.0.{n // 256}.{n % 256}",
+            f"10.1.0.{n % 256}",
+            None,
+            None,
+            ts=start + n * step,
+        )
+
+
+def test_one_record_per_changed_family(log):
+    log.record_change("1.1.1.1", "2.2.2.2", "::1", "::2", ts=100)
+    log.record_change("2.2.2.2", "2.2.2.2", "::2", "::3", ts=200)
+    assert log.query() == [
+        {"ts": 100, "family": "ipv4", "old": "1.1.1.1", "new": "2.2.2.2"},
+        {"ts": 100, "family": "ipv6", "old": "::1", "new": "::2"},
+        {"ts": 200, "family": "ipv6", "old": "::2", "new": "::3"},
+    ]
+
+
+def test_range_and_family_filters(log):
+    fill(log, 10)
+    log.record_change(None, None, "::1", "::2", ts=1_000_000 + 300)
+    result = log.query(since=1_000_000 + 120, until=1_000_000 + 300, family="ipv4")
+    assert [r["ts"] for r in result] == [1_000_120, 1_000_180, 1_000_240, 1_000_300]
+    assert [r["family"] for r in log.query(family="ipv6")] == ["ipv6"]
+
+
+def test_limit_keeps_newest(log):
+    fill(log, 10)
+    assert [r["ts"] for r in log.query(limit=2)] == [1_000_480, 1_000_540]
+
+
+def test_index_is_sparse(log):
+    fill(log, 500)
+    with open(log.path + ".idx", encoding="utf-8") as fh:
+        entries = [line.split() for line in fh]
+    assert entries[0] == ["1000000", "0"]
+    assert 1 < len(entries) <= os.path.getsize(log.path) // INDEX_STRIDE + 1
+
+
+def test_query_seeks_past_earlier_records(log, monkeypatch):
+    fill(log, 500)
+    seen = []
+    real_loads = json.loads
+    monkeypatch.setattr(
+        "wanwatcher.history.json.loads", lambda raw: seen.append(raw) or real_loads(raw)
+    )
+    assert len(log.query(since=1_000_000 + 490 * 60)) == 10
+    assert len(seen) < 100
+
+
+def test_rotation_keeps_queries_across_segments(tmp_path):
+    log = HistoryLog(str(tmp_path / "h"), retention_days=0, segment_bytes=4096)
+    fill(log, 200)
+    segments = [name for name in os.listdir(tmp_path) if not name.endswith(".idx")]
+    assert len(segments) > 2
+    result = log.query()
+    assert [r["ts"] for r in result] == [1_000_000 + n * 60 for n in range(200)]
+    since = 1_000_000 + 150 * 60
+    assert len(log.query(since=since, until=since + 9 * 60)) == 10
+
+
+def test_prune_removes_expired_segments(tmp_path):
+    log = HistoryLog(str(tmp_path / "h"), retention_days=0, segment_bytes=4096)
+    fill(log, 200, start=0, step=DAY // 20)  # ten days
+    log.retention = DAY
+    removed = log.prune(now=10 * DAY)
+    assert removed > 0
+    first = log.query()[0]["ts"]
+    # Whole segments before the cutoff go; the one straddling it stays.
+    assert 5 * DAY < first <= 9 * DAY
+    assert log.query()[-1]["ts"] == 199 * (DAY // 20)
+
+
+def test_torn_last_line_is_skipped(log):
+    fill(log, 2)
+    with open(log.path, "a", encoding="utf-8") as fh:
+        fh.write('{"ts": 9')
+    assert len(log.query()) == 2
+
+
+def test_torn_tail_is_cut_on_open(tmp_path):
+    path = str(tmp_path / "h")
+    log = HistoryLog(path, retention_days=0)
+    log.record_change("1.1.1.1", "2.2.2.2", None, None, ts=100)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"ts": 2')
+    with open(path + ".idx", "a", encoding="utf-8") as idx:
+        idx.write(f"200.0 {os.path.getsize(path) - 8}\n")
+
+    log = HistoryLog(path, retention_days=0)
+    log.open()
+    log.record_change("2.2.2.2", "3.3.3.3", None, None, ts=300)
+    assert [record["ts"] for record in log.query()] == [100, 300]
+    assert [ts for ts, _ in log._read_index(path)] == [100]
+
+
+def test_reopen_continues_segment(tmp_path):
+    path = str(tmp_path / "h")
+    fill(HistoryLog(path), 3)
+    log = HistoryLog(path)
+    log.open()
+    fill(log, 1, start=2_000_000)
+    assert len(log.query(since=1_000_000)) == 4
+
+
+def test_import_legacy_only_into_empty_log(log):
+    entries = [
+        {
+            "at": "2026-01-01T00:00:00+00:00",
+            "old_ipv4": "1.1.1.1",
+            "new_ipv4": "2.2.2.2",
+            "old_ipv6": None,
+            "new_ipv6": None,
+        },
+        {"at": "garbage"},
+    ]
+    assert log.import_legacy(entries) == 1
+    assert log.query()[0]["ts"] == parse_time("2026-01-01T00:00:00Z")
+    assert log.import_legacy(entries) == 0
+
+
+def test_parse_time():
+    assert parse_time("1700000000") == 1_700_000_000
+    assert parse_time("1970-01-01T00:01:00") == 60
+    with pytest.raises(ValueError):
+        parse_time("yesterday")
@@ -0,0 +1,63 @@
+"""Tests for wanwatcher.httpclient: pooling setup and the shared default."""
+
+from unittest.mock import Mock, patch
+
+from wanwatcher.httpclient import HTTPClient, default_client
+
+
+def test_adapter_uses_configured_pool_sizes():
+    client = HTTPClient(pool_connections=3, pool_maxsize=7)
+    adapter = client._session.get_adapter("https://api.ipify.org")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 7
+    assert adapter.max_retries.total == 0
+
+
+def test_pool_sizes_are_at_least_one():
+    client = HTTPClient(pool_connections=0, pool_maxsize=-1)
+    assert client.pool_connections == 1
+    assert client.pool_maxsize == 1
+
+
+def test_same_session_is_reused_across_calls():
+    client = HTTPClient()
+    with patch("requests.Session.get", return_value=Mock(status_code=200)) as get:
+        client.get("https://a.example/ip", timeout=3)
+        client.get("https://b.example/ip", timeout=4)
+    assert get.call_count == 2
+    assert get.call_args.kwargs == {"timeout": 4}
+
+
+def test_request_and_post_delegate_to_the_session():
+    client = HTTPClient()
+    with (
+        patch("requests.Session.request") as request,
+        patch("requests.Session.post") as post,
+    ):
+        client.request("PUT", "https://api.example/x", json={"a": 1}, timeout=2)
+        client.post("https://hook.example/y", json={"b": 2}, timeout=5)
+    request.assert_called_once_with(
+        "PUT", "https://api.example/x", json={"a": 1}, timeout=2
+    )
+    post.assert_called_once_with("https://hook.example/y", json={"b": 2}, timeout=5)
+
+
+def test_default_client_is_shared():
+    assert default_client() is default_client()
+
+
+def test_components_fall_back_to_default_client():
+    from wanwatcher.detector import IPDetector
+    from wanwatcher.notifiers import DiscordNotifier
+
+    assert IPDetector().http is default_client()
+    assert DiscordNotifier("https://discord.com/api/webhooks/1/x").http is (
+        default_client()
+    )
+
+
+def test_injected_client_is_used():
+    from wanwatcher.detector import IPDetector
+
+    client = HTTPClient()
+    assert IPDetector(http=client).http is client
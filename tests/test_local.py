@@ -0,0 +1,166 @@
+"""Tests for wanwatcher.local and the detector's local tier."""
+
+import socket
+import struct
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from wanwatcher import local
+from wanwatcher.detector import IPDetector
+from wanwatcher.local import (
+    IFA_F_DEPRECATED,
+    IFA_F_TEMPORARY,
+    LocalDetector,
+    default_gateway,
+    if_inet6_addresses,
+    natpmp_external_address,
+    parse_addr_messages,
+)
+
+
+def _newaddr(family, raw, scope=0, flags=0):
+    attr = struct.pack("=HH", 4 + len(raw), local.IFA_LOCAL) + raw
+    body = struct.pack("=BBBBI", family, 32, flags, scope, 2) + attr
+    return struct.pack("=IHHII", 16 + len(body), local.RTM_NEWADDR, 2, 1, 0) + body
+
+
+def _done():
+    return struct.pack("=IHHII", 20, local.NLMSG_DONE, 2, 1, 0) + b"\x00" * 4
+
+
+def test_parse_addr_messages_keeps_global_scope():
+    data = (
+        _newaddr(socket.AF_INET, socket.inet_aton("8.8.8.8"))
+        + _newaddr(socket.AF_INET, socket.inet_aton("127.0.0.1"), scope=254)
+        + _done()
+    )
+    found, done = parse_addr_messages(data)
+    assert found == [("8.8.8.8", 0)]
+    assert done is True
+
+
+def test_if_inet6_parsing(tmp_path):
+    path = tmp_path / "if_inet6"
+    path.write_text(
+        "fe800000000000000000000000000001 02 40 20 80     eth0\n"
+        "26064700470000000000000000001111 02 40 00 01     eth0\n"
+    )
+    assert if_inet6_addresses(str(path)) == [("2606:4700:4700::1111", 1)]
+
+
+def test_default_gateway(tmp_path):
+    path = tmp_path / "route"
+    path.write_text(
+        "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\n"
+        "eth0\t0002000A\t00000000\t0001\t0\t0\t0\t00FFFFFF\n"
+        "eth0\t00000000\t0102000A\t0003\t0\t0\t0\t00000000\n"
+    )
+    assert default_gateway(str(path)) == "10.0.2.1"
+
+
+@pytest.fixture
+def natpmp_gateway():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+
+    def serve():
+        try:
+            data, peer = sock.recvfrom(16)
+        except OSError:
+            return
+        if data == b"\x00\x00":
+            reply = struct.pack("!BBHI", 0, 128, 0, 1234) + socket.inet_aton("8.8.4.4")
+            sock.sendto(reply, peer)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def test_natpmp_external_address(natpmp_gateway):
+    assert natpmp_external_address("127.0.0.1", natpmp_gateway, 1.0) == "8.8.4.4"
+
+
+def test_local_detector_filters_and_orders():
+    addresses = [
+        ("2606:4700::2", IFA_F_TEMPORARY),
+        ("2606:4700::3", IFA_F_DEPRECATED),
+        ("2606:4700::1", 0),
+    ]
+    with patch("wanwatcher.local.netlink_addresses", return_value=addresses):
+        assert LocalDetector().addresses("ipv6") == [
+            "2606:4700::1",
+            "2606:4700::2",
+        ]
+
+
+def test_local_detector_natpmp_only_without_public_interface():
+    detector = LocalDetector(natpmp=True)
+    with (
+        patch("wanwatcher.local.netlink_addresses", return_value=[]),
+        patch.object(detector, "_natpmp_address", return_value="8.8.4.4") as natpmp,
+    ):
+        assert detector.addresses("ipv4") == ["8.8.4.4"]
+        assert detector.addresses("ipv6") == []
+        assert natpmp.call_count == 1
+
+
+def test_local_detector_asks_natpmp_behind_private_interface():
+    detector = LocalDetector(natpmp=True)
+    interfaces = [("192.168.1.10", 0), ("100.64.0.7", 0)]
+    with (
+        patch("wanwatcher.local.netlink_addresses", return_value=interfaces),
+        patch.object(detector, "_natpmp_address", return_value="8.8.4.4") as natpmp,
+    ):
+        assert detector.addresses("ipv4") == ["8.8.4.4"]
+        assert natpmp.call_count == 1
+
+
+class TestDetectorLocalTier:
+    def _detector(self, addresses, **kwargs):
+        fake = MagicMock()
+        fake.addresses.return_value = addresses
+        return IPDetector(local=fake, **kwargs)
+
+    @patch("requests.Session.get")
+    def test_unchanged_local_address_skips_network(self, mock_get):
+        detector = self._detector(["10.0.0.2", "8.8.8.8"])
+        assert detector.get_ipv4(previous="8.8.8.8") == "8.8.8.8"
+        mock_get.assert_not_called()
+        assert detector.scores.snapshot()["ipv4"][0]["source"] == "local"
+
+    @patch("requests.Session.get")
+    def test_changed_local_address_is_confirmed_remotely(self, mock_get):
+        mock_get.return_value = MagicMock(
+            status_code=200, text="9.9.9.9", json=lambda: {"ip": "9.9.9.9"}
+        )
+        detector = self._detector(["9.9.9.9"])
+        assert detector.get_ipv4(previous="8.8.8.8") == "9.9.9.9"
+        assert mock_get.call_count >= 2
+
+    @patch("requests.Session.get")
+    def test_change_accepted_locally_without_confirmation(self, mock_get):
+        detector = self._detector(["9.9.9.9"], change_confirmation=False)
+        assert detector.get_ipv4(previous="8.8.8.8") == "9.9.9.9"
+        mock_get.assert_not_called()
+
+    @patch("requests.Session.get")
+    def test_no_public_local_address_falls_back(self, mock_get):
+        mock_get.return_value = MagicMock(
+            status_code=200, text="8.8.8.8", json=lambda: {"ip": "8.8.8.8"}
+        )
+        detector = self._detector(["192.168.1.10"])
+        assert detector.get_ipv4(previous="8.8.8.8") == "8.8.8.8"
+        assert mock_get.call_count == 1
+
+    @patch("requests.Session.get")
+    def test_cgnat_local_address_falls_back(self, mock_get):
+        mock_get.return_value = MagicMock(
+            status_code=200, text="8.8.8.8", json=lambda: {"ip": "8.8.8.8"}
+        )
+        detector = self._detector(["100.64.12.34"], change_confirmation=False)
+        assert detector.get_ipv4(previous="8.8.8.8") == "8.8.8.8"
+        assert mock_get.call_count == 1
+        assert detector.answered["ipv4"] != "local"
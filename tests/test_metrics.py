@@ -60,3 +60,86 @@ def test_startup_gauges_present():
     out = Metrics().render()
     assert "wanwatcher_up 1" in out
     assert "wanwatcher_start_time_seconds" in out
+
+
+def test_histogram_buckets_are_cumulative():
+    m = Metrics(latency_buckets=[0.1, 1.0])
+    for value in (0.05, 0.5, 0.5, 3.0):
+        m.observe("wanwatcher_ddns_update_duration_seconds", value, {"provider": "x"})
+    out = m.render()
+    name = "wanwatcher_ddns_update_duration_seconds"
+    assert f"# TYPE {name} histogram" in out
+    assert f'{name}_bucket{{provider="x",le="0.1"}} 1' in out
+    assert f'{name}_bucket{{provider="x",le="1.0"}} 3' in out
+    assert f'{name}_bucket{{provider="x",le="+Inf"}} 4' in out
+    assert f'{name}_count{{provider="x"}} 4' in out
+    assert f'{name}_sum{{provider="x"}} 4.05' in out
+
+
+def test_default_buckets_without_configuration():
+    m = Metrics()
+    m.observe("wanwatcher_geo_lookup_duration_seconds", 0.2)
+    out = m.render()
+    assert 'wanwatcher_geo_lookup_duration_seconds_bucket{le="0.005"} 0' in out
+    assert 'wanwatcher_geo_lookup_duration_seconds_bucket{le="30.0"} 1' in out
+
+
+def test_summary_quantiles_track_the_stream():
+    m = Metrics()
+    for value in range(1, 1001):
+        m.observe("wanwatcher_state_save_duration_seconds", float(value))
+    lines = {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in m.render().splitlines()
+        if line.startswith("wanwatcher_state_save_duration_seconds")
+    }
+    name = "wanwatcher_state_save_duration_seconds"
+    assert abs(lines[f'{name}{{quantile="0.5"}}'] - 500) < 25
+    assert abs(lines[f'{name}{{quantile="0.9"}}'] - 900) < 25
+    assert abs(lines[f'{name}{{quantile="0.99"}}'] - 990) < 10
+    assert lines[f"{name}_count"] == 1000
+    assert "# TYPE wanwatcher_state_save_duration_seconds summary" in m.render()
+
+
+def test_unobserved_histograms_are_not_rendered():
+    out = Metrics().render()
+    assert "wanwatcher_source_query_duration_seconds" not in out
+
+
+def test_unchanged_registry_serves_cached_exposition():
+    m = Metrics()
+    m.inc("wanwatcher_checks_total")
+    first = m.render_bytes()
+    assert m.render_bytes() is first
+    m.set_gauge("wanwatcher_up", 1)  # same value: still cached
+    assert m.render_bytes() is first
+
+
+def test_changes_invalidate_the_cache():
+    m = Metrics()
+    m.inc("wanwatcher_checks_total")
+    before = m.render_bytes()
+    m.inc("wanwatcher_checks_total")
+    assert b"wanwatcher_checks_total 2" in m.render_bytes()
+    m.inc("wanwatcher_ip_changes_total", {"family": "ipv6"})
+    m.observe("wanwatcher_geo_lookup_duration_seconds", 0.1)
+    after = m.render()
+    assert 'wanwatcher_ip_changes_total{family="ipv6"} 1' in after
+    assert "wanwatcher_geo_lookup_duration_seconds_count 1" in after
+    assert m.render_bytes() != before
+
+
+def test_new_series_keep_sorted_order():
+    m = Metrics()
+    m.inc("wanwatcher_ip_changes_total", {"family": "ipv6"})
+    m.render()
+    m.inc("wanwatcher_ip_changes_total", {"family": "ipv4"})
+    lines = [
+        line
+        for line in m.render().splitlines()
+        if line.startswith("wanwatcher_ip_changes_total")
+    ]
+    assert lines == [
+        'wanwatcher_ip_changes_total{family="ipv4"} 1',
+        'wanwatcher_ip_changes_total{family="ipv6"} 1',
+    ]
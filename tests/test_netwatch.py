@@ -0,0 +1,139 @@
+"""Tests for wanwatcher.netwatch event filtering and debouncing."""
+
+import errno
+import socket
+import struct
+import threading
+import time
+
+from wanwatcher import local, netwatch
+from wanwatcher.netwatch import NetworkWatcher
+
+
+def _message(msg_type, body):
+    return struct.pack("=IHHII", 16 + len(body), msg_type, 0, 0, 0) + body
+
+
+def _addr(msg_type, address, scope=0, flags=0):
+    raw = socket.inet_aton(address)
+    attr = struct.pack("=HH", 4 + len(raw), local.IFA_LOCAL) + raw
+    return _message(
+        msg_type, struct.pack("=BBBBI", socket.AF_INET, 24, flags, scope, 2) + attr
+    )
+
+
+def _route(msg_type, gateway, dst_len=0, table=netwatch.RT_TABLE_MAIN):
+    raw = socket.inet_aton(gateway)
+    attr = struct.pack("=HH", 4 + len(raw), netwatch.RTA_GATEWAY) + raw
+    header = struct.pack(
+        "=BBBBBBBBI",
+        socket.AF_INET,
+        dst_len,
+        0,
+        0,
+        table,
+        0,
+        0,
+        netwatch.RTN_UNICAST,
+        0,
+    )
+    return _message(msg_type, header + attr)
+
+
+def test_new_address_is_a_change_but_refresh_is_not():
+    watcher = NetworkWatcher(lambda: None)
+    assert watcher.handle(_addr(local.RTM_NEWADDR, "8.8.8.8")) is True
+    assert watcher.handle(_addr(local.RTM_NEWADDR, "8.8.8.8")) is False
+
+
+def test_removed_or_deprecated_address_is_a_change():
+    watcher = NetworkWatcher(lambda: None)
+    watcher.addresses = {"8.8.8.8", "9.9.9.9"}
+    assert watcher.handle(_addr(netwatch.RTM_DELADDR, "8.8.8.8")) is True
+    deprecated = _addr(local.RTM_NEWADDR, "9.9.9.9", flags=local.IFA_F_DEPRECATED)
+    assert watcher.handle(deprecated) is True
+    assert watcher.addresses == set()
+
+
+def test_non_global_addresses_are_ignored():
+    watcher = NetworkWatcher(lambda: None)
+    assert watcher.handle(_addr(local.RTM_NEWADDR, "127.0.0.1", scope=254)) is False
+
+
+def test_only_default_routes_matter():
+    watcher = NetworkWatcher(lambda: None)
+    assert (
+        watcher.handle(_route(netwatch.RTM_NEWROUTE, "10.0.0.1", dst_len=24)) is False
+    )
+    assert watcher.handle(_route(netwatch.RTM_NEWROUTE, "10.0.0.1")) is True
+    assert watcher.handle(_route(netwatch.RTM_NEWROUTE, "10.0.0.1")) is False
+    assert watcher.handle(_route(netwatch.RTM_DELROUTE, "10.0.0.1")) is True
+
+
+class _FakeSocket:
+    def __init__(self, datagrams, watcher):
+        self.datagrams = list(datagrams)
+        self.watcher = watcher
+
+    def recv(self, _size):
+        if self.datagrams:
+            item = self.datagrams.pop(0)
+            if isinstance(item, Exception):
+                raise item
+            return item
+        if self.watcher._stop.is_set():
+            raise OSError("closed")
+        time.sleep(0.01)
+        raise socket.timeout()
+
+
+def test_burst_is_debounced_into_one_callback():
+    calls = []
+    watcher = NetworkWatcher(lambda: calls.append(1), debounce=0.05)
+    watcher._sock = _FakeSocket(
+        [
+            _addr(local.RTM_NEWADDR, "8.8.8.8"),
+            _route(netwatch.RTM_NEWROUTE, "10.0.0.1"),
+            _addr(local.RTM_NEWADDR, "9.9.9.9"),
+        ],
+        watcher,
+    )
+    thread = threading.Thread(target=watcher._run, daemon=True)
+    thread.start()
+    time.sleep(0.3)
+    watcher._stop.set()
+    thread.join(timeout=2)
+    assert calls == [1]
+
+
+def test_lost_notifications_resync_and_keep_watching(monkeypatch):
+    calls = []
+    watcher = NetworkWatcher(lambda: calls.append(1), debounce=0.05)
+    resyncs = []
+    monkeypatch.setattr(watcher, "resync", lambda: resyncs.append(1))
+    overflow = OSError(errno.ENOBUFS, "No buffer space available")
+    watcher._sock = _FakeSocket(
+        [overflow, _addr(local.RTM_NEWADDR, "8.8.8.8")], watcher
+    )
+    thread = threading.Thread(target=watcher._run, daemon=True)
+    thread.start()
+    time.sleep(0.3)
+    assert thread.is_alive()
+    watcher._stop.set()
+    thread.join(timeout=2)
+    assert resyncs == [1]
+    assert len(calls) >= 1
+    assert "8.8.8.8" in watcher.addresses
+
+
+def test_resync_seeds_default_routes(monkeypatch):
+    gateway = socket.inet_aton("10.0.0.1")
+    monkeypatch.setattr(netwatch, "netlink_addresses", lambda family: [])
+    monkeypatch.setattr(
+        netwatch,
+        "netlink_default_routes",
+        lambda: {(socket.AF_INET, gateway, b"")},
+    )
+    watcher = NetworkWatcher(lambda: None)
+    watcher.resync()
+    assert watcher.handle(_route(netwatch.RTM_NEWROUTE, "10.0.0.1")) is False
@@ -67,7 +67,7 @@ def test_discord_escape_neutralises_link_and_formatting():
 # -- Discord ------------------------------------------------------------------
 
 
-@patch("wanwatcher.notifiers.discord.requests.post")
+@patch("requests.Session.post")
 class TestDiscordEscaping:
     def make(self):
         return DiscordNotifier("https://discord.com/api/webhooks/1/a")
@@ -101,7 +101,7 @@ class TestDiscordEscaping:
 # -- Telegram -----------------------------------------------------------------
 
 
-@patch("wanwatcher.notifiers.telegram.requests.post")
+@patch("requests.Session.post")
 class TestTelegramEscaping:
     def make(self):
         return TelegramNotifier(BOT_TOKEN, "424242", parse_mode="HTML")
@@ -178,7 +178,7 @@ class TestEmailEscaping:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_geo_escaped_in_html(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         assert self.make().send_notification(
             CURRENT, PREVIOUS, HOSTILE_GEO, False, "Srv", "2.4.0"
         )
@@ -190,14 +190,14 @@ class TestEmailEscaping:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_html_template_structure_survives(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         self.make().send_notification(CURRENT, PREVIOUS, HOSTILE_GEO, False, "S", "2")
         html = _html_part(server.send_message.call_args.args[0])
         assert "<table" in html and "<body" in html  # template tags intact
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_changelog_and_url_escaped_in_update_html(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         self.make().send_update_notification(HOSTILE_UPDATE, "Srv", "2.4.0")
         html = _html_part(server.send_message.call_args.args[0])
         assert "<script>alert(1)</script>" not in html
@@ -205,7 +205,7 @@ class TestEmailEscaping:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_event_escaped_in_html(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         self.make().send_event("T<x>", "M & <b>bad</b>", "S")
         html = _html_part(server.send_message.call_args.args[0])
         assert "<b>bad</b>" not in html
@@ -215,7 +215,7 @@ class TestEmailEscaping:
     def test_plain_text_part_is_not_html_escaped(self, mock_smtp):
         # The plain-text alternative is not an HTML context; it should carry the
         # raw value (no entity noise).
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         self.make().send_notification(
             CURRENT, PREVIOUS, HOSTILE_GEO, False, "Srv", "2.4.0"
         )
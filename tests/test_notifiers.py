@@ -1,14 +1,19 @@
 """Tests for wanwatcher.notifiers: retry, manager fan-out, providers."""
 
+import email.utils
+import smtplib
 import sys
+import threading
+import time
 import types
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 import requests
 
 from wanwatcher.config import Config, DiscordConfig, EmailConfig, TelegramConfig
 from wanwatcher.notifiers import (
+    ChangeEvent,
     DiscordNotifier,
     EmailNotifier,
     NotificationManager,
@@ -17,6 +22,8 @@ from wanwatcher.notifiers import (
     build_manager,
     retry_with_backoff,
 )
+from wanwatcher.notifiers.base import DeliveryResult, parse_retry_after
+from wanwatcher.notifiers.email import SMTPSession
 
 CURRENT_IPS = {"ipv4": "9.9.9.9", "ipv6": None}
 PREVIOUS_IPS = {"ipv4": "8.8.8.8", "ipv6": None}
@@ -76,6 +83,48 @@ class TestRetryWithBackoff:
         assert [call.args[0] for call in no_sleep.call_args_list] == [2.0, 4.0]
 
 
+class TestRetryAfter:
+    def test_header_seconds(self):
+        response = Mock(headers={"Retry-After": "7"})
+        assert parse_retry_after(response) == 7.0
+
+    def test_header_http_date(self):
+        when = email.utils.formatdate(time.time() + 30, usegmt=True)
+        response = Mock(headers={"Retry-After": when})
+        assert 25 < parse_retry_after(response) <= 30
+
+    def test_discord_body(self):
+        response = Mock(headers={}, json=Mock(return_value={"retry_after": 1.5}))
+        assert parse_retry_after(response) == 1.5
+
+    def test_telegram_body(self):
+        body = {"ok": False, "parameters": {"retry_after": 12}}
+        response = Mock(headers={}, json=Mock(return_value=body))
+        assert parse_retry_after(response) == 12.0
+
+    def test_no_hint(self):
+        response = Mock(headers={}, json=Mock(side_effect=ValueError))
+        assert parse_retry_after(response) is None
+
+    def test_delivery_result_only_parses_hint_when_throttled(self):
+        response = Mock(status_code=400, headers={"Retry-After": "5"}, text="bad")
+        assert DeliveryResult.from_response(response, 204).retry_after is None
+        response.status_code = 429
+        result = DeliveryResult.from_response(response, 204)
+        assert result.rate_limited and result.retry_after == 5.0
+
+    def test_retry_uses_server_hint(self, no_sleep):
+        func = Mock(side_effect=[False, True])
+        assert retry_with_backoff(func, base_delay=2.0, retry_after=lambda: 0.25)
+        no_sleep.assert_called_once_with(0.25)
+
+    def test_long_hint_stops_retrying(self, no_sleep):
+        func = Mock(return_value=False)
+        assert not retry_with_backoff(func, max_retries=3, retry_after=lambda: 3600)
+        assert func.call_count == 1
+        no_sleep.assert_not_called()
+
+
 # -- NotificationManager -----------------------------------------------------
 
 
@@ -189,6 +238,69 @@ class TestNotificationManager:
         )
         assert results == {"RecordingProviderA": True}
 
+    def test_providers_are_dispatched_concurrently(self):
+        """Every provider must be running before any of them returns."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        class BarrierProvider(RecordingProviderA):
+            def send_notification(self, *args, **kwargs):
+                barrier.wait()
+                return True
+
+        class OtherBarrierProvider(BarrierProvider):
+            pass
+
+        manager = NotificationManager()
+        manager.add_provider(BarrierProvider())
+        manager.add_provider(OtherBarrierProvider())
+
+        results = manager.send_to_all(CURRENT_IPS, PREVIOUS_IPS, None, False, "S")
+
+        assert results == {"BarrierProvider": True, "OtherBarrierProvider": True}
+
+    def test_provider_missing_deadline_is_reported_unknown(self):
+        release = threading.Event()
+
+        class HangingProvider(RecordingProviderA):
+            def send_notification(self, *args, **kwargs):
+                release.wait(5)
+                return True
+
+        provider_b = RecordingProviderB()
+        manager = NotificationManager(deadline=0.2)
+        manager.add_provider(HangingProvider())
+        manager.add_provider(provider_b)
+        try:
+            started = time.monotonic()
+            results = manager.send_to_all(CURRENT_IPS, PREVIOUS_IPS, None, False, "S")
+            elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        assert results == {"HangingProvider": None, "RecordingProviderB": True}
+        assert list(results) == ["HangingProvider", "RecordingProviderB"]
+        assert elapsed < 2
+
+    def test_build_manager_applies_notify_deadline(self):
+        assert build_manager(Config(notify_deadline=15)).deadline == 15
+
+    def test_rate_limited_provider_backs_off_for_later_sends(self):
+        notifier = DiscordNotifier("https://discord.com/api/webhooks/1/a")
+        notifier.http = Mock()
+        notifier.http.post.side_effect = [
+            Mock(status_code=429, headers={"Retry-After": "0.2"}, text=""),
+            Mock(status_code=204, headers={}),
+        ]
+        manager = NotificationManager()
+        manager.add_provider(notifier)
+
+        with patch.object(notifier.rate_limit, "wait", return_value=True) as gate:
+            results = manager.notify_event("Title", "Body", "Server")
+
+        assert results == {"DiscordNotifier": True}
+        assert 0 < notifier.rate_limit.remaining() <= 0.2
+        assert gate.call_count == 2
+
     def test_no_providers_returns_empty_results(self):
         manager = NotificationManager()
         assert manager.send_to_all({}, {}, None, True, "Server") == {}
@@ -275,7 +387,7 @@ class TestBuildManager:
 # -- DiscordNotifier ----------------------------------------------------------
 
 
-@patch("wanwatcher.notifiers.discord.requests.post")
+@patch("requests.Session.post")
 class TestDiscordNotifier:
     def make_notifier(self, **kwargs):
         return DiscordNotifier("https://discord.com/api/webhooks/1/a", **kwargs)
@@ -355,7 +467,7 @@ class TestDiscordNotifier:
 BOT_TOKEN = "123456789:SECRETtokenSECRETtokenSECRETtoken"
 
 
-@patch("wanwatcher.notifiers.telegram.requests.post")
+@patch("requests.Session.post")
 class TestTelegramNotifier:
     def make_notifier(self):
         return TelegramNotifier(BOT_TOKEN, "424242", parse_mode="HTML")
@@ -438,7 +550,7 @@ class TestEmailNotifier:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_send_notification_via_starttls(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         notifier = self.make_notifier()
         assert notifier.send_notification(
             CURRENT_IPS, PREVIOUS_IPS, None, False, "Server", "2.0.0"
@@ -454,7 +566,7 @@ class TestEmailNotifier:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_plain_connection_without_tls(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         notifier = self.make_notifier(use_tls=False, smtp_port=25)
         assert notifier.send_notification(
             CURRENT_IPS, {}, None, True, "Server", "2.0.0"
@@ -463,7 +575,7 @@ class TestEmailNotifier:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP_SSL")
     def test_send_notification_via_ssl(self, mock_smtp_ssl):
-        server = mock_smtp_ssl.return_value.__enter__.return_value
+        server = mock_smtp_ssl.return_value
         notifier = self.make_notifier(use_ssl=True, use_tls=False, smtp_port=465)
         assert notifier.send_notification(
             CURRENT_IPS, PREVIOUS_IPS, None, False, "Server", "2.0.0"
@@ -474,7 +586,7 @@ class TestEmailNotifier:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_smtp_failure_returns_false(self, mock_smtp):
-        mock_smtp.return_value.__enter__.side_effect = ConnectionRefusedError()
+        mock_smtp.side_effect = ConnectionRefusedError()
         notifier = self.make_notifier()
         assert not notifier.send_notification(
             CURRENT_IPS, PREVIOUS_IPS, None, False, "Server", "2.0.0"
@@ -482,7 +594,7 @@ class TestEmailNotifier:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_send_update_notification(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         notifier = self.make_notifier()
         assert notifier.send_update_notification(UPDATE_INFO, "Server", "2.0.0")
         msg = server.send_message.call_args.args[0]
@@ -490,7 +602,7 @@ class TestEmailNotifier:
 
     @patch("wanwatcher.notifiers.email.smtplib.SMTP")
     def test_send_event(self, mock_smtp):
-        server = mock_smtp.return_value.__enter__.return_value
+        server = mock_smtp.return_value
         notifier = self.make_notifier()
         assert notifier.send_event("Heartbeat", "Still alive", "Server")
         msg = server.send_message.call_args.args[0]
@@ -501,6 +613,110 @@ class TestEmailNotifier:
         assert notifier.to_addrs == ["a@example.com", "b@example.com"]
 
 
+class TestSMTPSession:
+    def make_session(self, clock, idle_timeout=60):
+        return SMTPSession(
+            "smtp.example.com",
+            587,
+            "user",
+            "pass",
+            idle_timeout=idle_timeout,
+            clock=clock,
+        )
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_session_is_reused_after_noop(self, mock_smtp):
+        server = mock_smtp.return_value
+        server.noop.return_value = (250, b"OK")
+        clock = MagicMock(return_value=100.0)
+        session = self.make_session(clock)
+        session.send(["one"])
+        clock.return_value = 130.0
+        session.send(["two"])
+        mock_smtp.assert_called_once()
+        server.login.assert_called_once()
+        server.noop.assert_called_once()
+        assert server.send_message.call_count == 2
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_idle_session_is_replaced_without_noop(self, mock_smtp):
+        server = mock_smtp.return_value
+        clock = MagicMock(return_value=100.0)
+        session = self.make_session(clock, idle_timeout=60)
+        session.send(["one"])
+        clock.return_value = 161.0
+        session.send(["two"])
+        assert mock_smtp.call_count == 2
+        server.noop.assert_not_called()
+        server.quit.assert_called_once()
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_failed_noop_reconnects(self, mock_smtp):
+        server = mock_smtp.return_value
+        server.noop.side_effect = smtplib.SMTPServerDisconnected()
+        session = self.make_session(MagicMock(return_value=0.0))
+        session.send(["one"])
+        session.send(["two"])
+        assert mock_smtp.call_count == 2
+        assert session.connects == 2
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_disconnect_mid_send_retries_once_on_new_session(self, mock_smtp):
+        stale, fresh = MagicMock(), MagicMock()
+        stale.noop.return_value = (250, b"OK")
+        stale.send_message.side_effect = [None, smtplib.SMTPServerDisconnected()]
+        mock_smtp.side_effect = [stale, fresh]
+        session = self.make_session(MagicMock(return_value=0.0))
+        session.send(["one"])
+        session.send(["two"])
+        fresh.send_message.assert_called_once_with("two")
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_smtp_errors_on_a_reused_session_are_not_resent(self, mock_smtp):
+        server = mock_smtp.return_value
+        server.noop.return_value = (250, b"OK")
+        server.send_message.side_effect = [
+            None,
+            smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no")}),
+        ]
+        session = self.make_session(MagicMock(return_value=0.0))
+        session.send(["one"])
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            session.send(["two"])
+        mock_smtp.assert_called_once()
+        assert server.send_message.call_count == 2
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_reset_connection_mid_send_is_retried(self, mock_smtp):
+        stale, fresh = MagicMock(), MagicMock()
+        stale.noop.return_value = (250, b"OK")
+        stale.send_message.side_effect = [None, ConnectionResetError()]
+        mock_smtp.side_effect = [stale, fresh]
+        session = self.make_session(MagicMock(return_value=0.0))
+        session.send(["one"])
+        session.send(["two"])
+        fresh.send_message.assert_called_once_with("two")
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_zero_idle_timeout_closes_after_each_send(self, mock_smtp):
+        session = self.make_session(MagicMock(return_value=0.0), idle_timeout=0)
+        session.send(["one"])
+        session.send(["two"])
+        assert mock_smtp.call_count == 2
+        assert mock_smtp.return_value.quit.call_count == 2
+
+    @patch("wanwatcher.notifiers.email.smtplib.SMTP")
+    def test_back_to_back_emails_share_one_session(self, mock_smtp):
+        mock_smtp.return_value.noop.return_value = (250, b"OK")
+        notifier = TestEmailNotifier().make_notifier()
+        assert notifier.send_event("Started", "Monitoring", "Server")
+        assert notifier.send_event("Update", "New release", "Server")
+        mock_smtp.assert_called_once()
+        assert mock_smtp.return_value.send_message.call_count == 2
+        notifier.close()
+        mock_smtp.return_value.quit.assert_called_once()
+
+
 # -- AppriseNotifier (with a stubbed apprise module) ---------------------------
 
 
@@ -626,3 +842,49 @@ class TestBaseProvider:
         provider = NotificationProvider()
         with pytest.raises(NotImplementedError):
             provider.send_notification({}, {}, None, True, "Server")
+
+
+# -- ChangeEvent ----------------------------------------------------------------
+
+
+class TestChangeEvent:
+    def test_diff_location_and_timestamps_are_precomputed(self):
+        geo = {"city": "Zagreb", "region": "", "country": "HR"}
+        event = ChangeEvent.build(
+            CURRENT_IPS, PREVIOUS_IPS, geo, False, "Server", "2.0.0", 0.0
+        )
+        assert [(c.label, c.old, c.new) for c in event.changes] == [
+            ("IPv4", "8.8.8.8", "9.9.9.9")
+        ]
+        assert event.location == "Zagreb, HR"
+        assert event.timestamp == "1970-01-01T00:00:00+00:00"
+
+    def test_event_is_read_only(self):
+        event = ChangeEvent.build(CURRENT_IPS, PREVIOUS_IPS, None, False, "Server")
+        with pytest.raises(TypeError):
+            event.current_ips["ipv4"] = "1.1.1.1"  # type: ignore[index]
+
+    def test_payload_round_trip(self):
+        event = ChangeEvent.build(CURRENT_IPS, PREVIOUS_IPS, {"org": "ISP"}, True, "S")
+        assert ChangeEvent.from_payload(event.as_payload()) == event
+
+    def test_manager_hands_the_same_event_to_every_provider(self):
+        provider_a = RecordingProviderA()
+        provider_b = RecordingProviderB()
+        manager = NotificationManager()
+        manager.add_provider(provider_a)
+        manager.add_provider(provider_b)
+        event = ChangeEvent.build(CURRENT_IPS, PREVIOUS_IPS, None, False, "Server")
+
+        assert manager.send_change(event) == {
+            "RecordingProviderA": True,
+            "RecordingProviderB": True,
+        }
+        # Providers that only implement send_notification get unpacked args.
+        args, _ = provider_a.notification_calls[0]
+        assert args == (CURRENT_IPS, PREVIOUS_IPS, None, False, "Server", "")
+
+    def test_base_send_change_is_abstract(self):
+        event = ChangeEvent.build({}, {}, None, True, "Server")
+        with pytest.raises(NotImplementedError):
+            NotificationProvider().send_change(event)
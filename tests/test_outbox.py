@@ -0,0 +1,225 @@
+"""Tests for wanwatcher.outbox and its use by the application."""
+
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from wanwatcher import outbox as outbox_module
+from wanwatcher.app import Application
+from wanwatcher.config import Config, DiscordConfig, OutboxConfig
+from wanwatcher.metrics import Metrics
+from wanwatcher.outbox import Outbox, UndeliverableJob
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / "state.json.outbox")
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_delivered_job_is_marked_done(journal, clock):
+    box = Outbox(journal, clock=clock)
+    handler = MagicMock(return_value=True)
+    box.register("notify", handler)
+    job = box.enqueue("notify", "DiscordNotifier", {"text": "hi"})
+
+    assert box.drain_once() == 1
+    handler.assert_called_once_with(job)
+    assert box.pending() == 0
+    assert [record["op"] for record in _records(journal)] == ["add", "done"]
+
+
+def test_failed_job_backs_off_and_survives_restart(journal, clock):
+    box = Outbox(journal, clock=clock, retry_base=10, retry_max=15)
+    box.register("notify", MagicMock(side_effect=RuntimeError("smtp down")))
+    box.enqueue("notify", "EmailNotifier", {"text": "hi"})
+
+    box.drain_once()
+    assert box.drain_once() == 0  # not due yet
+    clock.now += 10
+    box.drain_once()
+
+    # A new process replays the journal with the attempt count and due time.
+    replayed = Outbox(journal, clock=clock, retry_base=10, retry_max=15)
+    assert replayed.open() == 1
+    job = next(iter(replayed._jobs.values()))
+    assert job.attempts == 2
+    assert job.next_at == clock.now + 15  # capped at retry_max
+
+    handler = MagicMock(return_value=True)
+    replayed.register("notify", handler)
+    clock.now += 15
+    assert replayed.drain_once() == 1
+    assert replayed.pending() == 0
+
+
+def test_job_older_than_max_age_is_dropped(journal, clock):
+    metrics = Metrics()
+    box = Outbox(journal, metrics=metrics, clock=clock, max_age=60)
+    box.register("notify", MagicMock(return_value=False))
+    box.enqueue("notify", "TelegramNotifier", {})
+    clock.now += 61
+    box.drain_once()
+    assert box.pending() == 0
+    assert (
+        'wanwatcher_outbox_jobs_total{kind="notify",result="dropped"} 1'
+        in metrics.render()
+    )
+
+
+def test_undeliverable_job_is_dropped_without_retry(journal, clock):
+    box = Outbox(journal, clock=clock)
+    box.register("notify", MagicMock(side_effect=UndeliverableJob("gone")))
+    box.enqueue("notify", "AppriseNotifier", {})
+    box.drain_once()
+    assert box.pending() == 0
+
+
+def test_torn_last_line_is_skipped(journal, clock):
+    box = Outbox(journal, clock=clock)
+    box.enqueue("notify", "DiscordNotifier", {"text": "kept"})
+    with open(journal, "a", encoding="utf-8") as fh:
+        fh.write('{"op":"add","id":"x')  # crash mid-append
+
+    replayed = Outbox(journal, clock=clock)
+    assert replayed.open() == 1
+    assert len(_records(journal)) == 1  # compacted on open
+
+
+def test_journal_is_compacted(journal, clock, monkeypatch):
+    monkeypatch.setattr(outbox_module, "COMPACT_THRESHOLD", 3)
+    box = Outbox(journal, clock=clock)
+    box.register("notify", MagicMock(return_value=True))
+    for index in range(3):
+        box.enqueue("notify", f"Provider{index}", {})
+    box.enqueue("notify", "Waiting", {})
+    box._jobs[list(box._jobs)[-1]].next_at = clock.now + 100
+    while box.drain_once():
+        pass
+
+    records = _records(journal)
+    assert [record["target"] for record in records] == ["Waiting"]
+
+
+def test_newer_ddns_job_supersedes_pending_one(journal, clock):
+    box = Outbox(journal, clock=clock)
+    first = box.enqueue("ddns", "cloudflare", {"ipv4": "1.1.1.1"}, supersede=True)
+    same = box.enqueue("ddns", "cloudflare", {"ipv4": "1.1.1.1"}, supersede=True)
+    assert same is first
+    box.enqueue("ddns", "cloudflare", {"ipv4": "2.2.2.2"}, supersede=True)
+    assert [job.payload for job in box._jobs.values()] == [{"ipv4": "2.2.2.2"}]
+
+
+def test_jobs_for_one_target_are_delivered_in_order(journal, clock):
+    box = Outbox(journal, clock=clock, concurrency=4)
+    seen = []
+    box.register("notify", lambda job: seen.append(job.payload["n"]) or True)
+    for index in range(3):
+        box.enqueue("notify", "DiscordNotifier", {"n": index})
+    box.enqueue("notify", "TelegramNotifier", {"n": 9})
+
+    assert box.drain_once() == 2  # one per target
+    while box.drain_once():
+        pass
+    assert [n for n in seen if n != 9] == [0, 1, 2]
+
+
+def test_background_drain_delivers(journal):
+    box = Outbox(journal)
+    delivered = threading.Event()
+    box.register("notify", lambda job: delivered.set() or True)
+    box.open()
+    box.start()
+    try:
+        box.enqueue("notify", "DiscordNotifier", {})
+        assert delivered.wait(2)
+    finally:
+        box.stop(timeout=2)
+
+
+def test_drain_waits_while_same_target_job_is_in_flight(journal, monkeypatch):
+    box = Outbox(journal, concurrency=2)
+    release = threading.Event()
+    box.register("notify", lambda job: release.wait(5) or True)
+    passes = []
+    due = box._due
+    monkeypatch.setattr(box, "_due", lambda: passes.append(1) or due())
+    box.open()
+    box.start()
+    try:
+        box.enqueue("notify", "DiscordNotifier", {"n": 1})
+        box.enqueue("notify", "DiscordNotifier", {"n": 2})
+        threading.Event().wait(0.3)
+        assert len(passes) < 10  # blocked on the wake event, not spinning
+        release.set()
+        for _ in range(50):
+            if not box.pending():
+                break
+            threading.Event().wait(0.05)
+        assert box.pending() == 0
+    finally:
+        release.set()
+        box.stop(timeout=2)
+
+
+class TestApplicationOutbox:
+    @pytest.fixture
+    def app(self, tmp_path):
+        config = Config(
+            ip_db_file=str(tmp_path / "state.json"),
+            log_file=str(tmp_path / "ww.log"),
+            monitor_ipv6=False,
+            discord=DiscordConfig(enabled=True, webhook_url="https://discord.com/x"),
+            outbox=OutboxConfig(enabled=True),
+        )
+        application = Application(config)
+        application.detector = MagicMock()
+        application.state = application.store.load()
+        return application
+
+    def test_change_is_journaled_per_provider(self, app):
+        provider = app.notifications.providers[0]
+        provider.send_change = MagicMock(return_value=True)
+        app.detector.get_ipv4.return_value = "1.2.3.4"
+
+        assert app.check_ip() is True
+        provider.send_change.assert_not_called()
+        assert app.outbox.pending() == 1
+
+        app.outbox.drain_once()
+        provider.send_change.assert_called_once()
+        event = provider.send_change.call_args.args[0]
+        assert event.current_ips == {"ipv4": "1.2.3.4", "ipv6": None}
+        assert event.is_first_run
+        assert app.outbox.pending() == 0
+
+    def test_removed_provider_job_is_dropped(self, app):
+        app.outbox.enqueue("notify", "TelegramNotifier", {})
+        app.outbox.drain_once()
+        assert app.outbox.pending() == 0
+
+    def test_ddns_job_skipped_when_already_applied(self, app):
+        app.ddns_client = MagicMock(provider="duckdns")
+        app.ddns_client.is_current.return_value = True
+        app.detector.get_ipv4.return_value = "1.2.3.4"
+        app.check_ip()
+        assert [job.kind for job in app.outbox._jobs.values()] == ["notify"]
@@ -0,0 +1,119 @@
+"""Tests for wanwatcher.pipeline and its use by the threaded loop."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+from wanwatcher.app import Application
+from wanwatcher.config import Config, DiscordConfig, PipelineConfig
+from wanwatcher.metrics import Metrics
+from wanwatcher.pipeline import SideEffectPipeline
+
+
+def test_jobs_of_one_sink_run_in_order():
+    pipeline = SideEffectPipeline()
+    seen = []
+    for index in range(20):
+        pipeline.submit("ddns", lambda index=index: seen.append(index))
+    assert pipeline.join(timeout=2)
+    assert seen == list(range(20))
+    pipeline.stop(timeout=1)
+
+
+def test_sinks_do_not_block_each_other():
+    pipeline = SideEffectPipeline()
+    release = threading.Event()
+    done = threading.Event()
+    pipeline.submit("notify", lambda: release.wait(2))
+    pipeline.submit("mqtt", done.set)
+    assert done.wait(1)
+    release.set()
+    pipeline.stop(timeout=1)
+
+
+def test_concurrency_limit_per_sink():
+    pipeline = SideEffectPipeline(concurrency={"notify": 2})
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def job():
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+
+    for _ in range(6):
+        pipeline.submit("notify", job)
+    assert pipeline.join(timeout=2)
+    assert running["peak"] == 2
+    pipeline.stop(timeout=1)
+
+
+def test_full_queue_drops_after_timeout():
+    metrics = Metrics()
+    pipeline = SideEffectPipeline(metrics=metrics, queue_size=1, submit_timeout=0.05)
+    release = threading.Event()
+    started = threading.Event()
+    pipeline.submit("notify", lambda: (started.set(), release.wait(2)))
+    assert started.wait(1)
+    assert pipeline.submit("notify", lambda: None) is True  # fills the queue
+    assert pipeline.submit("notify", lambda: None) is False
+    release.set()
+    assert pipeline.join(timeout=2)
+    text = metrics.render()
+    assert 'wanwatcher_pipeline_jobs_total{result="dropped",sink="notify"} 1' in text
+    assert 'wanwatcher_pipeline_jobs_total{result="ok",sink="notify"} 2' in text
+    pipeline.stop(timeout=1)
+
+
+def test_failing_job_is_counted_and_worker_survives():
+    metrics = Metrics()
+    pipeline = SideEffectPipeline(metrics=metrics)
+    done = threading.Event()
+
+    def boom():
+        raise RuntimeError("boom")
+
+    pipeline.submit("ddns", boom)
+    pipeline.submit("ddns", done.set)
+    assert done.wait(1)
+    assert pipeline.join(timeout=1)
+    assert 'result="error",sink="ddns"} 1' in metrics.render()
+    pipeline.stop(timeout=1)
+
+
+def test_stop_drains_queue_and_rejects_new_jobs():
+    pipeline = SideEffectPipeline()
+    seen = []
+    for index in range(5):
+        pipeline.submit("mqtt", lambda index=index: seen.append(index))
+    pipeline.stop(timeout=2)
+    assert seen == list(range(5))
+    assert pipeline.submit("mqtt", lambda: None) is False
+
+
+def test_check_returns_before_slow_notification(tmp_path):
+    config = Config(
+        ip_db_file=str(tmp_path / "state.json"),
+        log_file=str(tmp_path / "ww.log"),
+        monitor_ipv6=False,
+        discord=DiscordConfig(enabled=True, webhook_url="https://discord.com/x"),
+        pipeline=PipelineConfig(enabled=True),
+    )
+    app = Application(config)
+    app.detector = MagicMock()
+    app.detector.get_ipv4.return_value = "1.2.3.4"
+    app.notifications = MagicMock()
+    release = threading.Event()
+    app.notifications.send_change.side_effect = lambda *a, **k: release.wait(2) and {}
+    app.state = app.store.load()
+
+    started = time.monotonic()
+    assert app.check_ip() is True
+    assert time.monotonic() - started < 1
+    assert app.store.load().ipv4 == "1.2.3.4"
+    release.set()
+    app.pipeline.stop(timeout=2)
+    app.notifications.send_change.assert_called_once()
@@ -0,0 +1,153 @@
+"""Tests for wanwatcher.notifiers.ratelimit and its use by the manager/app."""
+
+from unittest.mock import MagicMock, patch
+
+from wanwatcher.app import Application
+from wanwatcher.config import Config, DiscordConfig
+from wanwatcher.notifiers import NotificationManager, NotificationProvider
+from wanwatcher.notifiers.ratelimit import ChangeCoalescer, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTimer:
+    """Stands in for threading.Timer; fires only when the test says so."""
+
+    def __init__(self, interval, function):
+        self.interval = interval
+        self.function = function
+        self.daemon = False
+        self.started = False
+        self.cancelled = False
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TestTokenBucket:
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, burst=2, clock=clock)
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 1.0
+        clock.now += 0.5
+        assert bucket.try_acquire() == 0.5
+        clock.now += 0.5
+        assert bucket.try_acquire() == 0.0
+
+    def test_acquire_gives_up_when_wait_exceeds_timeout(self):
+        bucket = TokenBucket(rate=0.01, burst=1)
+        assert bucket.acquire(timeout=0) is True
+        assert bucket.acquire(timeout=0.05) is False
+
+    def test_acquire_waits_for_a_token(self):
+        bucket = TokenBucket(rate=50.0, burst=1)
+        assert bucket.acquire()
+        assert bucket.acquire(timeout=1.0)
+
+
+class TestManagerRateLimit:
+    @patch("wanwatcher.notifiers.base.time.sleep")
+    def test_attempts_beyond_the_limit_fail(self, _sleep):
+        class Provider(NotificationProvider):
+            calls = 0
+
+            def send_event(self, *args, **kwargs):
+                Provider.calls += 1
+                return True
+
+        manager = NotificationManager(deadline=1.0, rate_per_minute=1, burst=1)
+        manager.add_provider(Provider())
+        assert manager.notify_event("t", "m", "s") == {"Provider": True}
+        assert manager.notify_event("t", "m", "s", severity="warning") == {
+            "Provider": False
+        }
+        assert Provider.calls == 1
+
+    def test_no_limit_by_default(self):
+        manager = NotificationManager()
+        manager.add_provider(MagicMock())
+        assert manager.acquire("MagicMock", timeout=0)
+
+
+class TestChangeCoalescer:
+    def _coalescer(self):
+        deliver = MagicMock()
+        timers = []
+
+        def factory(interval, function):
+            timers.append(FakeTimer(interval, function))
+            return timers[-1]
+
+        return ChangeCoalescer(deliver, 30, timer_factory=factory), deliver, timers
+
+    def test_changes_in_window_are_merged(self):
+        coalescer, deliver, timers = self._coalescer()
+        coalescer.submit({"ipv4": "2.2.2.2"}, {"ipv4": "1.1.1.1"}, False)
+        coalescer.submit({"ipv4": "3.3.3.3"}, {"ipv4": "2.2.2.2"}, False)
+        deliver.assert_not_called()
+        assert len(timers) == 1 and timers[0].started
+
+        timers[0].function()
+        deliver.assert_called_once_with(
+            {"ipv4": "3.3.3.3"}, {"ipv4": "1.1.1.1 → 2.2.2.2"}, False
+        )
+
+    def test_single_change_is_passed_through_unchanged(self):
+        coalescer, deliver, timers = self._coalescer()
+        coalescer.submit(
+            {"ipv4": "2.2.2.2", "ipv6": None}, {"ipv4": "1.1.1.1", "ipv6": None}, False
+        )
+        coalescer.flush()
+        deliver.assert_called_once_with(
+            {"ipv4": "2.2.2.2", "ipv6": None}, {"ipv4": "1.1.1.1", "ipv6": None}, False
+        )
+        assert timers[0].cancelled
+
+    def test_first_run_is_not_held_back(self):
+        coalescer, deliver, timers = self._coalescer()
+        coalescer.submit({"ipv4": "1.1.1.1"}, {"ipv4": None}, True)
+        deliver.assert_called_once()
+        assert timers == []
+
+    def test_flush_without_pending_change_is_a_noop(self):
+        coalescer, deliver, _ = self._coalescer()
+        coalescer.flush()
+        deliver.assert_not_called()
+
+
+def test_application_merges_flapping_changes(tmp_path):
+    config = Config(
+        ip_db_file=str(tmp_path / "state.json"),
+        log_file=str(tmp_path / "ww.log"),
+        monitor_ipv6=False,
+        discord=DiscordConfig(enabled=True, webhook_url="https://discord.com/x"),
+        notify_coalesce_window=60,
+    )
+    app = Application(config)
+    app.detector = MagicMock()
+    app.notifications = MagicMock()
+    app.notifications.send_change.return_value = {}
+    app.state = app.store.load()
+
+    for address in ("1.1.1.1", "2.2.2.2", "3.3.3.3"):
+        app.detector.get_ipv4.return_value = address
+        app.check_ip()
+    # Only the first run went out; the two changes are held.
+    assert app.notifications.send_change.call_count == 1
+
+    app.coalescer.flush()
+    assert app.notifications.send_change.call_count == 2
+    event = app.notifications.send_change.call_args.args[0]
+    assert event.current_ips["ipv4"] == "3.3.3.3"
+    assert event.previous_ips["ipv4"] == "1.1.1.1 → 2.2.2.2"
@@ -0,0 +1,107 @@
+"""Tests for wanwatcher.samples: the per-check sample ring buffer."""
+
+import os
+
+import pytest
+
+from wanwatcher.samples import CheckSamples
+
+
+def fill(samples, count, start=1000.0):
+    for n in range(count):
+        family = "ipv4" if n % 2 == 0 else "ipv6"
+        samples.append(start + n, 0.25, family, "ok", f"source-{n % 3}")
+
+
+def test_samples_round_trip():
+    samples = CheckSamples(capacity=16)
+    samples.append(1000.0, 0.5, "ipv4", "changed", "ipify")
+    samples.append(1000.0, 1.25, "ipv6", "failed")
+    assert samples.query() == [
+        {
+            "ts": 1000.0,
+            "duration": 0.5,
+            "family": "ipv4",
+            "result": "changed",
+            "source": "ipify",
+        },
+        {
+            "ts": 1000.0,
+            "duration": 1.25,
+            "family": "ipv6",
+            "result": "failed",
+            "source": None,
+        },
+    ]
+
+
+def test_ring_overwrites_oldest():
+    samples = CheckSamples(capacity=16)
+    fill(samples, 40)
+    assert len(samples) == 16
+    assert [s["ts"] for s in samples.query()] == [1000.0 + n for n in range(24, 40)]
+
+
+def test_range_family_and_limit():
+    samples = CheckSamples(capacity=64)
+    fill(samples, 40)
+    result = samples.query(since=1010, until=1019, family="ipv6")
+    assert [s["ts"] for s in result] == [1011.0, 1013.0, 1015.0, 1017.0, 1019.0]
+    assert [s["ts"] for s in samples.query(limit=2)] == [1038.0, 1039.0]
+    assert samples.query(since=2000) == []
+
+
+def test_unknown_source_types_are_stored_without_name():
+    samples = CheckSamples(capacity=16)
+    samples.append(1.0, 0.1, "ipv4", "ok", object())
+    assert samples.query()[0]["source"] is None
+
+
+def test_persisted_samples_survive_reopen(tmp_path):
+    path = str(tmp_path / "ipinfo.db.samples")
+    samples = CheckSamples(capacity=16, path=path)
+    fill(samples, 20)
+    samples.close()
+    assert os.path.getsize(path) > 16 * 16
+
+    reopened = CheckSamples(capacity=16, path=path)
+    assert [s["ts"] for s in reopened.query()] == [1000.0 + n for n in range(4, 20)]
+    assert reopened.query()[-1]["source"] == "source-1"
+    reopened.append(2000.0, 0.1, "ipv4", "ok", "source-1")
+    assert reopened.query()[-1]["ts"] == 2000.0
+    reopened.close()
+
+
+def test_changed_capacity_resets_file(tmp_path):
+    path = str(tmp_path / "s")
+    samples = CheckSamples(capacity=16, path=path)
+    fill(samples, 4)
+    samples.close()
+    resized = CheckSamples(capacity=32, path=path)
+    assert resized.query() == []
+    resized.close()
+
+
+def test_append_after_close_is_ignored(tmp_path):
+    samples = CheckSamples(capacity=16, path=str(tmp_path / "s"))
+    samples.close()
+    samples.append(1.0, 0.1, "ipv4", "ok")
+
+
+def test_unknown_result_is_rejected():
+    with pytest.raises(ValueError):
+        CheckSamples(capacity=16).append(1.0, 0.1, "ipv4", "maybe")
+
+
+def test_out_of_order_stamps_keep_range_queries_complete():
+    samples = CheckSamples(capacity=16)
+    for ts in (10.0, 5.0, 20.0):
+        samples.append(ts, 0.1, "ipv4", "ok")
+    assert [s["ts"] for s in samples.query()] == [10.0, 10.0, 20.0]
+    assert [s["ts"] for s in samples.query(since=7)] == [10.0, 10.0, 20.0]
+
+
+def test_samples_are_stamped_on_append():
+    samples = CheckSamples(capacity=16)
+    samples.append(None, 0.1, "ipv4", "ok")
+    assert samples.query()[0]["ts"] > 1_000_000_000
@@ -0,0 +1,107 @@
+"""Tests for wanwatcher.scoring: EWMA health, ordering and quarantine."""
+
+from collections import namedtuple
+
+from wanwatcher.metrics import Metrics
+from wanwatcher.scoring import QUARANTINE_AFTER, QUARANTINE_BASE, SourceScoreboard
+
+Src = namedtuple("Src", "name")
+A, B, C = Src("a"), Src("b"), Src("c")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_untried_sources_keep_incoming_order():
+    board = SourceScoreboard()
+    assert board.order("ipv4", [B, A, C]) == [B, A, C]
+
+
+def test_faster_source_moves_first():
+    board = SourceScoreboard()
+    board.record("ipv4", "a", 2.0, True)
+    board.record("ipv4", "b", 0.1, True)
+    board.record("ipv4", "c", 0.5, True)
+    assert board.order("ipv4", [A, B, C]) == [B, C, A]
+
+
+def test_unreliable_source_ranks_behind_slower_reliable_one():
+    board = SourceScoreboard()
+    board.record("ipv4", "a", 0.1, True)
+    board.record("ipv4", "a", 0.1, False)
+    board.record("ipv4", "a", 0.1, False)
+    board.record("ipv4", "b", 0.2, True)
+    assert board.order("ipv4", [A, B]) == [B, A]
+
+
+def test_families_are_scored_independently():
+    board = SourceScoreboard()
+    board.record("ipv4", "a", 5.0, True)
+    board.record("ipv4", "b", 0.1, True)
+    assert board.order("ipv4", [A, B]) == [B, A]
+    assert board.order("ipv6", [A, B]) == [A, B]
+
+
+def test_quarantine_after_consecutive_failures_and_expiry():
+    clock = FakeClock()
+    board = SourceScoreboard(clock=clock)
+    board.record("ipv4", "b", 3.0, True)
+    for _ in range(QUARANTINE_AFTER):
+        board.record("ipv4", "a", 0.01, False)
+    # Quarantined sources go last but are never dropped.
+    assert board.order("ipv4", [A, B]) == [B, A]
+    snap = board.snapshot()["ipv4"]
+    entry = next(item for item in snap if item["source"] == "a")
+    assert entry["quarantined_for_seconds"] == QUARANTINE_BASE
+
+    clock.now += QUARANTINE_BASE + 1
+    assert board.snapshot()["ipv4"][0]["quarantined_for_seconds"] == 0
+
+
+def test_quarantine_cooldown_doubles_and_success_clears_it():
+    clock = FakeClock()
+    board = SourceScoreboard(clock=clock)
+    for _ in range(QUARANTINE_AFTER + 1):
+        board.record("ipv4", "a", 0.01, False)
+    entry = board.snapshot()["ipv4"][0]
+    assert entry["quarantined_for_seconds"] == 2 * QUARANTINE_BASE
+
+    board.record("ipv4", "a", 0.01, True)
+    entry = board.snapshot()["ipv4"][0]
+    assert entry["quarantined_for_seconds"] == 0
+    assert entry["consecutive_failures"] == 0
+
+
+def test_metrics_exported():
+    metrics = Metrics()
+    board = SourceScoreboard(metrics=metrics)
+    board.record("ipv4", "a", 0.25, True)
+    board.record("ipv4", "a", 0.25, False)
+    text = metrics.render()
+    assert (
+        'wanwatcher_source_requests_total{family="ipv4",result="ok",source="a"} 1'
+        in text
+    )
+    assert (
+        'wanwatcher_source_requests_total{family="ipv4",result="error",source="a"} 1'
+        in text
+    )
+    assert 'wanwatcher_source_latency_seconds{family="ipv4",source="a"} 0.25' in text
+    assert 'wanwatcher_source_quarantined{family="ipv4",source="a"} 0' in text
+
+
+def test_latency_percentile_needs_history():
+    board = SourceScoreboard()
+    for latency in (0.4, 0.1, 0.3, 0.2):
+        board.record("ipv4", "a", latency, True)
+    board.record("ipv4", "a", 5.0, False)  # failures carry no latency sample
+    assert board.latency_percentile("ipv4", "a", 90) is None
+    board.record("ipv4", "a", 0.5, True)
+    assert board.latency_percentile("ipv4", "a", 50) == 0.3
+    assert board.latency_percentile("ipv4", "a", 90) == 0.5
+    assert board.latency_percentile("ipv6", "a", 90) is None
@@ -0,0 +1,119 @@
+"""Startup import-cost guards.
+
+Each test runs a fresh interpreter with ``-X importtime`` and fails when a
+module that should only load on demand is imported at startup again.
+Wall-clock budgets would be flaky on shared CI runners; the set of imported
+modules is deterministic and is what actually regresses.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported only when the matching feature is configured.
+ON_DEMAND = (
+    "apprise",
+    "smtplib",
+    "email.mime",
+    "wanwatcher.notifiers.apprise",
+    "wanwatcher.notifiers.discord",
+    "wanwatcher.notifiers.email",
+    "wanwatcher.notifiers.telegram",
+    "wanwatcher.ddns",
+    "wanwatcher.api",
+    "wanwatcher.mqtt",
+    "wanwatcher.engine",
+    "wanwatcher.validation",
+    "wanwatcher.statedb",
+    "sqlite3",
+)
+
+
+def imported_modules(code, env=None):
+    """Module -> cumulative import time (us) for running ``code``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT, **(env or {})},
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def loaded(modules, prefix):
+    return sorted(m for m in modules if m == prefix or m.startswith(prefix + "."))
+
+
+def test_app_import_skips_optional_modules():
+    modules = imported_modules("import wanwatcher.app")
+    assert "wanwatcher.app" in modules
+    for prefix in ON_DEMAND:
+        assert not loaded(modules, prefix), f"{prefix} imported at startup"
+
+
+def test_only_enabled_providers_are_imported():
+    code = (
+        "from wanwatcher.config import Config, DiscordConfig\n"
+        "from wanwatcher.notifiers import build_manager\n"
+        "build_manager(Config(discord=DiscordConfig("
+        "enabled=True, webhook_url='https://discord.com/api/webhooks/1/a')))\n"
+    )
+    modules = imported_modules(code)
+    assert "wanwatcher.notifiers.discord" in modules
+    for name in ("email", "telegram", "apprise"):
+        assert f"wanwatcher.notifiers.{name}" not in modules
+    assert "smtplib" not in modules
+
+
+def test_only_the_configured_ddns_client_is_imported():
+    code = (
+        "from wanwatcher.config import DDNSConfig, DuckDNSConfig\n"
+        "from wanwatcher.ddns import build_ddns_client\n"
+        "build_ddns_client(DDNSConfig(enabled=True, provider='duckdns', "
+        "duckdns=DuckDNSConfig(token='t', domains=['home'])))\n"
+    )
+    modules = imported_modules(code)
+    assert "wanwatcher.ddns.duckdns" in modules
+    for name in ("cloudflare", "dyndns2", "route53"):
+        assert f"wanwatcher.ddns.{name}" not in modules
+
+
+def test_healthcheck_script_stays_dependency_free():
+    script = os.path.join(ROOT, "scripts", "healthcheck.py")
+    code = (
+        "import importlib.util\n"
+        f"spec = importlib.util.spec_from_file_location('hc', {script!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+    )
+    modules = imported_modules(code)
+    assert not loaded(modules, "wanwatcher")
+    assert not loaded(modules, "requests")
+
+
+@pytest.mark.parametrize("name", ["DiscordNotifier", "EmailNotifier"])
+def test_lazy_provider_exports_resolve(name):
+    import wanwatcher.notifiers as notifiers
+
+    assert getattr(notifiers, name).__name__ == name
+    assert name in dir(notifiers)
+
+
+def test_unknown_lazy_export_raises_attribute_error():
+    import wanwatcher.ddns as ddns
+
+    with pytest.raises(AttributeError):
+        ddns.NoSuchClient
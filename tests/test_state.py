@@ -48,6 +48,58 @@ class TestLoadSaveRoundtrip:
         assert store.load().ipv4 == "8.8.8.8"
 
 
+class TestSaveMetrics:
+    def test_save_duration_is_observed(self, tmp_path):
+        from wanwatcher.metrics import Metrics
+
+        metrics = Metrics()
+        store = StateStore(str(tmp_path / "ipinfo.db"), metrics=metrics)
+        store.save(State(ipv4="8.8.8.8"))
+        store.save(State(ipv4="8.8.8.8"))
+        assert "wanwatcher_state_save_duration_seconds_count 2" in metrics.render()
+
+
+class TestUnchangedSave:
+    def test_unchanged_content_only_touches_mtime(self, tmp_path):
+        store = make_store(tmp_path)
+        state = State(ipv4="8.8.8.8")
+        assert store.save(state) is True
+        inode = os.stat(store.path).st_ino
+        os.utime(store.path, (1, 1))
+
+        assert store.save(state) is False
+        assert os.stat(store.path).st_ino == inode  # not replaced
+        assert os.stat(store.path).st_mtime > 1
+
+    def test_changed_content_is_rewritten(self, tmp_path):
+        store = make_store(tmp_path)
+        state = State(ipv4="8.8.8.8")
+        store.save(state)
+        state.history.append({"at": "now"})
+        assert store.save(state) is True
+        assert store.load().history == [{"at": "now"}]
+
+    def test_loaded_state_is_not_rewritten(self, tmp_path):
+        make_store(tmp_path).save(State(ipv4="8.8.8.8"))
+        store = make_store(tmp_path)
+        assert store.save(store.load()) is False
+
+    def test_migrated_state_is_rewritten(self, tmp_path):
+        path = tmp_path / "ipinfo.db"
+        path.write_text("8.8.8.8")
+        store = make_store(tmp_path)
+        assert store.save(store.load()) is True
+        assert json.loads(path.read_text())["ipv4"] == "8.8.8.8"
+
+    def test_deleted_file_is_rewritten(self, tmp_path):
+        store = make_store(tmp_path)
+        state = State(ipv4="8.8.8.8")
+        store.save(state)
+        os.unlink(store.path)
+        assert store.save(state) is True
+        assert store.load().ipv4 == "8.8.8.8"
+
+
 class TestAtomicity:
     def test_file_is_valid_json_after_save(self, tmp_path):
         store = make_store(tmp_path)
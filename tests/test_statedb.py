@@ -0,0 +1,129 @@
+"""Tests for wanwatcher.statedb: the SQLite state backend."""
+
+import json
+import sqlite3
+
+import pytest
+
+from wanwatcher.history import HistoryLog
+from wanwatcher.state import State, StateStore
+from wanwatcher.statedb import COMMIT_EVERY, SQLiteStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    db = SQLiteStateStore(str(tmp_path / "ipinfo.db"))
+    yield db
+    db.close()
+
+
+def rows(store, sql):
+    """Read through a separate connection: only committed rows are seen."""
+    conn = sqlite3.connect(store.db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_database_uses_wal(store):
+    store.load()
+    assert rows(store, "PRAGMA journal_mode") == [("wal",)]
+
+
+def test_roundtrip(tmp_path, store):
+    state = store.load()
+    state.ipv4 = "8.8.8.8"
+    store.record_change(state, None, None)
+    assert store.save(state) is True
+    store.close()
+
+    loaded = SQLiteStateStore(store.path).load()
+    assert loaded.ipv4 == "8.8.8.8"
+    assert loaded.history == state.history
+    assert loaded.last_updated == state.last_updated
+
+
+def test_migrates_from_json_state_file(tmp_path):
+    path = str(tmp_path / "ipinfo.db")
+    StateStore(path).save(State(ipv4="1.1.1.1", update_notified_version="2.0.0"))
+    store = SQLiteStateStore(path)
+    state = store.load()
+    assert state.ipv4 == "1.1.1.1"
+    assert store.save(state) is True  # written to the database once
+    assert rows(store, "SELECT ipv4, update_notified_version FROM state") == [
+        ("1.1.1.1", "2.0.0")
+    ]
+    assert json.loads((tmp_path / "ipinfo.db").read_text())["ipv4"] == "1.1.1.1"
+    store.close()
+
+
+def test_unchanged_save_batches_check_samples(store):
+    state = store.load()
+    state.ipv4 = "8.8.8.8"
+    store.save(state)
+    updated = rows(store, "SELECT last_updated FROM state")
+    for _ in range(COMMIT_EVERY - 1):
+        assert store.save(state) is False
+    assert rows(store, "SELECT COUNT(*) FROM checks") == [(1,)]
+    store.save(state)
+    assert rows(store, "SELECT COUNT(*) FROM checks") == [(COMMIT_EVERY + 1,)]
+    assert rows(store, "SELECT last_updated FROM state") == updated
+
+
+def test_close_writes_buffered_rows(store):
+    state = store.load()
+    store.save(state)
+    store.save(state)
+    store.record_delivery("DiscordNotifier", True)
+    store.close()
+    assert rows(store, "SELECT COUNT(*) FROM checks") == [(2,)]
+    assert rows(store, "SELECT provider, ok FROM deliveries") == [
+        ("DiscordNotifier", 1)
+    ]
+
+
+def test_history_queries(store):
+    store.load()
+    history = store.history
+    history.record_change("1.1.1.1", "2.2.2.2", None, None, ts=100)
+    history.record_change("2.2.2.2", "3.3.3.3", "::1", "::2", ts=200)
+    history.record_change("3.3.3.3", "4.4.4.4", None, None, ts=300)
+    assert [r["ts"] for r in history.query()] == [100, 200, 200, 300]
+    assert history.query(since=150, until=250, family="ipv6") == [
+        {"ts": 200, "family": "ipv6", "old": "::1", "new": "::2"}
+    ]
+    assert [r["new"] for r in history.query(family="ipv4", limit=2)] == [
+        "3.3.3.3",
+        "4.4.4.4",
+    ]
+
+
+def test_history_imported_from_log_then_state(tmp_path):
+    path = str(tmp_path / "ipinfo.db")
+    HistoryLog(path + ".history").record_change("a", "b", None, None, ts=5)
+    store = SQLiteStateStore(path)
+    legacy = [{"at": 9, "old_ipv4": "x", "new_ipv4": "y"}]
+    assert store.history.import_legacy(legacy) == 1
+    assert store.history.query()[0]["new"] == "b"
+    assert store.history.import_legacy(legacy) == 0
+    store.close()
+
+
+def test_prune_removes_old_rows(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / "ipinfo.db"), retention_days=1)
+    store.load()
+    store.history.record_change("a", "b", None, None, ts=10)
+    store.history.record_change("b", "c", None, None, ts=200_000)
+    assert store.prune(now=200_000) == 1
+    assert [r["new"] for r in store.history.query()] == ["c"]
+    store.close()
+
+
+def test_checks_and_deliveries_are_queryable(store):
+    state = store.load()
+    state.ipv4 = "8.8.8.8"
+    store.save(state)
+    store.record_delivery("EmailNotifier", False)
+    assert [c["ipv4"] for c in store.checks()] == ["8.8.8.8"]
+    assert store.deliveries()[0]["ok"] is False
@@ -0,0 +1,91 @@
+"""Tests for wanwatcher.notifiers.templates and the email templates."""
+
+from unittest.mock import patch
+
+import pytest
+
+from wanwatcher.notifiers import ChangeEvent, EmailNotifier
+from wanwatcher.notifiers.templates import (
+    RenderCache,
+    Safe,
+    Template,
+    payload_hash,
+    plain,
+    render_cache,
+)
+
+
+class TestTemplate:
+    def test_fields_are_escaped(self):
+        template = Template("<p>${name} &amp; ${name}</p>")
+        assert template.fields == {"name"}
+        assert template.render(name="<b>") == "<p>&lt;b&gt; &amp; &lt;b&gt;</p>"
+
+    def test_safe_values_are_inserted_as_is(self):
+        template = Template("<p>${body}</p>")
+        assert template.render(body=Safe("<br>")) == "<p><br></p>"
+
+    def test_plain_escaper_matches_fstrings(self):
+        template = Template("IPv4: ${old} → ${new}", escape=plain)
+        assert template.render(old=None, new="1.2.3.4") == "IPv4: None → 1.2.3.4"
+
+    def test_missing_field_raises(self):
+        with pytest.raises(KeyError, match="title"):
+            Template("${title}").render()
+
+    def test_literal_braces_are_kept(self):
+        template = Template("body { color: ${color}; }")
+        assert template.render(color="red") == "body { color: red; }"
+
+
+class TestRenderCache:
+    def test_same_payload_is_rendered_once(self):
+        cache = RenderCache()
+        calls = []
+
+        def render():
+            calls.append(1)
+            return "body"
+
+        assert cache.get_or_render("event", {"a": 1, "b": 2}, render) == "body"
+        assert cache.get_or_render("event", {"b": 2, "a": 1}, render) == "body"
+        assert len(calls) == 1
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = RenderCache(size=2)
+        cache.get_or_render("e", 1, lambda: "one")
+        cache.get_or_render("e", 2, lambda: "two")
+        cache.get_or_render("e", 1, lambda: "unused")
+        cache.get_or_render("e", 3, lambda: "three")
+        assert cache.get_or_render("e", 1, lambda: "again") == "one"
+        assert cache.get_or_render("e", 2, lambda: "re-rendered") == "re-rendered"
+
+    def test_event_type_is_part_of_the_key(self):
+        cache = RenderCache()
+        cache.get_or_render("a", {}, lambda: "a")
+        assert cache.get_or_render("b", {}, lambda: "b") == "b"
+
+    def test_payload_hash_is_stable(self):
+        assert payload_hash({"x": [1, None]}) == payload_hash({"x": [1, None]})
+        assert payload_hash({"x": 1}) != payload_hash({"x": 2})
+
+
+@patch("wanwatcher.notifiers.email.smtplib.SMTP")
+def test_email_bodies_are_rendered_once_for_identical_content(mock_smtp):
+    render_cache.clear()
+    notifiers = [
+        EmailNotifier("smtp.example.com", 587, "u", "p", "f@x.org", [to])
+        for to in ("a@x.org", "b@x.org")
+    ]
+    event = ChangeEvent.build(
+        {"ipv4": "2.2.2.2"}, {"ipv4": "1.1.1.1"}, None, False, "S"
+    )
+    with patch.object(
+        EmailNotifier, "_build_html_email", autospec=True, return_value="<p>"
+    ) as build_html:
+        for notifier in notifiers:
+            assert notifier.send_change(event)
+    build_html.assert_called_once()
+    sent = mock_smtp.return_value.send_message.call_args_list
+    assert [call.args[0]["To"] for call in sent] == ["a@x.org", "b@x.org"]
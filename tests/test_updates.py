@@ -34,7 +34,7 @@ def _release(tag):
     return resp
 
 
-@patch("wanwatcher.updates.requests.get")
+@patch("requests.Session.get")
 def test_newer_version_returns_info(mock_get):
     mock_get.return_value = _release("v2.1.0")
     info = check_for_updates("2.0.0")
@@ -43,19 +43,19 @@ def test_newer_version_returns_info(mock_get):
     assert info["current_version"] == "2.0.0"
 
 
-@patch("wanwatcher.updates.requests.get")
+@patch("requests.Session.get")
 def test_same_version_returns_none(mock_get):
     mock_get.return_value = _release("v2.0.0")
     assert check_for_updates("2.0.0") is None
 
 
-@patch("wanwatcher.updates.requests.get")
+@patch("requests.Session.get")
 def test_already_notified_returns_none(mock_get):
     mock_get.return_value = _release("v2.1.0")
     assert check_for_updates("2.0.0", already_notified="2.1.0") is None
 
 
-@patch("wanwatcher.updates.requests.get")
+@patch("requests.Session.get")
 def test_network_error_returns_none(mock_get):
     import requests
 
@@ -16,6 +16,11 @@ from wanwatcher.config import (
     DuckDNSConfig,
     DynDNS2Config,
     EmailConfig,
+    HistoryConfig,
+    HTTPConfig,
+    OutboxConfig,
+    PipelineConfig,
+    SamplesConfig,
     TelegramConfig,
 )
 from wanwatcher.validation import ConfigValidator, validate_config
@@ -234,6 +239,11 @@ class TestEmailConfigValidation:
         assert not is_valid
         assert any("EMAIL_SMTP_PORT" in error for error in errors)
 
+    def test_negative_idle_timeout_fails(self):
+        is_valid, errors, _ = run(self.make_email_config(idle_timeout=-1))
+        assert not is_valid
+        assert any("EMAIL_SMTP_IDLE_TIMEOUT" in error for error in errors)
+
     def test_port_465_without_ssl_warns(self):
         is_valid, errors, warnings = run(self.make_email_config(smtp_port=465))
         assert is_valid, errors
@@ -410,6 +420,14 @@ class TestAPIValidation:
         assert is_valid
         assert any("privileged port" in warning for warning in warnings)
 
+    def test_non_positive_latency_bucket_fails(self):
+        config = make_config()
+        config.api.enabled = True
+        config.api.latency_buckets = [0.0, 1.0]
+        is_valid, errors, _ = run(config)
+        assert not is_valid
+        assert any("METRICS_LATENCY_BUCKETS" in error for error in errors)
+
 
 class TestMQTTValidation:
     def test_valid_mqtt_passes(self):
@@ -498,6 +516,133 @@ class TestGeneralValidation:
         assert not is_valid
         assert any("HTTP_TIMEOUT" in error for error in errors)
 
+    def test_zero_pool_size_fails(self):
+        is_valid, errors, _ = run(make_config(http=HTTPConfig(pool_maxsize=0)))
+        assert not is_valid
+        assert any("HTTP_POOL_MAXSIZE" in error for error in errors)
+
+    def test_subsystem_timeout_out_of_range_fails(self):
+        is_valid, errors, _ = run(make_config(http=HTTPConfig(ddns_timeout=500)))
+        assert not is_valid
+        assert any("HTTP_TIMEOUT_DDNS" in error for error in errors)
+
+    def test_unknown_detection_mode_fails(self):
+        is_valid, errors, _ = run(make_config(detection_mode="racing"))
+        assert not is_valid
+        assert any("IP_DETECTION_MODE" in error for error in errors)
+
+    def test_detection_fanout_below_one_fails(self):
+        is_valid, errors, _ = run(make_config(detection_fanout=0))
+        assert not is_valid
+        assert any("IP_DETECTION_FANOUT" in error for error in errors)
+
+    def test_pipeline_zero_workers_fails(self):
+        config = make_config()
+        config.pipeline = PipelineConfig(enabled=True, concurrency={"notify": 0})
+        is_valid, errors, _ = run(config)
+        assert not is_valid
+        assert any("PIPELINE_CONCURRENCY" in error for error in errors)
+
+    def test_pipeline_unknown_sink_warns(self):
+        config = make_config()
+        config.pipeline = PipelineConfig(enabled=True, concurrency={"pager": 1})
+        is_valid, _, warnings = run(config)
+        assert is_valid
+        assert any("pager" in warning for warning in warnings)
+
+    def test_outbox_retry_max_below_base_fails(self):
+        config = make_config()
+        config.outbox = OutboxConfig(enabled=True, retry_base=60, retry_max=30)
+        is_valid, errors, _ = run(config)
+        assert not is_valid
+        assert any("OUTBOX_RETRY_MAX" in error for error in errors)
+
+    def test_history_segment_size_out_of_range_fails(self):
+        config = make_config()
+        config.history = HistoryConfig(segment_kb=4)
+        is_valid, errors, _ = run(config)
+        assert not is_valid
+        assert any("HISTORY_SEGMENT_KB" in error for error in errors)
+
+    def test_samples_capacity_out_of_range_fails(self):
+        config = make_config()
+        config.samples = SamplesConfig(capacity=0)
+        is_valid, errors, _ = run(config)
+        assert not is_valid
+        assert any("SAMPLES_CAPACITY" in error for error in errors)
+
+    def test_unknown_state_backend_fails(self):
+        is_valid, errors, _ = run(make_config(state_backend="redis"))
+        assert not is_valid
+        assert any("STATE_BACKEND" in error for error in errors)
+
+    def test_unknown_check_engine_fails(self):
+        is_valid, errors, _ = run(make_config(check_engine="trio"))
+        assert not is_valid
+        assert any("CHECK_ENGINE" in error for error in errors)
+
+    def test_task_deadline_below_detection_deadline_warns(self):
+        is_valid, _, warnings = run(
+            make_config(check_engine="asyncio", task_deadline=30)
+        )
+        assert is_valid
+        assert any("CHECK_TASK_DEADLINE" in warning for warning in warnings)
+
+    def test_notify_deadline_below_one_fails(self):
+        is_valid, errors, _ = run(make_config(notify_deadline=0))
+        assert not is_valid
+        assert any("NOTIFY_DEADLINE" in error for error in errors)
+
+    def test_notify_deadline_below_notifier_timeout_warns(self):
+        is_valid, _, warnings = run(make_config(notify_deadline=5, http_timeout=10))
+        assert is_valid
+        assert any("NOTIFY_DEADLINE" in warning for warning in warnings)
+
+    def test_notify_rate_burst_below_one_fails(self):
+        is_valid, errors, _ = run(make_config(notify_rate_burst=0))
+        assert not is_valid
+        assert any("NOTIFY_RATE_BURST" in error for error in errors)
+
+    def test_notify_coalesce_window_out_of_range_fails(self):
+        is_valid, errors, _ = run(make_config(notify_coalesce_window=7200))
+        assert not is_valid
+        assert any("NOTIFY_COALESCE_WINDOW" in error for error in errors)
+
+    def test_network_change_debounce_out_of_range_fails(self):
+        is_valid, errors, _ = run(make_config(network_change_debounce=120))
+        assert not is_valid
+        assert any("CHECK_NETWORK_DEBOUNCE" in error for error in errors)
+
+    def test_unknown_dns_sources_mode_fails(self):
+        is_valid, errors, _ = run(make_config(dns_sources="always"))
+        assert not is_valid
+        assert any("IP_DNS_SOURCES" in error for error in errors)
+
+    def test_hedge_percentile_out_of_range_fails(self):
+        is_valid, errors, _ = run(make_config(hedge_percentile=100))
+        assert not is_valid
+        assert any("IP_HEDGE_PERCENTILE" in error for error in errors)
+
+    def test_hedge_delay_too_small_fails(self):
+        is_valid, errors, _ = run(make_config(hedge_delay_ms=10))
+        assert not is_valid
+        assert any("IP_HEDGE_DELAY_MS" in error for error in errors)
+
+    def test_negative_detection_deadline_fails(self):
+        is_valid, errors, _ = run(make_config(detection_deadline=-1))
+        assert not is_valid
+        assert any("IP_DETECTION_DEADLINE" in error for error in errors)
+
+    def test_automatic_detection_deadline_passes(self):
+        is_valid, errors, warnings = run(make_config(detection_deadline=0))
+        assert is_valid, errors
+        assert not any("IP_DETECTION_DEADLINE" in warning for warning in warnings)
+
+    def test_detection_deadline_below_http_timeout_warns(self):
+        is_valid, _, warnings = run(make_config(detection_deadline=5))
+        assert is_valid
+        assert any("IP_DETECTION_DEADLINE" in warning for warning in warnings)
+
     def test_both_protocols_disabled_fails(self):
         is_valid, errors, _ = run(make_config(monitor_ipv4=False, monitor_ipv6=False))
         assert not is_valid
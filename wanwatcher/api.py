@@ -1,7 +1,7 @@
 """HTTP status API for WANwatcher.
 
-Serves health, status, and Prometheus metrics endpoints from a background
-thread using only the standard library. The server is best-effort: a busy
+Serves health, status, change history, check samples and Prometheus metrics
+endpoints from a background thread using only the standard library. The server is best-effort: a busy
 port logs an error but never crashes the application.
 """
 
@@ -10,9 +10,12 @@ import logging
 import os
 import threading
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
 
 from wanwatcher.config import APIConfig
+from wanwatcher.heartbeat import stale_after
+from wanwatcher.history import parse_time
 from wanwatcher.metrics import Metrics
 
 logger = logging.getLogger(__name__)
@@ -20,6 +23,12 @@ logger = logging.getLogger(__name__)
 _JSON_CONTENT_TYPE = "application/json; charset=utf-8"
 _METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
 
+# Records returned by /api/history and /api/checks when no (or a larger)
+# limit is asked for.
+RANGE_MAX_LIMIT = 1000
+
+RangeProvider = Callable[..., List[Dict[str, Any]]]
+
 
 class _StatusRequestHandler(BaseHTTPRequestHandler):
     """Request handler bound to a StatusServer via the server instance."""
@@ -52,11 +61,15 @@ class _StatusRequestHandler(BaseHTTPRequestHandler):
                 logger.debug("Could not send 500 response", exc_info=True)
 
     def _route(self) -> None:
-        path = self.path.split("?", 1)[0]
+        path, _, query = self.path.partition("?")
         if path == "/healthz":
             self._handle_healthz()
         elif path == "/api/status":
             self._handle_status()
+        elif path == "/api/history":
+            self._handle_history(query)
+        elif path == "/api/checks":
+            self._handle_checks(query)
         elif path == "/metrics":
             self._handle_metrics()
         elif path == "/":
@@ -64,7 +77,13 @@ class _StatusRequestHandler(BaseHTTPRequestHandler):
                 200,
                 {
                     "app": "wanwatcher",
-                    "endpoints": ["/healthz", "/api/status", "/metrics"],
+                    "endpoints": [
+                        "/healthz",
+                        "/api/status",
+                        "/api/history",
+                        "/api/checks",
+                        "/metrics",
+                    ],
                 },
             )
         else:
@@ -83,7 +102,7 @@ class _StatusRequestHandler(BaseHTTPRequestHandler):
         # successful check exceeds a generous multiple of the check interval.
         age = status.get("seconds_since_last_check")
         interval = status.get("check_interval") or 0
-        threshold = max(3 * interval, 1800) + 120
+        threshold = stale_after(interval)
         stale = age is not None and age > threshold
 
         payload = {
@@ -103,8 +122,45 @@ class _StatusRequestHandler(BaseHTTPRequestHandler):
             return
         self._send_json(200, status)
 
+    def _handle_history(self, query: str) -> None:
+        self._send_range(
+            self.server.history_provider, query, "change history", "entries"
+        )
+
+    def _handle_checks(self, query: str) -> None:
+        self._send_range(
+            self.server.samples_provider, query, "check samples", "samples"
+        )
+
+    def _send_range(
+        self, provider: Optional[RangeProvider], query: str, what: str, key: str
+    ) -> None:
+        """Answer a since/until/family/limit query against ``provider``."""
+        if provider is None:
+            self._send_json(404, {"error": f"{what} disabled"})
+            return
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        try:
+            since = parse_time(params["since"]) if "since" in params else None
+            until = parse_time(params["until"]) if "until" in params else None
+            limit = min(int(params.get("limit", RANGE_MAX_LIMIT)), RANGE_MAX_LIMIT)
+        except ValueError:
+            self._send_json(400, {"error": "since/until must be epoch or ISO 8601"})
+            return
+        family = params.get("family")
+        if family not in (None, "ipv4", "ipv6"):
+            self._send_json(400, {"error": "family must be ipv4 or ipv6"})
+            return
+        try:
+            rows = provider(since=since, until=until, family=family, limit=limit)
+        except OSError:
+            logger.exception("Could not read the %s", what)
+            self._send_json(500, {"status": "error"})
+            return
+        self._send_json(200, {"count": len(rows), key: rows})
+
     def _handle_metrics(self) -> None:
-        body = self.server.metrics.render().encode("utf-8")
+        body = self.server.metrics.render_bytes()
         self._send(200, body, _METRICS_CONTENT_TYPE)
 
     def _method_not_allowed(self) -> None:
@@ -135,10 +191,14 @@ class _StatusHTTPServer(ThreadingHTTPServer):
         server_address: tuple,
         status_provider: Callable[[], Dict[str, Any]],
         metrics: Metrics,
+        history_provider: Optional[RangeProvider] = None,
+        samples_provider: Optional[RangeProvider] = None,
     ) -> None:
         super().__init__(server_address, _StatusRequestHandler)
         self.status_provider = status_provider
         self.metrics = metrics
+        self.history_provider = history_provider
+        self.samples_provider = samples_provider
 
 
 class StatusServer:
@@ -149,10 +209,14 @@ class StatusServer:
         config: APIConfig,
         status_provider: Callable[[], Dict[str, Any]],
         metrics: Metrics,
+        history_provider: Optional[RangeProvider] = None,
+        samples_provider: Optional[RangeProvider] = None,
     ) -> None:
         self.config = config
         self.status_provider = status_provider
         self.metrics = metrics
+        self.history_provider = history_provider
+        self.samples_provider = samples_provider
         self._server: Optional[_StatusHTTPServer] = None
         self._thread: Optional[threading.Thread] = None
 
@@ -163,6 +227,8 @@ class StatusServer:
                 (self.config.bind, self.config.port),
                 self.status_provider,
                 self.metrics,
+                self.history_provider,
+                self.samples_provider,
             )
         except OSError as exc:
             logger.error(
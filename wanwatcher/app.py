@@ -7,16 +7,27 @@ import signal
 import sys
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
 from wanwatcher import VERSION
 from wanwatcher.config import Config, SecretFileError
 from wanwatcher.detector import IPDetector
 from wanwatcher.geo import get_geo_data
+from wanwatcher.heartbeat import HEARTBEAT_SUFFIX, Heartbeat, stale_after
+from wanwatcher.history import HistoryLog
+from wanwatcher.httpclient import HTTPClient
+from wanwatcher.local import LocalDetector
 from wanwatcher.logconfig import configure_logging
 from wanwatcher.metrics import Metrics
-from wanwatcher.notifiers import build_manager
+from wanwatcher.netwatch import NetworkWatcher
+from wanwatcher.notifiers import ChangeEvent, build_manager
+from wanwatcher.notifiers.ratelimit import ChangeCoalescer
+from wanwatcher.outbox import Outbox, OutboxJob, UndeliverableJob
+from wanwatcher.pipeline import SideEffectPipeline
+from wanwatcher.samples import CheckSamples
 from wanwatcher.state import State, StateStore
 from wanwatcher.updates import check_for_updates
 
@@ -24,6 +35,7 @@ if TYPE_CHECKING:
     from wanwatcher.api import StatusServer
     from wanwatcher.ddns.base import DDNSClient
     from wanwatcher.mqtt import MQTTPublisher
+    from wanwatcher.statedb import SQLiteHistory, SQLiteStateStore
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +48,18 @@ JITTER_MIN = 1.0
 JITTER_MAX = 3.0
 
 
+@dataclass(frozen=True)
+class CheckOutcome:
+    """What a successful detection + persistence phase decided."""
+
+    current_ips: Dict[str, Optional[str]]
+    previous_ips: Dict[str, Optional[str]]
+    changed: bool
+    is_first_run: bool
+    # Built once when the addresses changed; shared by every provider.
+    event: Optional[ChangeEvent] = None
+
+
 def setup_logging(log_file: str, log_format: str = "text") -> None:
     configure_logging(log_file, log_format)
 
@@ -43,17 +67,114 @@ def setup_logging(log_file: str, log_format: str = "text") -> None:
 class Application:
     def __init__(self, config: Config):
         self.config = config
-        self.metrics = Metrics()
+        self.metrics = Metrics(latency_buckets=config.api.latency_buckets or None)
+        # One pooled keep-alive client shared by every outbound HTTP caller.
+        self.http = HTTPClient(
+            pool_connections=config.http.pool_connections,
+            pool_maxsize=config.http.pool_maxsize,
+        )
         self.detector = IPDetector(
-            timeout=config.http_timeout,
+            timeout=config.timeout_for("detector"),
             change_confirmation=config.change_confirmation,
+            mode=config.detection_mode,
+            fanout=config.detection_fanout,
+            http=self.http,
+            adaptive_order=config.source_scoring,
+            metrics=self.metrics,
+            hedge_percentile=config.hedge_percentile,
+            hedge_delay=config.hedge_delay_ms / 1000.0,
+            dns_sources=config.dns_sources,
+            local=(
+                LocalDetector(natpmp=config.local_natpmp)
+                if config.local_detection
+                else None
+            ),
         )
-        self.store = StateStore(
-            config.ip_db_file, legacy_update_file=LEGACY_UPDATE_NOTIFIED_FILE
-        )
+        # IP_DETECTION_DEADLINE=0: enough for every source of the slower
+        # family to time out, so the deadline never cuts a detection short
+        # that would have finished.
+        self.auto_detection_deadline = self.detector.max_duration()
+        # The detection still running for each family, if any; a straggler
+        # from an earlier check must finish before that family runs again.
+        self._detections: Dict[str, Future] = {}
+        self.state_db: Optional["SQLiteStateStore"] = None
+        self.store: StateStore
+        if config.state_backend == "sqlite":
+            from wanwatcher import statedb as _statedb
+
+            self.state_db = _statedb.SQLiteStateStore(
+                config.ip_db_file,
+                legacy_update_file=LEGACY_UPDATE_NOTIFIED_FILE,
+                retention_days=config.history.retention_days,
+                metrics=self.metrics,
+            )
+            self.store = self.state_db
+        else:
+            self.store = StateStore(
+                config.ip_db_file,
+                legacy_update_file=LEGACY_UPDATE_NOTIFIED_FILE,
+                metrics=self.metrics,
+            )
         self.state: State = State()
-        self.notifications = build_manager(config)
+        self.notifications = build_manager(config, http=self.http, metrics=self.metrics)
         self.shutdown_event = threading.Event()
+        # Ends the wait between checks early: set on shutdown and by the
+        # network change watcher.
+        self.wake_event = threading.Event()
+        self.pipeline: Optional[SideEffectPipeline] = None
+        if config.pipeline.enabled and config.check_engine != "asyncio":
+            self.pipeline = SideEffectPipeline(
+                metrics=self.metrics,
+                queue_size=config.pipeline.queue_size,
+                submit_timeout=config.pipeline.submit_timeout,
+                concurrency=config.pipeline.concurrency,
+            )
+        # Its mtime is the healthcheck's deadline; refreshed on every success.
+        self.alive_file = Heartbeat(
+            config.ip_db_file + HEARTBEAT_SUFFIX, stale_after(config.check_interval)
+        )
+        self.history: Optional[Union[HistoryLog, "SQLiteHistory"]] = None
+        if self.state_db is not None:
+            # The database keeps the history itself, with indexed queries.
+            self.history = self.state_db.history
+        elif config.history.enabled:
+            self.history = HistoryLog(
+                config.ip_db_file + ".history",
+                retention_days=config.history.retention_days,
+                segment_bytes=config.history.segment_kb * 1024,
+            )
+        self.samples: Optional[CheckSamples] = None
+        if config.samples.enabled:
+            samples_file = None
+            if config.samples.persist:
+                samples_file = config.ip_db_file + ".samples"
+            try:
+                self.samples = CheckSamples(config.samples.capacity, samples_file)
+            except OSError as exc:
+                logger.error("Could not map %s: %s", samples_file, exc)
+                self.samples = CheckSamples(config.samples.capacity)
+        self.outbox: Optional[Outbox] = None
+        if config.outbox.enabled:
+            self.outbox = Outbox(
+                config.ip_db_file + ".outbox",
+                metrics=self.metrics,
+                concurrency=config.outbox.concurrency,
+                max_age=config.outbox.max_age,
+                retry_base=config.outbox.retry_base,
+                retry_max=config.outbox.retry_max,
+            )
+            self.outbox.register("notify", self._deliver_notification)
+            self.outbox.register("ddns", self._deliver_ddns)
+        self.coalescer: Optional[ChangeCoalescer] = None
+        if config.notify_coalesce_window > 0:
+            self.coalescer = ChangeCoalescer(
+                self._deliver_merged, window=config.notify_coalesce_window
+            )
+        self.network_watcher: Optional[NetworkWatcher] = None
+        if config.check_on_network_change:
+            self.network_watcher = NetworkWatcher(
+                self._on_network_change, debounce=config.network_change_debounce
+            )
         # Guards the shared state read by the API thread and written by the loop.
         self._lock = threading.Lock()
         self.check_count = 0
@@ -71,7 +192,10 @@ class Application:
             from wanwatcher.ddns import build_ddns_client
 
             self.ddns_client = build_ddns_client(
-                config.ddns, timeout=config.http_timeout, metrics=self.metrics
+                config.ddns,
+                timeout=config.timeout_for("ddns"),
+                metrics=self.metrics,
+                http=self.http,
             )
 
         self.api_server: Optional["StatusServer"] = None
@@ -79,7 +203,15 @@ class Application:
             from wanwatcher import api as _api
 
             self.api_server = _api.StatusServer(
-                config.api, status_provider=self.status_snapshot, metrics=self.metrics
+                config.api,
+                status_provider=self.status_snapshot,
+                metrics=self.metrics,
+                history_provider=(
+                    self.history.query if self.history is not None else None
+                ),
+                samples_provider=(
+                    self.samples.query if self.samples is not None else None
+                ),
             )
 
         self.mqtt: Optional["MQTTPublisher"] = None
@@ -97,6 +229,7 @@ class Application:
                 signal.Signals(signum).name,
             )
             self.shutdown_event.set()
+            self.wake_event.set()
 
         signal.signal(signal.SIGTERM, handler)
         signal.signal(signal.SIGINT, handler)
@@ -125,43 +258,58 @@ class Application:
                 "uptime_seconds": round(now - self.metrics.started_at),
                 "outage": self.outage_since is not None,
                 "history": list(self.state.history),
+                "sources": self.detector.scores.snapshot(),
                 "notifiers": [
                     p.__class__.__name__ for p in self.notifications.providers
                 ],
                 "ddns_enabled": self.ddns_client is not None,
+                "outbox_pending": (
+                    self.outbox.pending() if self.outbox is not None else None
+                ),
                 "mqtt_enabled": self.mqtt is not None,
             }
 
     # -- core check --------------------------------------------------------
 
     def check_ip(self) -> bool:
+        """Run one full check: observe, then apply the side effects.
+
+        Side effects run inline, or are queued on the pipeline when it is
+        enabled so the check returns once detection and persistence are done.
+        """
+        outcome = self.observe()
+        if outcome is None:
+            return False
+        for name, effect in self.side_effects(outcome):
+            if self.pipeline is not None:
+                self.pipeline.submit(name, effect)
+            else:
+                effect()
+        return True
+
+    def observe(self) -> Optional[CheckOutcome]:
+        """Detect, decide what changed, look up geo data and persist state.
+
+        Returns None when the check failed (no address could be detected).
+        """
         self.check_count += 1
         self.metrics.inc("wanwatcher_checks_total")
 
         # 1. Detection. Only a failure here counts as a check failure and feeds
         #    outage detection / adaptive backoff.
         try:
-            current_ipv4 = (
-                self.detector.get_ipv4(previous=self.state.ipv4)
-                if self.config.monitor_ipv4
-                else None
-            )
-            current_ipv6 = (
-                self.detector.get_ipv6(previous=self.state.ipv6)
-                if self.config.monitor_ipv6
-                else None
-            )
+            current_ipv4, current_ipv6 = self._detect_addresses()
         except Exception as exc:  # noqa: BLE001 - detection must not crash the loop
             logger.error("Error during IP detection: %s", exc, exc_info=True)
             self.metrics.inc("wanwatcher_check_failures_total")
             self._handle_check_failure()
-            return False
+            return None
 
         expected_any = self.config.monitor_ipv4 or self.config.monitor_ipv6
         if expected_any and current_ipv4 is None and current_ipv6 is None:
             self.metrics.inc("wanwatcher_check_failures_total")
             self._handle_check_failure()
-            return False
+            return None
 
         self._handle_check_success()
 
@@ -200,12 +348,15 @@ class Application:
                     "wanwatcher_last_change_timestamp_seconds", time.time()
                 )
             new_geo = get_geo_data(
-                self.config.ipinfo_token, timeout=self.config.http_timeout
+                self.config.ipinfo_token,
+                timeout=self.config.timeout_for("geo"),
+                http=self.http,
+                metrics=self.metrics,
             )
 
-        # 4. Persist and update the shared state under the lock. The state file
-        #    is rewritten every check so its mtime tells the healthcheck the
-        #    loop is alive.
+        # 4. Persist and update the shared state under the lock. The store
+        #    only rewrites the state file when its content changed; otherwise
+        #    it touches the mtime, which the healthcheck fallback reads.
         now = time.time()
         try:
             with self._lock:
@@ -225,42 +376,272 @@ class Application:
                 self.store.save(self.state)
         except OSError as exc:
             logger.error("Failed to persist state: %s", exc, exc_info=True)
-
-        # 5. Side effects (network). Each is isolated so a failure is logged but
-        #    never counted as a check failure nor blocks the others.
-        if changed:
+        self.alive_file.beat(now)
+        if changed and not is_first_run and self.history is not None:
             try:
-                results = self.notifications.send_to_all(
-                    current_ips,
-                    previous_ips,
-                    self.geo_data,
-                    is_first_run,
-                    self.config.server_name,
-                    VERSION,
+                self.history.record_change(
+                    old_ipv4, current_ipv4, old_ipv6, current_ipv6, ts=now
                 )
-                for provider, ok in results.items():
-                    self.metrics.inc(
-                        "wanwatcher_notifications_total",
-                        {"provider": provider, "result": "ok" if ok else "error"},
-                    )
-            except Exception as exc:  # noqa: BLE001
-                logger.error("Notification dispatch failed: %s", exc, exc_info=True)
+            except OSError as exc:
+                logger.error("Failed to append to the change history: %s", exc)
 
+        event = None
+        if changed:
+            event = self._change_event(current_ips, previous_ips, is_first_run, now)
+        return CheckOutcome(current_ips, previous_ips, changed, is_first_run, event)
+
+    def side_effects(
+        self, outcome: CheckOutcome
+    ) -> List[Tuple[str, Callable[[], None]]]:
+        """The network side effects of a check as named, independent callables.
+
+        Each is isolated so a failure is logged but never counted as a check
+        failure nor blocks the others. The threaded loop runs them in order;
+        the asyncio engine runs them as separate tasks. With the outbox
+        enabled, notifications and DDNS updates are only journaled here and
+        delivered by the outbox.
+        """
+        effects: List[Tuple[str, Callable[[], None]]] = []
+        if outcome.changed:
+            effects.append(("notify", lambda: self._notify_change(outcome)))
         if self.ddns_client is not None:
-            try:
-                self.ddns_client.update(current_ipv4, current_ipv6)
-            except Exception as exc:  # noqa: BLE001
-                logger.error("DDNS update failed: %s", exc, exc_info=True)
-
+            if self.outbox is not None:
+                effects.append(("ddns", lambda: self._enqueue_ddns(outcome)))
+            else:
+                effects.append(("ddns", lambda: self._update_ddns(outcome)))
         if self.mqtt is not None:
-            try:
-                self.mqtt.publish_state(
-                    current_ipv4, current_ipv6, self.geo_data, self.state.last_change
+            effects.append(("mqtt", lambda: self._publish_mqtt(outcome)))
+        return effects
+
+    def _change_event(
+        self,
+        current_ips: Dict[str, Optional[str]],
+        previous_ips: Dict[str, Optional[str]],
+        is_first_run: bool,
+        detected_at: Optional[float] = None,
+    ) -> ChangeEvent:
+        return ChangeEvent.build(
+            current_ips,
+            previous_ips,
+            self.geo_data,
+            is_first_run,
+            self.config.server_name,
+            VERSION,
+            detected_at,
+        )
+
+    def _notify_change(self, outcome: CheckOutcome) -> None:
+        """Hand a change to the coalescer, or deliver it right away."""
+        if self.coalescer is not None:
+            self.coalescer.submit(
+                outcome.current_ips, outcome.previous_ips, outcome.is_first_run
+            )
+        else:
+            assert outcome.event is not None
+            self._deliver_change(outcome.event)
+
+    def _deliver_merged(
+        self,
+        current_ips: Dict[str, Optional[str]],
+        previous_ips: Dict[str, Optional[str]],
+        is_first_run: bool,
+    ) -> None:
+        self._deliver_change(
+            self._change_event(current_ips, previous_ips, is_first_run)
+        )
+
+    def _deliver_change(self, event: ChangeEvent) -> None:
+        try:
+            if self.outbox is not None:
+                self._enqueue_change(event)
+                return
+            results = self.notifications.send_change(event)
+            for provider, ok in results.items():
+                self._count_delivery(provider, ok)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Notification dispatch failed: %s", exc, exc_info=True)
+
+    def _count_delivery(self, provider: str, ok: Optional[bool]) -> None:
+        """Count one delivery; ``ok`` None means it outlived the deadline."""
+        result = "timeout" if ok is None else "ok" if ok else "error"
+        self.metrics.inc(
+            "wanwatcher_notifications_total",
+            {"provider": provider, "result": result},
+        )
+        if self.state_db is not None and ok is not None:
+            self.state_db.record_delivery(provider, ok)
+
+    def _update_ddns(self, outcome: CheckOutcome) -> None:
+        assert self.ddns_client is not None
+        try:
+            self.ddns_client.update(
+                outcome.current_ips["ipv4"], outcome.current_ips["ipv6"]
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.error("DDNS update failed: %s", exc, exc_info=True)
+
+    def _enqueue_change(self, event: ChangeEvent) -> None:
+        assert self.outbox is not None
+        payload = event.as_payload()
+        try:
+            for provider in self.notifications.providers:
+                self.outbox.enqueue("notify", provider.__class__.__name__, payload)
+        except OSError as exc:
+            logger.error("Could not queue notifications: %s", exc, exc_info=True)
+
+    def _enqueue_ddns(self, outcome: CheckOutcome) -> None:
+        assert self.outbox is not None and self.ddns_client is not None
+        ipv4, ipv6 = outcome.current_ips["ipv4"], outcome.current_ips["ipv6"]
+        try:
+            if self.ddns_client.is_current(ipv4, ipv6):
+                # The address went back to what was last applied; a pending
+                # update for another address must not be pushed any more.
+                self.outbox.cancel("ddns", self.ddns_client.provider)
+                return
+            self.outbox.enqueue(
+                "ddns",
+                self.ddns_client.provider,
+                {"ipv4": ipv4, "ipv6": ipv6},
+                supersede=True,
+            )
+        except OSError as exc:
+            logger.error("Could not queue DDNS update: %s", exc, exc_info=True)
+
+    def _deliver_notification(self, job: OutboxJob) -> bool:
+        provider = self.notifications.provider_named(job.target)
+        if provider is None:
+            raise UndeliverableJob("provider is no longer configured")
+        deadline = self.config.notify_deadline
+        if not provider.rate_limit.wait(deadline):
+            # The provider answered 429 with a longer Retry-After; the outbox
+            # retries the job later.
+            return False
+        if not self.notifications.acquire(job.target, deadline):
+            return False
+        ok = False
+        try:
+            ok = provider.send_change(ChangeEvent.from_payload(job.payload))
+        finally:
+            self._count_delivery(job.target, ok)
+        return ok
+
+    def _deliver_ddns(self, job: OutboxJob) -> bool:
+        if self.ddns_client is None or self.ddns_client.provider != job.target:
+            raise UndeliverableJob("DDNS provider is no longer configured")
+        ipv4, ipv6 = job.payload["ipv4"], job.payload["ipv6"]
+        self.ddns_client.update(ipv4, ipv6)
+        return self.ddns_client.is_current(ipv4, ipv6)
+
+    def _publish_mqtt(self, outcome: CheckOutcome) -> None:
+        assert self.mqtt is not None
+        try:
+            self.mqtt.publish_state(
+                outcome.current_ips["ipv4"],
+                outcome.current_ips["ipv6"],
+                self.geo_data,
+                self.state.last_change,
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.error("MQTT publish failed: %s", exc, exc_info=True)
+
+    def _timed_detect(
+        self,
+        family: str,
+        detect: Callable[..., Optional[str]],
+        previous: Optional[str],
+    ) -> Optional[str]:
+        started = time.monotonic()
+        ip: Optional[str] = None
+        try:
+            ip = detect(previous=previous)
+            return ip
+        finally:
+            elapsed = time.monotonic() - started
+            self.metrics.set_gauge(
+                "wanwatcher_detection_duration_seconds",
+                round(elapsed, 3),
+                {"family": family},
+            )
+            if self.samples is not None:
+                if elapsed > self.detection_deadline():
+                    result = "timeout"  # the check went on without it
+                elif ip is None:
+                    result = "failed"
+                else:
+                    result = "ok" if ip == previous else "changed"
+                # Stamped on completion: the families finish in any order.
+                self.samples.append(
+                    None,
+                    elapsed,
+                    family,
+                    result,
+                    self.detector.answered.get(family),
                 )
-            except Exception as exc:  # noqa: BLE001
-                logger.error("MQTT publish failed: %s", exc, exc_info=True)
 
-        return True
+    def detection_deadline(self) -> float:
+        """Seconds a check waits for detection (IP_DETECTION_DEADLINE)."""
+        return self.config.detection_deadline or self.auto_detection_deadline
+
+    def _detect_addresses(self) -> Tuple[Optional[str], Optional[str]]:
+        """Detect the monitored address families concurrently.
+
+        IPv4 and IPv6 run on separate threads under one shared deadline, so a
+        check takes as long as the slower family instead of the sum of both.
+        A family still running at the deadline is reported as None ("could
+        not determine") and its thread is left to finish in the background;
+        until it does, later checks skip that family rather than run a second
+        detection of it alongside. Exceptions raised by the detector
+        propagate to the caller.
+        """
+        jobs: Dict[str, Tuple[Callable[..., Optional[str]], Optional[str]]] = {}
+        if self.config.monitor_ipv4:
+            jobs["ipv4"] = (self.detector.get_ipv4, self.state.ipv4)
+        if self.config.monitor_ipv6:
+            jobs["ipv6"] = (self.detector.get_ipv6, self.state.ipv6)
+        for family in list(jobs):
+            straggler = self._detections.get(family)
+            if straggler is not None and not straggler.done():
+                logger.warning(
+                    "%s detection from an earlier check is still running; "
+                    "skipping %s for this check",
+                    family,
+                    family,
+                )
+                del jobs[family]
+        if not jobs:
+            return None, None
+
+        results: Dict[str, Optional[str]] = {}
+        deadline = self.detection_deadline()
+        executor = ThreadPoolExecutor(
+            max_workers=len(jobs), thread_name_prefix="wanwatcher-family"
+        )
+        try:
+            futures: Dict[Future, str] = {
+                executor.submit(self._timed_detect, family, detect, previous): family
+                for family, (detect, previous) in jobs.items()
+            }
+            self._detections.update(
+                (family, future) for future, family in futures.items()
+            )
+            done, not_done = wait(list(futures), timeout=deadline)
+        finally:
+            executor.shutdown(wait=False)
+
+        for future in done:
+            results[futures[future]] = future.result()
+        for future in not_done:
+            family = futures[future]
+            logger.warning(
+                "%s detection did not finish within %.0fs; treating it as "
+                "undetermined for this check",
+                family,
+                deadline,
+            )
+            self.metrics.inc(
+                "wanwatcher_detection_deadline_exceeded_total", {"family": family}
+            )
+        return results.get("ipv4"), results.get("ipv6")
 
     # -- outage tracking ----------------------------------------------------
 
@@ -323,16 +704,23 @@ class Application:
             VERSION,
             already_notified=self.state.update_notified_version,
             timeout=self.config.http_timeout,
+            http=self.http,
         )
         if not update_info:
             return
         results = self.notifications.notify_update(
             update_info, self.config.server_name, VERSION
         )
-        if any(results.values()):
-            self.state.update_notified_version = update_info["latest_version"]
+        # A provider past the deadline may still deliver; retrying the
+        # update notice next time could send it twice.
+        if any(ok is not False for ok in results.values()):
+            # The asyncio engine runs this on a worker thread alongside
+            # observe(); the lock keeps the two from saving the same State
+            # concurrently.
             try:
-                self.store.save(self.state)
+                with self._lock:
+                    self.state.update_notified_version = update_info["latest_version"]
+                    self.store.save(self.state)
             except OSError as exc:
                 logger.error("Could not persist update notification state: %s", exc)
 
@@ -343,13 +731,15 @@ class Application:
         if time.time() - self.last_heartbeat < events.heartbeat_interval:
             return
         self.last_heartbeat = time.time()
+        with self._lock:
+            ipv4, ipv6 = self.state.ipv4, self.state.ipv6
+            since = self.state.last_change or "startup"
         parts = []
-        if self.state.ipv4:
-            parts.append(f"IPv4 {self.state.ipv4}")
-        if self.state.ipv6:
-            parts.append(f"IPv6 {self.state.ipv6}")
+        if ipv4:
+            parts.append(f"IPv4 {ipv4}")
+        if ipv6:
+            parts.append(f"IPv6 {ipv6}")
         addresses = ", ".join(parts) if parts else "no address recorded"
-        since = self.state.last_change or "startup"
         self.notifications.notify_event(
             "Heartbeat",
             f"WANwatcher is running. Current address: {addresses}. "
@@ -377,6 +767,26 @@ class Application:
         capped = min(self.config.check_interval, backoff)
         return capped + self._jitter()
 
+    def _on_network_change(self) -> None:
+        self.metrics.inc("wanwatcher_network_change_wakeups_total")
+        self.wake_event.set()
+
+    def _sleep(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds; True when shutting down.
+
+        A network change reported by the watcher ends the wait early so the
+        next check runs right away.
+        """
+        if self.shutdown_event.is_set():
+            return True
+        woken = self.wake_event.wait(timeout=timeout)
+        self.wake_event.clear()
+        if self.shutdown_event.is_set():
+            return True
+        if woken:
+            logger.info("Network change reported; checking now")
+        return False
+
     # -- lifecycle ------------------------------------------------------------
 
     def startup_banner(self) -> None:
@@ -391,6 +801,26 @@ class Application:
         )
         logger.info("IPv4 monitoring: %s", "on" if cfg.monitor_ipv4 else "off")
         logger.info("IPv6 monitoring: %s", "on" if cfg.monitor_ipv6 else "off")
+        logger.info("Check engine: %s", cfg.check_engine)
+        if self.pipeline is not None:
+            logger.info("Side-effect pipeline: on")
+        if self.outbox is not None:
+            logger.info("Durable outbox: on (%s)", self.outbox.path)
+        logger.info("State backend: %s", cfg.state_backend)
+        if self.history is not None:
+            logger.info("Change history: on (%s)", self.history.path)
+        if self.coalescer is not None:
+            logger.info(
+                "Notification coalescing window: %d seconds",
+                cfg.notify_coalesce_window,
+            )
+        logger.info("IP detection mode: %s", self.detector.mode)
+        logger.info("DNS IP sources: %s", self.config.dns_sources)
+        if self.config.local_detection:
+            logger.info(
+                "Local IP detection: on (NAT-PMP %s)",
+                "on" if self.config.local_natpmp else "off",
+            )
         for provider in self.notifications.providers:
             logger.info("Notifier active: %s", provider.__class__.__name__)
         logger.info("DDNS: %s", "on" if self.ddns_client else "off")
@@ -416,12 +846,32 @@ class Application:
             logger.error("FATAL: both IPv4 and IPv6 monitoring are disabled")
             return 1
 
-        self.state = self.store.load()
+        try:
+            self.state = self.store.load()
+        except OSError as exc:
+            logger.error("FATAL: could not load the state: %s", exc)
+            return 1
+        if self.history is not None:
+            try:
+                self.history.open()
+                imported = self.history.import_legacy(self.state.history)
+                if imported:
+                    logger.info("Imported %d change(s) into the history log", imported)
+            except OSError as exc:
+                logger.error("Could not open the change history: %s", exc)
 
         if self.api_server is not None:
             self.api_server.start()
         if self.mqtt is not None:
             self.mqtt.start()
+        if self.network_watcher is not None and not self.network_watcher.start():
+            self.network_watcher = None
+        if self.outbox is not None:
+            try:
+                self.outbox.open()
+            except OSError as exc:
+                logger.error("Could not open the outbox journal: %s", exc)
+            self.outbox.start()
 
         if self.config.events.notify_on_startup:
             self.notifications.notify_event(
@@ -434,6 +884,17 @@ class Application:
         if self.config.updates.on_startup and self.config.updates.enabled:
             self._run_update_check()
 
+        if self.config.check_engine == "asyncio":
+            from wanwatcher.engine import AsyncEngine
+
+            AsyncEngine(self).run()
+        else:
+            self._run_threaded()
+
+        self.shutdown()
+        return 0
+
+    def _run_threaded(self) -> None:
         logger.info("Performing initial IP check...")
         self.check_ip()
 
@@ -447,7 +908,7 @@ class Application:
                     "Last check failed; next attempt in %.0fs (adaptive backoff)",
                     wait,
                 )
-            if self.shutdown_event.wait(timeout=wait):
+            if self._sleep(wait):
                 break
             try:
                 logger.info("Performing check #%d...", self.check_count + 1)
@@ -457,18 +918,31 @@ class Application:
             except Exception as exc:  # noqa: BLE001
                 logger.error("Unexpected error in main loop: %s", exc, exc_info=True)
                 # Brief, interruptible pause before the next round
-                self.shutdown_event.wait(timeout=60)
-
-        self.shutdown()
-        return 0
+                if self._sleep(60):
+                    break
 
     def shutdown(self) -> None:
         logger.info("Stopping WANwatcher...")
         self.metrics.set_gauge("wanwatcher_up", 0)
+        if self.network_watcher is not None:
+            self.network_watcher.stop()
+        if self.pipeline is not None:
+            self.pipeline.stop(timeout=self.config.task_deadline)
+        if self.coalescer is not None:
+            # Do not lose a change still held in the coalescing window.
+            self.coalescer.flush()
+        if self.outbox is not None:
+            self.outbox.stop()
+        self.notifications.close()
         if self.mqtt is not None:
             self.mqtt.stop()
         if self.api_server is not None:
             self.api_server.stop()
+        self.store.close()
+        if self.samples is not None:
+            self.samples.close()
+        self.alive_file.clear()
+        self.http.close()
         logger.info("Shutdown complete")
 
 
@@ -14,7 +14,7 @@ running without it.
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class SecretFileError(Exception):
@@ -124,6 +124,8 @@ class EmailConfig:
     use_tls: bool = True
     use_ssl: bool = False
     subject_prefix: str = "[WANwatcher]"
+    # Seconds an idle SMTP session is kept for reuse; 0 = new one per send.
+    idle_timeout: int = 60
 
     @classmethod
     def from_env(cls) -> "EmailConfig":
@@ -139,6 +141,7 @@ class EmailConfig:
             use_ssl=_env_bool("EMAIL_USE_SSL", False),
             subject_prefix=_env_str("EMAIL_SUBJECT_PREFIX", "[WANwatcher]")
             or "[WANwatcher]",
+            idle_timeout=_env_int("EMAIL_SMTP_IDLE_TIMEOUT", 60),
         )
 
 
@@ -263,13 +266,23 @@ class APIConfig:
     enabled: bool = False
     bind: str = "0.0.0.0"
     port: int = 8080
+    # Upper bounds (seconds) of the latency histogram buckets in /metrics;
+    # empty uses the built-in defaults.
+    latency_buckets: List[float] = field(default_factory=list)
 
     @classmethod
     def from_env(cls) -> "APIConfig":
+        buckets: List[float] = []
+        for item in _env_list("METRICS_LATENCY_BUCKETS"):
+            try:
+                buckets.append(float(item))
+            except ValueError:
+                continue
         return cls(
             enabled=_env_bool("API_ENABLED"),
             bind=_env_str("API_BIND", "0.0.0.0") or "0.0.0.0",
             port=_env_int("API_PORT", 8080),
+            latency_buckets=sorted(set(buckets)),
         )
 
 
@@ -303,6 +316,70 @@ class MQTTConfig:
         )
 
 
+@dataclass
+class OutboxConfig:
+    """Durable, journaled delivery of notifications and DDNS updates.
+
+    The journal lives next to the state file as ``<IP_DB_FILE>.outbox``.
+    """
+
+    enabled: bool = False
+    concurrency: int = 2  # jobs delivered at the same time
+    max_age: int = 86400  # seconds before an undelivered job is dropped
+    retry_base: int = 10  # first retry delay, doubled per failed attempt
+    retry_max: int = 900  # longest retry delay
+
+    @classmethod
+    def from_env(cls) -> "OutboxConfig":
+        return cls(
+            enabled=_env_bool("OUTBOX_ENABLED", False),
+            concurrency=_env_int("OUTBOX_CONCURRENCY", 2),
+            max_age=_env_int("OUTBOX_MAX_AGE", 86400),
+            retry_base=_env_int("OUTBOX_RETRY_BASE", 10),
+            retry_max=_env_int("OUTBOX_RETRY_MAX", 900),
+        )
+
+
+@dataclass
+class HistoryConfig:
+    """Long-term, append-only change history.
+
+    The log lives next to the state file as ``<IP_DB_FILE>.history``.
+    """
+
+    enabled: bool = True
+    retention_days: int = 365  # rotated segments older than this are deleted
+    segment_kb: int = 1024  # size at which the active file is rotated
+
+    @classmethod
+    def from_env(cls) -> "HistoryConfig":
+        return cls(
+            enabled=_env_bool("HISTORY_ENABLED", True),
+            retention_days=_env_int("HISTORY_RETENTION_DAYS", 365),
+            segment_kb=_env_int("HISTORY_SEGMENT_KB", 1024),
+        )
+
+
+@dataclass
+class SamplesConfig:
+    """Ring buffer of per-check samples (duration, source, result).
+
+    With ``persist`` it is memory-mapped from ``<IP_DB_FILE>.samples``.
+    """
+
+    enabled: bool = True
+    capacity: int = 65536  # samples kept, 16 bytes each
+    persist: bool = False
+
+    @classmethod
+    def from_env(cls) -> "SamplesConfig":
+        return cls(
+            enabled=_env_bool("SAMPLES_ENABLED", True),
+            capacity=_env_int("SAMPLES_CAPACITY", 65536),
+            persist=_env_bool("SAMPLES_PERSIST", False),
+        )
+
+
 @dataclass
 class EventsConfig:
     notify_on_startup: bool = True
@@ -337,15 +414,83 @@ class UpdateConfig:
         )
 
 
+@dataclass
+class HTTPConfig:
+    """Connection pooling and per-subsystem timeouts for outbound HTTP.
+
+    A timeout of 0 means "use HTTP_TIMEOUT".
+    """
+
+    pool_connections: int = 10  # per-host pools kept alive
+    pool_maxsize: int = 4  # idle keep-alive connections per host
+    detector_timeout: int = 0
+    ddns_timeout: int = 0
+    geo_timeout: int = 0
+    notifier_timeout: int = 0
+
+    @classmethod
+    def from_env(cls) -> "HTTPConfig":
+        return cls(
+            pool_connections=_env_int("HTTP_POOL_CONNECTIONS", 10),
+            pool_maxsize=_env_int("HTTP_POOL_MAXSIZE", 4),
+            detector_timeout=_env_int("HTTP_TIMEOUT_DETECTOR", 0),
+            ddns_timeout=_env_int("HTTP_TIMEOUT_DDNS", 0),
+            geo_timeout=_env_int("HTTP_TIMEOUT_GEO", 0),
+            notifier_timeout=_env_int("HTTP_TIMEOUT_NOTIFIERS", 0),
+        )
+
+
+@dataclass
+class PipelineConfig:
+    """Asynchronous side effects (notifications, DDNS, MQTT) for the loop.
+
+    ``concurrency`` maps a sink name to its number of worker threads, from
+    ``PIPELINE_CONCURRENCY`` such as ``notify=2,mqtt=1``; unlisted sinks get
+    one worker. Malformed entries are ignored.
+    """
+
+    enabled: bool = False
+    queue_size: int = 100  # jobs waiting per sink before backpressure
+    submit_timeout: int = 5  # seconds the loop blocks on a full queue
+    concurrency: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls) -> "PipelineConfig":
+        concurrency: Dict[str, int] = {}
+        for item in _env_list("PIPELINE_CONCURRENCY"):
+            name, _, value = item.partition("=")
+            try:
+                concurrency[name.strip().lower()] = int(value)
+            except ValueError:
+                continue
+        return cls(
+            enabled=_env_bool("PIPELINE_ENABLED", False),
+            queue_size=_env_int("PIPELINE_QUEUE_SIZE", 100),
+            submit_timeout=_env_int("PIPELINE_SUBMIT_TIMEOUT", 5),
+            concurrency=concurrency,
+        )
+
+
 @dataclass
 class Config:
     # General
     server_name: str = "WANwatcher Docker"
     bot_name: str = "WANwatcher"
     check_interval: int = 900
+    # Check immediately when the kernel reports an address or default-route
+    # change (Linux netlink), waiting network_change_debounce seconds for the
+    # burst of events to settle. Polling continues as a safety net.
+    check_on_network_change: bool = False
+    network_change_debounce: int = 2
+    # "threaded" runs checks, side effects and periodic jobs one after another;
+    # "asyncio" runs them as concurrent tasks, each bounded by task_deadline.
+    check_engine: str = "threaded"
+    task_deadline: int = 120
     monitor_ipv4: bool = True
     monitor_ipv6: bool = True
     ip_db_file: str = "/data/ipinfo.db"
+    # "json" keeps the state in ip_db_file; "sqlite" in ip_db_file + ".sqlite".
+    state_backend: str = "json"
     log_file: str = "/logs/wanwatcher.log"
     log_format: str = "text"  # "text" or "json"
     ipinfo_token: str = ""
@@ -353,7 +498,41 @@ class Config:
     # When the detected IP differs from the stored one, confirm the change
     # with a second independent source before notifying.
     change_confirmation: bool = True
-
+    # "sequential" asks one IP source at a time; "parallel" races up to
+    # detection_fanout sources at once and keeps the first quorum; "hedged"
+    # adds another source only when the current one is unusually slow.
+    detection_mode: str = "sequential"
+    detection_fanout: int = 3
+    # Hedged mode: hedge once a source exceeds this percentile of its recent
+    # latency, or hedge_delay_ms while it has too little history.
+    hedge_percentile: int = 90
+    hedge_delay_ms: int = 1000
+    # Shared deadline (seconds) for detecting IPv4 and IPv6 concurrently;
+    # 0 derives it from the detector timeout and the number of sources.
+    detection_deadline: int = 0
+    # Order IP sources by measured speed/reliability instead of round-robin.
+    source_scoring: bool = True
+    # DNS-based IP sources: "off", "prefer" (ahead of HTTPS) or "only".
+    dns_sources: str = "off"
+    # Use addresses known to the kernel (and optionally the NAT-PMP gateway)
+    # before asking any remote source.
+    local_detection: bool = False
+    local_natpmp: bool = False
+    # Overall seconds a notification fan-out waits for its providers, which
+    # are sent to concurrently; a provider still busy then has an unknown outcome.
+    notify_deadline: int = 60
+    # Merge IP changes seen within this many seconds into one notification
+    # (0 sends each change right away).
+    notify_coalesce_window: int = 0
+    # Token bucket per provider: send attempts per minute and burst size.
+    notify_rate_limit: int = 20
+    notify_rate_burst: int = 5
+
+    http: HTTPConfig = field(default_factory=HTTPConfig)
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    outbox: OutboxConfig = field(default_factory=OutboxConfig)
+    history: HistoryConfig = field(default_factory=HistoryConfig)
+    samples: SamplesConfig = field(default_factory=SamplesConfig)
     discord: DiscordConfig = field(default_factory=DiscordConfig)
     telegram: TelegramConfig = field(default_factory=TelegramConfig)
     email: EmailConfig = field(default_factory=EmailConfig)
@@ -371,15 +550,39 @@ class Config:
             or "WANwatcher Docker",
             bot_name=_env_str("BOT_NAME", "WANwatcher") or "WANwatcher",
             check_interval=_env_int("CHECK_INTERVAL", 900),
+            check_on_network_change=_env_bool("CHECK_ON_NETWORK_CHANGE", False),
+            network_change_debounce=_env_int("CHECK_NETWORK_DEBOUNCE", 2),
+            check_engine=_env_str("CHECK_ENGINE", "threaded").lower(),
+            task_deadline=_env_int("CHECK_TASK_DEADLINE", 120),
             monitor_ipv4=_env_bool("MONITOR_IPV4", True),
             monitor_ipv6=_env_bool("MONITOR_IPV6", True),
             ip_db_file=_env_str("IP_DB_FILE", "/data/ipinfo.db") or "/data/ipinfo.db",
+            state_backend=_env_str("STATE_BACKEND", "json").lower() or "json",
             log_file=_env_str("LOG_FILE", "/logs/wanwatcher.log")
             or "/logs/wanwatcher.log",
             log_format=_env_str("LOG_FORMAT", "text").lower() or "text",
             ipinfo_token=_env_secret("IPINFO_TOKEN"),
             http_timeout=_env_int("HTTP_TIMEOUT", 10),
             change_confirmation=_env_bool("IP_CHANGE_CONFIRMATION", True),
+            detection_mode=_env_str("IP_DETECTION_MODE", "sequential").lower()
+            or "sequential",
+            detection_fanout=_env_int("IP_DETECTION_FANOUT", 3),
+            hedge_percentile=_env_int("IP_HEDGE_PERCENTILE", 90),
+            hedge_delay_ms=_env_int("IP_HEDGE_DELAY_MS", 1000),
+            detection_deadline=_env_int("IP_DETECTION_DEADLINE", 0),
+            source_scoring=_env_bool("IP_SOURCE_SCORING", True),
+            dns_sources=_env_str("IP_DNS_SOURCES", "off").lower(),
+            local_detection=_env_bool("IP_LOCAL_DETECTION", False),
+            local_natpmp=_env_bool("IP_LOCAL_NATPMP", False),
+            notify_deadline=_env_int("NOTIFY_DEADLINE", 60),
+            notify_coalesce_window=_env_int("NOTIFY_COALESCE_WINDOW", 0),
+            notify_rate_limit=_env_int("NOTIFY_RATE_LIMIT", 20),
+            notify_rate_burst=_env_int("NOTIFY_RATE_BURST", 5),
+            http=HTTPConfig.from_env(),
+            pipeline=PipelineConfig.from_env(),
+            outbox=OutboxConfig.from_env(),
+            history=HistoryConfig.from_env(),
+            samples=SamplesConfig.from_env(),
             discord=DiscordConfig.from_env(),
             telegram=TelegramConfig.from_env(),
             email=EmailConfig.from_env(),
@@ -391,6 +594,19 @@ class Config:
             updates=UpdateConfig.from_env(),
         )
 
+    def timeout_for(self, subsystem: str) -> int:
+        """HTTP timeout for a subsystem: detector, ddns, geo or notifiers.
+
+        Falls back to HTTP_TIMEOUT when no subsystem override is set.
+        """
+        overrides = {
+            "detector": self.http.detector_timeout,
+            "ddns": self.http.ddns_timeout,
+            "geo": self.http.geo_timeout,
+            "notifiers": self.http.notifier_timeout,
+        }
+        return overrides.get(subsystem) or self.http_timeout
+
     def any_notifier_enabled(self) -> bool:
         return any(
             [
@@ -2,22 +2,50 @@
 
 Use :func:`build_ddns_client` to construct the client matching the
 configured provider; it returns ``None`` (with an error log) when the
-provider is unknown or its configuration is incomplete.
+provider is unknown or its configuration is incomplete. Only the
+configured provider's module is imported; the client classes exported
+here are loaded on first use.
 """
 
+import importlib
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Any, List, Optional
 
 from wanwatcher.config import DDNSConfig
 from wanwatcher.ddns.base import DDNSClient
-from wanwatcher.ddns.cloudflare import CloudflareClient
-from wanwatcher.ddns.duckdns import DuckDNSClient
-from wanwatcher.ddns.dyndns2 import DynDNS2Client
-from wanwatcher.ddns.route53 import Route53Client
+from wanwatcher.httpclient import HTTPClient
 from wanwatcher.metrics import Metrics
 
+if TYPE_CHECKING:
+    from wanwatcher.ddns.cloudflare import CloudflareClient
+    from wanwatcher.ddns.duckdns import DuckDNSClient
+    from wanwatcher.ddns.dyndns2 import DynDNS2Client
+    from wanwatcher.ddns.route53 import Route53Client
+
 logger = logging.getLogger(__name__)
 
+# Lazily exported client class -> the submodule defining it.
+_CLIENTS = {
+    "CloudflareClient": "cloudflare",
+    "DuckDNSClient": "duckdns",
+    "DynDNS2Client": "dyndns2",
+    "Route53Client": "route53",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _CLIENTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_CLIENTS))
+
+
 __all__ = [
     "CloudflareClient",
     "DDNSClient",
@@ -29,7 +57,10 @@ __all__ = [
 
 
 def build_ddns_client(
-    config: DDNSConfig, timeout: int = 10, metrics: Optional[Metrics] = None
+    config: DDNSConfig,
+    timeout: int = 10,
+    metrics: Optional[Metrics] = None,
+    http: Optional[HTTPClient] = None,
 ) -> Optional[DDNSClient]:
     """Build the DDNS client for the configured provider, or None."""
     provider = (config.provider or "").strip().lower()
@@ -42,7 +73,9 @@ def build_ddns_client(
                 "CLOUDFLARE_ZONE and CLOUDFLARE_RECORDS - DDNS disabled"
             )
             return None
-        return CloudflareClient(cloudflare, timeout=timeout, metrics=metrics)
+        from wanwatcher.ddns.cloudflare import CloudflareClient
+
+        return CloudflareClient(cloudflare, timeout=timeout, metrics=metrics, http=http)
 
     if provider == "duckdns":
         duckdns = config.duckdns
@@ -52,7 +85,9 @@ def build_ddns_client(
                 "DUCKDNS_DOMAINS - DDNS disabled"
             )
             return None
-        return DuckDNSClient(duckdns, timeout=timeout, metrics=metrics)
+        from wanwatcher.ddns.duckdns import DuckDNSClient
+
+        return DuckDNSClient(duckdns, timeout=timeout, metrics=metrics, http=http)
 
     if provider == "dyndns2":
         dyndns2 = config.dyndns2
@@ -67,7 +102,9 @@ def build_ddns_client(
                 "DYNDNS2_PASSWORD and DYNDNS2_HOSTNAMES - DDNS disabled"
             )
             return None
-        return DynDNS2Client(dyndns2, timeout=timeout, metrics=metrics)
+        from wanwatcher.ddns.dyndns2 import DynDNS2Client
+
+        return DynDNS2Client(dyndns2, timeout=timeout, metrics=metrics, http=http)
 
     if provider == "route53":
         route53 = config.route53
@@ -83,7 +120,9 @@ def build_ddns_client(
                 "ROUTE53_RECORDS - DDNS disabled"
             )
             return None
-        return Route53Client(route53, timeout=timeout, metrics=metrics)
+        from wanwatcher.ddns.route53 import Route53Client
+
+        return Route53Client(route53, timeout=timeout, metrics=metrics, http=http)
 
     logger.error(
         "DDNS: unknown provider %r (expected cloudflare, duckdns, dyndns2 or "
@@ -6,8 +6,10 @@ exception inside a provider must never escape into the monitoring loop.
 """
 
 import logging
+import time
 from typing import Dict, Optional
 
+from wanwatcher.httpclient import HTTPClient, default_client
 from wanwatcher.metrics import Metrics
 
 logger = logging.getLogger(__name__)
@@ -26,9 +28,15 @@ class DDNSClient:
 
     provider: str = "ddns"
 
-    def __init__(self, timeout: int = 10, metrics: Optional[Metrics] = None) -> None:
+    def __init__(
+        self,
+        timeout: int = 10,
+        metrics: Optional[Metrics] = None,
+        http: Optional[HTTPClient] = None,
+    ) -> None:
         self.timeout = timeout
         self.metrics = metrics
+        self.http = http or default_client()
         # family ("ipv4" / "ipv6") -> last successfully applied address
         self._applied: Dict[str, str] = {}
         # Reset before every _apply call; subclasses flag failures into it.
@@ -58,6 +66,15 @@ class DDNSClient:
 
     # -- public API ---------------------------------------------------------------
 
+    def is_current(self, ipv4: Optional[str], ipv6: Optional[str]) -> bool:
+        """True when every given address was already applied successfully."""
+        wanted = {"ipv4": ipv4, "ipv6": ipv6}
+        return all(
+            self._applied.get(family) == address
+            for family, address in wanted.items()
+            if address is not None
+        )
+
     def update(self, ipv4: Optional[str], ipv6: Optional[str]) -> Dict[str, bool]:
         """Update DNS records for the given addresses.
 
@@ -86,12 +103,20 @@ class DDNSClient:
         )
 
         self._family_ok = {family: True for family in FAMILIES}
+        started = time.monotonic()
         try:
             results = self._apply(ipv4, ipv6)
         except Exception as exc:  # noqa: BLE001 - must never break the main loop
             logger.error("DDNS (%s): update failed: %s", self.provider, exc)
             self._inc("error")
             return {}
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe(
+                    "wanwatcher_ddns_update_duration_seconds",
+                    time.monotonic() - started,
+                    {"provider": self.provider},
+                )
 
         if results:
             # Only cache families that fully succeeded so the rest retry.
@@ -12,6 +12,7 @@ import requests
 
 from wanwatcher.config import CloudflareConfig
 from wanwatcher.ddns.base import DDNSClient
+from wanwatcher.httpclient import HTTPClient
 from wanwatcher.metrics import Metrics
 
 logger = logging.getLogger(__name__)
@@ -27,8 +28,9 @@ class CloudflareClient(DDNSClient):
         config: CloudflareConfig,
         timeout: int = 10,
         metrics: Optional[Metrics] = None,
+        http: Optional[HTTPClient] = None,
     ) -> None:
-        super().__init__(timeout=timeout, metrics=metrics)
+        super().__init__(timeout=timeout, metrics=metrics, http=http)
         self.config = config
         self._zone_id: Optional[str] = None
 
@@ -49,7 +51,7 @@ class CloudflareClient(DDNSClient):
     ) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
         """Perform an API call; returns (status_code, payload) or (None, None)."""
         try:
-            response = requests.request(
+            response = self.http.request(
                 method,
                 f"{API_BASE}{path}",
                 headers=self._headers(),
@@ -11,6 +11,7 @@ import requests
 
 from wanwatcher.config import DuckDNSConfig, redact
 from wanwatcher.ddns.base import DDNSClient
+from wanwatcher.httpclient import HTTPClient
 from wanwatcher.metrics import Metrics
 
 logger = logging.getLogger(__name__)
@@ -27,8 +28,9 @@ class DuckDNSClient(DDNSClient):
         config: DuckDNSConfig,
         timeout: int = 10,
         metrics: Optional[Metrics] = None,
+        http: Optional[HTTPClient] = None,
     ) -> None:
-        super().__init__(timeout=timeout, metrics=metrics)
+        super().__init__(timeout=timeout, metrics=metrics, http=http)
         self.config = config
         self.domains = [self._normalize(domain) for domain in config.domains]
 
@@ -52,7 +54,7 @@ class DuckDNSClient(DDNSClient):
 
         ok = False
         try:
-            response = requests.get(UPDATE_URL, params=params, timeout=self.timeout)
+            response = self.http.get(UPDATE_URL, params=params, timeout=self.timeout)
             body = response.text.strip()
             ok = response.ok and body.startswith("OK")
             if not ok:
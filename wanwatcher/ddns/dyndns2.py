@@ -13,6 +13,7 @@ import requests
 
 from wanwatcher.config import DynDNS2Config
 from wanwatcher.ddns.base import DDNSClient
+from wanwatcher.httpclient import HTTPClient
 from wanwatcher.metrics import Metrics
 
 logger = logging.getLogger(__name__)
@@ -29,8 +30,9 @@ class DynDNS2Client(DDNSClient):
         config: DynDNS2Config,
         timeout: int = 10,
         metrics: Optional[Metrics] = None,
+        http: Optional[HTTPClient] = None,
     ) -> None:
-        super().__init__(timeout=timeout, metrics=metrics)
+        super().__init__(timeout=timeout, metrics=metrics, http=http)
         self.config = config
         self.server = self._normalize_server(config.server)
 
@@ -46,7 +48,7 @@ class DynDNS2Client(DDNSClient):
 
     def _update_hostname(self, hostname: str, myip: str) -> bool:
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.server}/nic/update",
                 params={"hostname": hostname, "myip": myip},
                 auth=(self.config.username, self.config.password),
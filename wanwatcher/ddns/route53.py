@@ -17,6 +17,7 @@ import requests
 
 from wanwatcher.config import Route53Config, redact
 from wanwatcher.ddns.base import DDNSClient
+from wanwatcher.httpclient import HTTPClient
 from wanwatcher.metrics import Metrics
 
 logger = logging.getLogger(__name__)
@@ -100,8 +101,9 @@ class Route53Client(DDNSClient):
         config: Route53Config,
         timeout: int = 10,
         metrics: Optional[Metrics] = None,
+        http: Optional[HTTPClient] = None,
     ) -> None:
-        super().__init__(timeout=timeout, metrics=metrics)
+        super().__init__(timeout=timeout, metrics=metrics, http=http)
         self.config = config
         # Accept both "Z123" and "/hostedzone/Z123".
         self.zone_id = config.hosted_zone_id.rsplit("/", 1)[-1]
@@ -163,7 +165,7 @@ class Route53Client(DDNSClient):
 
         ok = False
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"https://{HOST}{canonical_uri}",
                 data=body,
                 headers=headers,
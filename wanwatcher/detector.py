@@ -4,15 +4,49 @@ Sources are tried in rotating order so load is spread between services and a
 single broken or rate-limited service never blocks detection. Every response
 is parsed strictly through the ipaddress module; anything that is not a clean
 global address is rejected.
+
+Two detection modes exist. ``sequential`` asks one source at a time. ``parallel``
+races several sources at once and returns as soon as enough of them agree (one
+answer when the address is unchanged, two when it changed), abandoning the
+stragglers, so a black-holed source costs nothing instead of a full timeout.
+``hedged`` asks one source and only launches the next one in parallel when the
+first has not answered within a percentile of its own historical latency, so
+a stalled request costs little extra time without doubling the request volume
+in the common case.
+
+With ``adaptive_order`` enabled the rotation is replaced by the ordering of a
+:class:`wanwatcher.scoring.SourceScoreboard`, which puts the source expected
+to answer fastest first and quarantines sources that keep failing. Source
+health is recorded either way so it can be inspected through the status API.
+
+Besides HTTPS endpoints, sources can be DNS servers that answer "what is my
+address" queries (see :mod:`wanwatcher.dnsclient`). ``dns_sources`` adds them
+ahead of the HTTPS sources (``prefer``) or uses them exclusively (``only``);
+one UDP round trip is far cheaper than a TCP + TLS + HTTP fetch.
+
+An optional local tier (:class:`wanwatcher.local.LocalDetector`) runs before
+any source: when the kernel or the gateway already reports the stored
+address, that answer is used without touching the network. A local address
+that differs from the stored one is a change and, like any change, is
+confirmed by the remote sources unless confirmation is disabled.
 """
 
 import ipaddress
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import requests
 
+from wanwatcher import dnsclient
+from wanwatcher.dnsclient import CLASS_CH, CLASS_IN, TYPE_A, TYPE_AAAA, TYPE_TXT
+from wanwatcher.httpclient import HTTPClient, default_client
+from wanwatcher.local import LocalDetector, is_global
+from wanwatcher.metrics import Metrics
+from wanwatcher.scoring import SourceScoreboard
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,6 +94,76 @@ IPV6_SOURCES: List[Source] = [
 ]
 
 
+@dataclass
+class DNSSource:
+    """A source that reports the address seen by a DNS server.
+
+    The server is given as an address literal so no resolver lookup is needed
+    first; its family decides which of our addresses the server sees.
+    """
+
+    name: str
+    server: str
+    qname: str
+    qtype: int
+    qclass: int = CLASS_IN
+    port: int = 53
+
+
+AnySource = Union[Source, DNSSource]
+
+DNS_IPV4_SOURCES: List[DNSSource] = [
+    DNSSource("opendns-dns", "208.67.222.222", "myip.opendns.com", TYPE_A),
+    DNSSource("google-dns", "216.239.32.10", "o-o.myaddr.l.google.com", TYPE_TXT),
+    DNSSource("cloudflare-dns", "1.1.1.1", "whoami.cloudflare", TYPE_TXT, CLASS_CH),
+]
+
+DNS_IPV6_SOURCES: List[DNSSource] = [
+    DNSSource("opendns-dns6", "2620:119:35::35", "myip.opendns.com", TYPE_AAAA),
+    DNSSource(
+        "google-dns6", "2001:4860:4802:32::a", "o-o.myaddr.l.google.com", TYPE_TXT
+    ),
+    DNSSource(
+        "cloudflare-dns6",
+        "2606:4700:4700::1111",
+        "whoami.cloudflare",
+        TYPE_TXT,
+        CLASS_CH,
+    ),
+]
+
+# "off": HTTPS sources only; "prefer": DNS sources first, then HTTPS;
+# "only": DNS sources only.
+DNS_SOURCE_MODES = ("off", "prefer", "only")
+
+
+def _source_list(
+    https: Sequence[Source], dns: Sequence[DNSSource], dns_mode: str
+) -> List[AnySource]:
+    if dns_mode == "only":
+        return list(dns)
+    if dns_mode == "prefer":
+        return [*dns, *https]
+    return list(https)
+
+
+def _worst_case(timeout: float, sources: int, local: bool) -> float:
+    return float(timeout) * sources + (LOCAL_TIER_BUDGET if local else 0.0)
+
+
+def max_detection_duration(
+    timeout: float, dns_sources: str = "off", local: bool = False
+) -> float:
+    """Seconds detection of the slower family takes with the built-in
+    sources when every one of them times out."""
+    dns_mode = dns_sources if dns_sources in DNS_SOURCE_MODES else "off"
+    sources = max(
+        len(_source_list(IPV4_SOURCES, DNS_IPV4_SOURCES, dns_mode)),
+        len(_source_list(IPV6_SOURCES, DNS_IPV6_SOURCES, dns_mode)),
+    )
+    return _worst_case(timeout, sources, local)
+
+
 def is_valid_ipv4(ip_str: str) -> bool:
     """Accept only globally routable unicast IPv4 addresses."""
     try:
@@ -106,20 +210,92 @@ def is_valid_ipv6(ip_str: str) -> bool:
     return True
 
 
+DETECTION_MODES = ("sequential", "parallel", "hedged")
+
+# Bounds for the hedge delay in seconds: never hedge almost immediately on a
+# source with very fast history, and never wait longer than the timeout.
+MIN_HEDGE_DELAY = 0.05
+# Seconds the local tier may take: a netlink dump plus a NAT-PMP query.
+LOCAL_TIER_BUDGET = 2.0
+
+
 class IPDetector:
     """Detects the current public IPv4/IPv6 with rotation and confirmation."""
 
-    def __init__(self, timeout: int = 10, change_confirmation: bool = True):
+    def __init__(
+        self,
+        timeout: int = 10,
+        change_confirmation: bool = True,
+        mode: str = "sequential",
+        fanout: int = 3,
+        http: Optional[HTTPClient] = None,
+        adaptive_order: bool = False,
+        metrics: Optional[Metrics] = None,
+        hedge_percentile: int = 90,
+        hedge_delay: float = 1.0,
+        dns_sources: str = "off",
+        ipv4_sources: Optional[Sequence[AnySource]] = None,
+        ipv6_sources: Optional[Sequence[AnySource]] = None,
+        local: Optional[LocalDetector] = None,
+    ):
         self.timeout = timeout
+        self.http = http or default_client()
+        self.adaptive_order = adaptive_order
+        self.metrics = metrics
+        self.scores = SourceScoreboard(metrics=metrics, fallback_latency=timeout)
         self.change_confirmation = change_confirmation
+        self.mode = mode if mode in DETECTION_MODES else "sequential"
+        # Maximum number of sources queried at the same time in parallel mode.
+        self.fanout = max(1, fanout)
+        # Hedged mode: launch the next source once the current one is slower
+        # than this percentile of its history, or hedge_delay seconds when the
+        # source has too little history.
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        dns_mode = dns_sources if dns_sources in DNS_SOURCE_MODES else "off"
+        self.ipv4_sources: List[AnySource] = (
+            list(ipv4_sources)
+            if ipv4_sources is not None
+            else _source_list(IPV4_SOURCES, DNS_IPV4_SOURCES, dns_mode)
+        )
+        self.ipv6_sources: List[AnySource] = (
+            list(ipv6_sources)
+            if ipv6_sources is not None
+            else _source_list(IPV6_SOURCES, DNS_IPV6_SOURCES, dns_mode)
+        )
+        self.local = local
+        # Name of the source whose answer decided the last detection per
+        # family ("local" for the local tier), None when none did.
+        self.answered: Dict[str, Optional[str]] = {"ipv4": None, "ipv6": None}
         self._ipv4_offset = 0
         self._ipv6_offset = 0
 
+    def max_duration(self) -> float:
+        """Seconds the slower family takes when every source times out."""
+        sources = max(len(self.ipv4_sources), len(self.ipv6_sources))
+        return _worst_case(self.timeout, sources, self.local is not None)
+
     # -- internals ---------------------------------------------------------
 
-    def _query(self, source: Source, validator: Callable[[str], bool]) -> Optional[str]:
+    def _query(
+        self, source: AnySource, validator: Callable[[str], bool], family: str
+    ) -> Optional[str]:
+        started = time.monotonic()
+        if isinstance(source, DNSSource):
+            ip = self._resolve(source, validator)
+        else:
+            ip = self._fetch(source, validator)
+        elapsed = time.monotonic() - started
+        self.scores.record(family, source.name, elapsed, ip is not None)
+        if self.metrics is not None:
+            self.metrics.observe(
+                "wanwatcher_source_query_duration_seconds", elapsed, {"family": family}
+            )
+        return ip
+
+    def _fetch(self, source: Source, validator: Callable[[str], bool]) -> Optional[str]:
         try:
-            response = requests.get(source.url, timeout=self.timeout)
+            response = self.http.get(source.url, timeout=self.timeout)
             response.raise_for_status()
             ip = source.parser(response)
         except requests.exceptions.RequestException as exc:
@@ -137,23 +313,106 @@ class IPDetector:
         logger.debug("Source %s returned invalid address: %r", source.name, ip)
         return None
 
+    def _resolve(
+        self, source: DNSSource, validator: Callable[[str], bool]
+    ) -> Optional[str]:
+        try:
+            answers = dnsclient.query(
+                source.server,
+                source.qname,
+                source.qtype,
+                source.qclass,
+                port=source.port,
+                timeout=self.timeout,
+            )
+        except dnsclient.DNSError as exc:
+            logger.warning("IP source %s failed: %s", source.name, exc)
+            return None
+
+        # TXT answers can carry extra records (e.g. Google's client-subnet
+        # note); the first one that is a valid address wins.
+        for answer in answers:
+            ip = answer.strip()
+            if validator(ip):
+                logger.debug("Source %s reports %s", source.name, ip)
+                return ip
+        logger.debug("Source %s returned no valid address: %r", source.name, answers)
+        return None
+
+    def _local_answer(
+        self, family: str, validator: Callable[[str], bool], previous: Optional[str]
+    ) -> Optional[str]:
+        """Answer from the local tier, or None to ask the remote sources."""
+        if self.local is None:
+            return None
+        started = time.monotonic()
+        try:
+            candidates = [
+                ip
+                for ip in self.local.addresses(family)
+                if validator(ip) and is_global(ip)
+            ]
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("Local %s discovery failed: %s", family, exc)
+            candidates = []
+        self.scores.record(
+            family, "local", time.monotonic() - started, bool(candidates)
+        )
+        if not candidates:
+            return None
+        if previous is not None and previous in candidates:
+            logger.debug("Local %s address unchanged: %s", family, previous)
+            return previous
+        if not self.change_confirmation:
+            return candidates[0]
+        logger.info(
+            "Local %s address %s differs from stored %s; confirming with remote "
+            "sources",
+            family,
+            candidates[0],
+            previous,
+        )
+        return None
+
+    def _order(
+        self, sources: List[AnySource], offset: int, family: str
+    ) -> List[AnySource]:
+        rotated = [sources[(offset + i) % len(sources)] for i in range(len(sources))]
+        if not self.adaptive_order:
+            return rotated
+        return self.scores.order(family, rotated)
+
+    def _hedge_after(self, source: AnySource, family: str) -> float:
+        """Seconds to wait for ``source`` before hedging with the next one."""
+        delay = self.scores.latency_percentile(
+            family, source.name, self.hedge_percentile
+        )
+        if delay is None:
+            delay = self.hedge_delay
+        return min(max(delay, MIN_HEDGE_DELAY), float(self.timeout))
+
     def _detect(
         self,
-        sources: List[Source],
+        sources: List[AnySource],
         offset: int,
         validator: Callable[[str], bool],
         previous: Optional[str],
+        family: str,
     ) -> Tuple[Optional[str], int]:
         """Try sources in rotating order; confirm changes with a second source.
 
         Returns (ip, sources_consulted). ip is None when every source failed.
         """
-        order = [sources[(offset + i) % len(sources)] for i in range(len(sources))]
+        order = self._order(sources, offset, family)
+        if self.mode in ("parallel", "hedged") and len(order) > 1:
+            return self._detect_parallel(
+                order, validator, previous, family, hedged=self.mode == "hedged"
+            )
         first_result: Optional[str] = None
         first_source_idx: Optional[int] = None
 
         for idx, source in enumerate(order):
-            ip = self._query(source, validator)
+            ip = self._query(source, validator, family)
             if ip is None:
                 continue
             if first_result is None:
@@ -163,6 +422,7 @@ class IPDetector:
                     self.change_confirmation and previous is not None and ip != previous
                 )
                 if not needs_confirmation:
+                    self.answered[family] = source.name
                     return ip, idx + 1
                 logger.info(
                     "Source %s reports a different address than stored; "
@@ -172,6 +432,7 @@ class IPDetector:
                 continue
             # Second opinion obtained
             if ip == first_result:
+                self.answered[family] = source.name
                 return ip, idx + 1
             logger.warning(
                 "IP sources disagree (%s vs %s); trusting the matching pair on "
@@ -189,25 +450,158 @@ class IPDetector:
                 "accepting %s from a single source",
                 first_result,
             )
+            self.answered[family] = order[first_source_idx or 0].name
             return first_result, (first_source_idx or 0) + 1
         return None, len(order)
 
+    def _detect_parallel(
+        self,
+        order: List[AnySource],
+        validator: Callable[[str], bool],
+        previous: Optional[str],
+        family: str,
+        hedged: bool = False,
+    ) -> Tuple[Optional[str], int]:
+        """Race up to ``fanout`` sources at once with the same rules as _detect.
+
+        Answers are judged in arrival order: the first valid answer wins unless
+        it is a change that needs confirmation, in which case the next valid
+        answer must match it. A failed source is replaced by the next one in
+        the rotation so the target number of requests stays in flight.
+        Requests still running once a decision is made are abandoned; their
+        worker threads finish in the background and the results are discarded.
+
+        In parallel mode the target is ``fanout`` from the start. When
+        ``hedged`` it starts at one and grows by one (up to ``fanout``) each
+        time the newest request outlives its hedge delay.
+        """
+        pending = list(order)
+        in_flight: Dict[Future, AnySource] = {}
+        consulted = 0
+        first_result: Optional[str] = None
+        first_source: Optional[AnySource] = None
+        target = 1 if hedged else self.fanout
+        hedge_at: Optional[float] = None
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.fanout, len(order)),
+            thread_name_prefix="wanwatcher-detect",
+        )
+
+        def launch() -> None:
+            nonlocal consulted, hedge_at
+            while pending and len(in_flight) < target:
+                source = pending.pop(0)
+                future = executor.submit(self._query, source, validator, family)
+                in_flight[future] = source
+                consulted += 1
+                if hedged:
+                    hedge_at = time.monotonic() + self._hedge_after(source, family)
+
+        try:
+            launch()
+            while in_flight:
+                timeout = None
+                if hedged and pending and target < self.fanout and hedge_at is not None:
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                done, _ = wait(
+                    list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                if not done:
+                    # The newest request is slower than its usual tail: hedge.
+                    target += 1
+                    logger.debug(
+                        "No %s answer within the hedge delay; launching %s",
+                        family,
+                        pending[0].name,
+                    )
+                    if self.metrics is not None:
+                        self.metrics.inc(
+                            "wanwatcher_detection_hedges_total", {"family": family}
+                        )
+                    launch()
+                    continue
+                failed = False
+                for future in done:
+                    source = in_flight.pop(future)
+                    ip = future.result()
+                    if ip is None:
+                        failed = True
+                        continue
+                    if first_result is None:
+                        first_result = ip
+                        first_source = source
+                        needs_confirmation = (
+                            self.change_confirmation
+                            and previous is not None
+                            and ip != previous
+                        )
+                        if not needs_confirmation:
+                            self.answered[family] = source.name
+                            return ip, consulted
+                        logger.info(
+                            "Source %s reports a different address than stored; "
+                            "waiting for a second source to confirm",
+                            source.name,
+                        )
+                        continue
+                    if ip == first_result:
+                        self.answered[family] = source.name
+                        return ip, consulted
+                    logger.warning(
+                        "IP sources disagree (%s from %s vs %s from %s); keeping "
+                        "the stored address for now",
+                        first_result,
+                        first_source.name if first_source else "?",
+                        ip,
+                        source.name,
+                    )
+                    return previous, consulted
+                # Only failures are replaced; an answer awaiting confirmation
+                # is still covered by the requests already in flight (or, when
+                # none are left, by launching the next source).
+                if failed or not in_flight:
+                    launch()
+        finally:
+            # Do not wait for stragglers; never-started requests are dropped.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if first_result is not None:
+            logger.info(
+                "Change confirmation unavailable (no second source reachable); "
+                "accepting %s from a single source",
+                first_result,
+            )
+            self.answered[family] = first_source.name if first_source else None
+            return first_result, consulted
+        return None, consulted
+
     # -- public API --------------------------------------------------------
 
     def get_ipv4(self, previous: Optional[str] = None) -> Optional[str]:
+        self.answered["ipv4"] = None
+        local = self._local_answer("ipv4", is_valid_ipv4, previous)
+        if local is not None:
+            self.answered["ipv4"] = "local"
+            return local
         ip, consulted = self._detect(
-            IPV4_SOURCES, self._ipv4_offset, is_valid_ipv4, previous
+            self.ipv4_sources, self._ipv4_offset, is_valid_ipv4, previous, "ipv4"
         )
-        self._ipv4_offset = (self._ipv4_offset + 1) % len(IPV4_SOURCES)
+        self._ipv4_offset = (self._ipv4_offset + 1) % len(self.ipv4_sources)
         if ip is None:
             logger.warning("Failed to retrieve IPv4 from all %d sources", consulted)
         return ip
 
     def get_ipv6(self, previous: Optional[str] = None) -> Optional[str]:
+        self.answered["ipv6"] = None
+        local = self._local_answer("ipv6", is_valid_ipv6, previous)
+        if local is not None:
+            self.answered["ipv6"] = "local"
+            return local
         ip, consulted = self._detect(
-            IPV6_SOURCES, self._ipv6_offset, is_valid_ipv6, previous
+            self.ipv6_sources, self._ipv6_offset, is_valid_ipv6, previous, "ipv6"
         )
-        self._ipv6_offset = (self._ipv6_offset + 1) % len(IPV6_SOURCES)
+        self._ipv6_offset = (self._ipv6_offset + 1) % len(self.ipv6_sources)
         if ip is None:
             logger.warning("Failed to retrieve IPv6 from all %d sources", consulted)
         return ip
@@ -0,0 +1,149 @@
+"""Minimal UDP DNS client used for DNS-based public IP detection.
+
+Only what the detector needs is implemented: a single question per query,
+A/AAAA/TXT answers, the IN and CH classes, and name compression when reading
+responses. Each lookup is one UDP round trip with no TCP fallback; a
+truncated response is treated as a failure so the detector moves on to the
+next source. There is no dependency beyond the standard library.
+"""
+
+import ipaddress
+import os
+import socket
+import struct
+from typing import List, Tuple
+
+TYPE_A = 1
+TYPE_TXT = 16
+TYPE_AAAA = 28
+
+CLASS_IN = 1
+CLASS_CH = 3
+
+RCODES = {
+    1: "FORMERR",
+    2: "SERVFAIL",
+    3: "NXDOMAIN",
+    4: "NOTIMP",
+    5: "REFUSED",
+}
+
+_HEADER = struct.Struct("!HHHHHH")
+_FLAG_QR = 0x8000
+_FLAG_TC = 0x0200
+_FLAG_RD = 0x0100
+
+
+class DNSError(Exception):
+    """Raised when a DNS query fails, times out or returns garbage."""
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = b""
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("ascii")
+        if not 0 < len(raw) < 64:
+            raise DNSError(f"Invalid DNS label in {name!r}")
+        encoded += bytes([len(raw)]) + raw
+    return encoded + b"\x00"
+
+
+def build_query(query_id: int, name: str, qtype: int, qclass: int = CLASS_IN) -> bytes:
+    """Encode a standard recursive query with a single question."""
+    header = _HEADER.pack(query_id, _FLAG_RD, 1, 0, 0, 0)
+    return header + _encode_name(name) + struct.pack("!HH", qtype, qclass)
+
+
+def _skip_name(message: bytes, offset: int) -> int:
+    """Return the offset just past the (possibly compressed) name at offset."""
+    while True:
+        if offset >= len(message):
+            raise DNSError("Truncated name in DNS response")
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+
+
+def _decode_rdata(rtype: int, rdata: bytes) -> str:
+    if rtype == TYPE_A and len(rdata) == 4:
+        return str(ipaddress.IPv4Address(rdata))
+    if rtype == TYPE_AAAA and len(rdata) == 16:
+        return str(ipaddress.IPv6Address(rdata))
+    if rtype == TYPE_TXT:
+        # One TXT record holds one or more length-prefixed strings.
+        parts, pos = [], 0
+        while pos < len(rdata):
+            length = rdata[pos]
+            parts.append(rdata[pos + 1 : pos + 1 + length].decode("ascii", "replace"))
+            pos += 1 + length
+        return "".join(parts)
+    raise DNSError(f"Malformed record of type {rtype}")
+
+
+def parse_response(message: bytes, query_id: int, qtype: int) -> List[str]:
+    """Return the data of all answers of type ``qtype`` in a response."""
+    if len(message) < _HEADER.size:
+        raise DNSError("Short DNS response")
+    rid, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(message)
+    if rid != query_id or not flags & _FLAG_QR:
+        raise DNSError("DNS response does not match the query")
+    if flags & _FLAG_TC:
+        raise DNSError("DNS response truncated")
+    rcode = flags & 0x000F
+    if rcode:
+        raise DNSError(f"DNS server answered {RCODES.get(rcode, rcode)}")
+
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        offset = _skip_name(message, offset) + 4
+
+    answers = []
+    for _ in range(ancount):
+        offset = _skip_name(message, offset)
+        if offset + 10 > len(message):
+            raise DNSError("Truncated record in DNS response")
+        rtype, _, _, rdlength = struct.unpack_from("!HHIH", message, offset)
+        offset += 10
+        rdata = message[offset : offset + rdlength]
+        if len(rdata) != rdlength:
+            raise DNSError("Truncated record data in DNS response")
+        offset += rdlength
+        if rtype == qtype:
+            answers.append(_decode_rdata(rtype, rdata))
+    return answers
+
+
+def query(
+    server: str,
+    name: str,
+    qtype: int,
+    qclass: int = CLASS_IN,
+    port: int = 53,
+    timeout: float = 5.0,
+) -> List[str]:
+    """Send one query to ``server`` over UDP and return the matching answers.
+
+    The socket family follows the server address, which is what makes
+    "what is my IP" lookups return the IPv4 or the IPv6 address.
+    """
+    query_id = struct.unpack("!H", os.urandom(2))[0]
+    packet = build_query(query_id, name, qtype, qclass)
+    family = socket.AF_INET6 if ":" in server else socket.AF_INET
+    address: Tuple = (server, port)
+    try:
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address)
+            sock.send(packet)
+            while True:
+                message = sock.recv(4096)
+                # Ignore stray datagrams (e.g. a late answer to an earlier
+                # query) instead of failing the lookup.
+                if len(message) >= 2 and message[:2] == packet[:2]:
+                    break
+    except OSError as exc:
+        raise DNSError(f"DNS query to {server} failed: {exc}") from exc
+    return parse_response(message, query_id, qtype)
@@ -0,0 +1,167 @@
+"""Optional asyncio engine for the monitoring loop (``CHECK_ENGINE=asyncio``).
+
+The threaded loop in :meth:`Application._run_threaded` runs a check, its side
+effects and the periodic jobs one after another, so a slow webhook delays
+the next check. This engine runs them as cooperative tasks instead:
+
+* the check task runs :meth:`Application.observe` (detection, decision, geo
+  lookup, persistence) and then starts every side effect from
+  :meth:`Application.side_effects` as its own task without waiting for it;
+* side effects of the same kind are serialized, so an older DDNS update or
+  MQTT publish can never land after a newer one;
+* the periodic jobs (update check, heartbeat) have their own task;
+* every task runs under ``CHECK_TASK_DEADLINE``.
+
+The application code stays synchronous and runs on a private worker-thread
+pool; blocking calls such as ``retry_with_backoff`` sleep on those threads,
+never on the event loop. A task that misses its deadline is abandoned (its
+thread finishes in the background) and the next run of the same task is
+skipped until it has. The status API keeps its own HTTP server thread.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Set
+
+if TYPE_CHECKING:
+    from wanwatcher.app import Application, CheckOutcome
+
+logger = logging.getLogger(__name__)
+
+CHECK_ENGINES = ("threaded", "asyncio")
+
+PERIODIC_TICK = 60.0  # seconds between runs of the periodic-jobs task
+MAX_WORKERS = 8  # threads running application code for the tasks
+
+
+class AsyncEngine:
+    """Runs an :class:`~wanwatcher.app.Application` on an asyncio event loop."""
+
+    def __init__(self, app: "Application") -> None:
+        self.app = app
+        self.deadline = float(app.config.task_deadline)
+        # Worker-thread futures of tasks that missed their deadline, by name.
+        self._stragglers: Dict[str, "asyncio.Future[object]"] = {}
+        self._sink_locks: Dict[str, asyncio.Lock] = {}
+        self._effects: Set["asyncio.Task[None]"] = set()
+        self._stopping: Optional[asyncio.Event] = None
+        # A private pool so abandoned calls never delay interpreter shutdown
+        # the way the loop's default executor would.
+        self._executor = ThreadPoolExecutor(
+            max_workers=MAX_WORKERS, thread_name_prefix="wanwatcher-task"
+        )
+
+    def run(self) -> None:
+        try:
+            asyncio.run(self._main())
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # -- helpers -----------------------------------------------------------
+
+    async def _call(self, name: str, func: Callable[[], object]) -> bool:
+        """Run ``func`` on a worker thread under the task deadline.
+
+        Returns False when the call was skipped or missed its deadline.
+        """
+        straggler = self._stragglers.get(name)
+        if straggler is not None:
+            if not straggler.done():
+                logger.warning(
+                    "Task %s is still running from an earlier round; skipping", name
+                )
+                return False
+            del self._stragglers[name]
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func)
+        done, _ = await asyncio.wait({future}, timeout=self.deadline)
+        if not done:
+            logger.error(
+                "Task %s did not finish within %.0fs; abandoning it",
+                name,
+                self.deadline,
+            )
+            self.app.metrics.inc(
+                "wanwatcher_task_deadline_exceeded_total", {"task": name}
+            )
+            self._stragglers[name] = future
+            return False
+        exc = future.exception()
+        if exc is not None:
+            logger.error("Task %s failed: %s", name, exc, exc_info=exc)
+            return False
+        return True
+
+    async def _sleep(self, timeout: float) -> bool:
+        """Wait between checks; True when shutting down.
+
+        Delegates to :meth:`Application._sleep` so network-change wake-ups and
+        signals behave exactly as in the threaded loop.
+        """
+        return await asyncio.to_thread(self.app._sleep, timeout)
+
+    # -- tasks -------------------------------------------------------------
+
+    async def _side_effect(self, name: str, effect: Callable[[], None]) -> None:
+        lock = self._sink_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            await self._call(name, effect)
+
+    async def _check_once(self) -> None:
+        outcomes: Dict[str, Optional["CheckOutcome"]] = {}
+
+        def observe() -> None:
+            outcomes["outcome"] = self.app.observe()
+
+        if not await self._call("observe", observe):
+            return
+        outcome = outcomes.get("outcome")
+        if outcome is None:
+            return
+        for name, effect in self.app.side_effects(outcome):
+            task = asyncio.create_task(self._side_effect(name, effect))
+            self._effects.add(task)
+            task.add_done_callback(self._effects.discard)
+
+    async def _check_loop(self) -> None:
+        logger.info("Performing initial IP check...")
+        await self._check_once()
+        logger.info(
+            "Monitoring continuously (every %d seconds, asyncio engine)",
+            self.app.config.check_interval,
+        )
+        while True:
+            wait = self.app._next_wait()
+            if self.app.consecutive_failures > 0:
+                logger.info(
+                    "Last check failed; next attempt in %.0fs (adaptive backoff)",
+                    wait,
+                )
+            if await self._sleep(wait):
+                return
+            logger.info("Performing check #%d...", self.app.check_count + 1)
+            await self._check_once()
+
+    async def _periodic_loop(self) -> None:
+        assert self._stopping is not None
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=PERIODIC_TICK)
+                return
+            except asyncio.TimeoutError:
+                pass
+            await self._call("updates", self.app.maybe_check_updates)
+            await self._call("heartbeat", self.app.maybe_heartbeat)
+
+    async def _main(self) -> None:
+        self._stopping = asyncio.Event()
+        periodic = asyncio.create_task(self._periodic_loop())
+        try:
+            await self._check_loop()
+        finally:
+            self._stopping.set()
+            await periodic
+            if self._effects:
+                # Give in-flight side effects a bounded chance to finish.
+                await asyncio.wait(set(self._effects), timeout=self.deadline)
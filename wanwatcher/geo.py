@@ -1,22 +1,32 @@
 """Geographic information lookup via ipinfo.io. Optional, degrades silently."""
 
 import logging
+import time
 from typing import Any, Dict, Optional
 
 import requests
 
+from wanwatcher.httpclient import HTTPClient, default_client
+from wanwatcher.metrics import Metrics
+
 logger = logging.getLogger(__name__)
 
 IPINFO_URL = "https://ipinfo.io/json"
 
 
-def get_geo_data(token: str, timeout: int = 10) -> Optional[Dict[str, Any]]:
+def get_geo_data(
+    token: str,
+    timeout: int = 10,
+    http: Optional[HTTPClient] = None,
+    metrics: Optional[Metrics] = None,
+) -> Optional[Dict[str, Any]]:
     """Fetch geo data for the current public IP. Returns None on any failure."""
     if not token:
         return None
 
+    started = time.monotonic()
     try:
-        response = requests.get(
+        response = (http or default_client()).get(
             IPINFO_URL,
             headers={
                 "Authorization": f"Bearer {token}",
@@ -29,6 +39,11 @@ def get_geo_data(token: str, timeout: int = 10) -> Optional[Dict[str, Any]]:
     except (requests.exceptions.RequestException, ValueError) as exc:
         logger.warning("ipinfo.io lookup failed: %s", exc)
         return None
+    finally:
+        if metrics is not None:
+            metrics.observe(
+                "wanwatcher_geo_lookup_duration_seconds", time.monotonic() - started
+            )
 
     if not isinstance(data, dict):
         logger.warning("ipinfo.io returned unexpected payload")
@@ -0,0 +1,56 @@
+"""Liveness file for the container healthcheck.
+
+After every successful check the loop sets the mtime of ``<IP_DB_FILE>.alive``
+to the moment it should be considered stale. A healthcheck then needs a single
+``stat()`` -- no reading or parsing of the state file, and no Python: the
+image's ``HEALTHCHECK`` compares the mtime with ``date +%s`` in the shell and
+only falls back to ``healthcheck.py`` when that fast path fails.
+"""
+
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SUFFIX = ".alive"
+
+
+def stale_after(interval: int) -> int:
+    """Seconds without a successful check before the loop counts as stale."""
+    return max(3 * interval, 1800) + 120
+
+
+class Heartbeat:
+    def __init__(self, path: str, ttl: float) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._failed = False
+
+    def beat(self, now: Optional[float] = None) -> None:
+        """Push the expiry (the file's mtime) to ``now + ttl``."""
+        expires = (time.time() if now is None else now) + self.ttl
+        try:
+            try:
+                os.utime(self.path, (expires, expires))
+            except FileNotFoundError:
+                with open(self.path, "a", encoding="utf-8"):
+                    pass
+                os.utime(self.path, (expires, expires))
+        except OSError as exc:
+            # Warn once; the healthcheck falls back to the state file.
+            if not self._failed:
+                logger.warning("Cannot update heartbeat %s: %s", self.path, exc)
+            self._failed = True
+            return
+        self._failed = False
+
+    def clear(self) -> None:
+        """Remove the file so a stopped loop is not reported alive."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.debug("Cannot remove heartbeat %s: %s", self.path, exc)
@@ -0,0 +1,331 @@
+"""Long-term IP change history (``HISTORY_ENABLED``).
+
+The state file keeps only the last ``HISTORY_LIMIT`` changes for
+``/api/status``. This log keeps every change for ``HISTORY_RETENTION_DAYS``
+without making the state file (or a check) any more expensive: each change
+appends one JSON line per address family to ``<IP_DB_FILE>.history``, and
+nothing is rewritten.
+
+Records are ``{"ts": <epoch>, "family": "ipv4", "old": ..., "new": ...}``.
+Once the active file reaches the segment size it is renamed to
+``<IP_DB_FILE>.history.<first ts>`` and a new one is started; rotated
+segments whose newest record is past the retention period are deleted by a
+background thread. Every segment has a sparse ``.idx`` sidecar of
+``<ts> <byte offset>`` lines (its first record, then one every
+``INDEX_STRIDE`` bytes), so a time-range query skips whole segments by name
+and seeks close to the first matching record instead of reading everything.
+A torn last line from a crash mid-append is cut off when the log is opened,
+so the next append starts on a fresh line.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bytes of records between two entries of a segment's time index.
+INDEX_STRIDE = 4096
+
+Segment = Tuple[float, str]  # (first ts, path)
+
+
+class HistoryLog:
+    """Append-only, segmented JSON-lines log of address changes."""
+
+    def __init__(
+        self,
+        path: str,
+        retention_days: int = 365,
+        segment_bytes: int = 1024 * 1024,
+    ) -> None:
+        self.path = path
+        self.retention = retention_days * 86400
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._first_ts: Optional[float] = None  # of the active segment
+        self._indexed_at = -INDEX_STRIDE  # offset of its last index entry
+        self._pruner: Optional[threading.Thread] = None
+
+    def open(self) -> None:
+        """Repair and index the active segment and drop expired segments."""
+        self._truncate_torn_tail()
+        index = self._read_index(self.path)
+        if index:
+            self._first_ts = index[0][0]
+            self._indexed_at = index[-1][1]
+        self.prune()
+
+    def _truncate_torn_tail(self) -> None:
+        """Cut a partial last line (and index entries past it) left by a crash."""
+        try:
+            with open(self.path, "r+b") as fh:
+                size = fh.seek(0, os.SEEK_END)
+                end = size
+                while end > 0:
+                    step = min(INDEX_STRIDE, end)
+                    fh.seek(end - step)
+                    newline = fh.read(step).rfind(b"\n")
+                    if newline >= 0:
+                        end = end - step + newline + 1
+                        break
+                    end -= step
+                if end == size:
+                    return
+                fh.truncate(end)
+        except FileNotFoundError:
+            return
+        logger.warning(
+            "Dropped a torn record at the end of %s (%d bytes)", self.path, size - end
+        )
+        index = self._read_index(self.path)
+        kept = [f"{ts!r} {offset}\n" for ts, offset in index if offset < end]
+        if len(kept) != len(index):
+            with open(self.path + ".idx", "w", encoding="utf-8") as idx:
+                idx.writelines(kept)
+
+    # -- writing -----------------------------------------------------------
+
+    def record_change(
+        self,
+        old_ipv4: Optional[str],
+        new_ipv4: Optional[str],
+        old_ipv6: Optional[str],
+        new_ipv6: Optional[str],
+        ts: Optional[float] = None,
+    ) -> None:
+        """Append one record per address family that changed."""
+        at = time.time() if ts is None else ts
+        records = [
+            {"ts": at, "family": family, "old": old, "new": new}
+            for family, old, new in (
+                ("ipv4", old_ipv4, new_ipv4),
+                ("ipv6", old_ipv6, new_ipv6),
+            )
+            if old != new
+        ]
+        if records:
+            self.append(records)
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        """Append records, oldest first; raises OSError."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            index: List[str] = []
+            with open(self.path, "ab") as fh:
+                offset = fh.tell()
+                for record in records:
+                    line = json.dumps(record, separators=(",", ":")) + "\n"
+                    if offset == 0 or offset - self._indexed_at >= INDEX_STRIDE:
+                        index.append(f"{record['ts']!r} {offset}\n")
+                        self._indexed_at = offset
+                        if offset == 0:
+                            self._first_ts = record["ts"]
+                    fh.write(line.encode("utf-8"))
+                    offset += len(line.encode("utf-8"))
+                fh.flush()
+                os.fsync(fh.fileno())
+            if index:
+                with open(self.path + ".idx", "a", encoding="utf-8") as idx:
+                    idx.writelines(index)
+            if offset >= self.segment_bytes:
+                self._rotate()
+
+    def import_legacy(self, entries: List[Dict[str, Any]]) -> int:
+        """Seed an empty log from the state file's history; return records added."""
+        if self._first_ts is not None or os.path.exists(self.path):
+            return 0
+        if any(self._rotated()):
+            return 0
+        records = list(legacy_records(entries))
+        if records:
+            self.append(records)
+        return len(records)
+
+    def _rotate(self) -> None:
+        first = self._first_ts if self._first_ts is not None else time.time()
+        target = f"{self.path}.{int(first)}"
+        suffix = 0
+        while os.path.exists(target):
+            suffix += 1
+            target = f"{self.path}.{int(first)}-{suffix}"
+        os.replace(self.path, target)
+        try:
+            os.replace(self.path + ".idx", target + ".idx")
+        except FileNotFoundError:
+            pass
+        self._first_ts = None
+        self._indexed_at = -INDEX_STRIDE
+        logger.info("Rotated change history to %s", target)
+        if self.retention > 0 and (self._pruner is None or not self._pruner.is_alive()):
+            self._pruner = threading.Thread(
+                target=self.prune, name="wanwatcher-history-prune", daemon=True
+            )
+            self._pruner.start()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete rotated segments older than the retention; return the count."""
+        if self.retention <= 0:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.retention
+        removed = 0
+        segments = self._segments()
+        # A segment ends where the next one starts.
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first >= cutoff:
+                break
+            for name in (path, path + ".idx"):
+                try:
+                    os.unlink(name)
+                except FileNotFoundError:
+                    pass
+                except OSError as exc:
+                    logger.warning("Could not remove %s: %s", name, exc)
+            removed += 1
+        if removed:
+            logger.info("Removed %d expired change history segment(s)", removed)
+        return removed
+
+    # -- reading -----------------------------------------------------------
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        family: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Records in ``[since, until]``, oldest first; the newest ``limit``."""
+        matches = self.iter_range(since, until, family)
+        if limit is None:
+            return list(matches)
+        return list(deque(matches, maxlen=max(0, limit)))
+
+    def iter_range(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        family: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream matching records segment by segment, oldest first."""
+        segments = self._segments()
+        bounds = [first for first, _ in segments[1:]] + [float("inf")]
+        for (first, path), end in zip(segments, bounds):
+            if since is not None and end < since:
+                continue
+            if until is not None and first > until:
+                break
+            yield from self._scan(path, since, until, family)
+
+    def _scan(
+        self,
+        path: str,
+        since: Optional[float],
+        until: Optional[float],
+        family: Optional[str],
+    ) -> Iterator[Dict[str, Any]]:
+        start = 0
+        if since is not None:
+            index = self._read_index(path)
+            # The last index entry before ``since``; every record from there
+            # on that is still earlier is skipped by the filter below.
+            pos = bisect.bisect_left([ts for ts, _ in index], since)
+            if pos > 0:
+                start = index[pos - 1][1]
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:
+            return  # rotated or pruned since it was listed
+        with fh:
+            fh.seek(start)
+            for raw in fh:
+                try:
+                    record = json.loads(raw)
+                    ts = float(record["ts"])
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn or foreign line
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts > until:
+                    return
+                if family is None or record.get("family") == family:
+                    yield record
+
+    def _rotated(self) -> List[Segment]:
+        directory = os.path.dirname(self.path) or "."
+        prefix = os.path.basename(self.path) + "."
+        segments: List[Segment] = []
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return segments
+        for name in names:
+            if not name.startswith(prefix) or name.endswith(".idx"):
+                continue
+            stamp = name[len(prefix) :].split("-", 1)[0]
+            if stamp.isdigit():
+                segments.append((float(stamp), os.path.join(directory, name)))
+        return segments
+
+    def _segments(self) -> List[Segment]:
+        """Rotated segments in order, then the active file."""
+        with self._lock:
+            segments = sorted(
+                self._rotated(), key=lambda seg: (seg[0], len(seg[1]), seg[1])
+            )
+            if os.path.exists(self.path):
+                first = self._first_ts
+                if first is None:
+                    first = segments[-1][0] if segments else 0.0
+                segments.append((first, self.path))
+        return segments
+
+    @staticmethod
+    def _read_index(path: str) -> List[Tuple[float, int]]:
+        index: List[Tuple[float, int]] = []
+        try:
+            with open(path + ".idx", "r", encoding="utf-8") as fh:
+                for line in fh:
+                    parts = line.split()
+                    try:
+                        index.append((float(parts[0]), int(parts[1])))
+                    except (IndexError, ValueError):
+                        continue
+        except FileNotFoundError:
+            pass
+        return index
+
+
+def parse_time(value: Any) -> float:
+    """Epoch seconds from a number or an ISO 8601 string; raises ValueError."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def legacy_records(entries: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """History log records for the state file's ``history`` entries."""
+    for entry in entries:
+        try:
+            ts = parse_time(entry["at"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        for family in ("ipv4", "ipv6"):
+            old, new = entry.get(f"old_{family}"), entry.get(f"new_{family}")
+            if old != new:
+                yield {"ts": ts, "family": family, "old": old, "new": new}
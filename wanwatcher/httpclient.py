@@ -0,0 +1,78 @@
+"""Shared HTTP client with pooled keep-alive connections.
+
+Every outbound HTTP call (IP sources, DDNS providers, ipinfo.io, the GitHub
+update check, Discord and Telegram) goes through an :class:`HTTPClient`
+instead of the module-level ``requests.get``/``requests.post`` helpers, which
+open a fresh TCP+TLS connection for every call. The client keeps one
+``requests.Session`` whose adapter holds a connection pool per host, so
+repeated calls to the same service reuse an established connection.
+
+Timeouts stay with the caller: each subsystem is constructed with its own
+timeout (see :meth:`wanwatcher.config.Config.timeout_for`) and passes it on
+every request. Components that are not handed a client fall back to a
+process-wide default created on first use.
+"""
+
+import logging
+import threading
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 4
+
+
+class HTTPClient:
+    """A thread-safe, connection-pooling wrapper around ``requests.Session``.
+
+    ``pool_connections`` is the number of per-host pools kept alive and
+    ``pool_maxsize`` the number of idle connections kept per host. Automatic
+    retries are disabled: every caller already has its own retry or fallback
+    policy and must see failures promptly.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    ) -> None:
+        self.pool_connections = max(1, pool_connections)
+        self.pool_maxsize = max(1, pool_maxsize)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0,
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._session.post(url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        return self._session.request(method, url, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections. The client stays usable afterwards."""
+        self._session.close()
+
+
+_default_client: Optional[HTTPClient] = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HTTPClient:
+    """Return the process-wide client used when none is injected."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
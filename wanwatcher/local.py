@@ -0,0 +1,251 @@
+"""Local address discovery: the kernel and the gateway, no echo services.
+
+When the WAN address sits directly on an interface (PPPoE, bridged modems,
+many IPv6 setups) the kernel already knows it. Addresses are read over an
+rtnetlink ``RTM_GETADDR`` dump, with ``/proc/net/if_inet6`` as an IPv6
+fallback where netlink is unavailable. Behind a NAT the router can be asked
+instead: NAT-PMP (RFC 6886) returns its external IPv4 address in a single
+UDP round trip to the default gateway read from ``/proc/net/route``.
+
+Only globally routable addresses count as candidates: a private or CGNAT
+(100.64.0.0/10) address on an interface means the host sits behind a NAT,
+which is exactly when the gateway is worth asking.
+
+Everything here is best effort and Linux-specific; on any failure the result
+is simply empty and the detector falls back to its remote sources.
+"""
+
+import ipaddress
+import logging
+import socket
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IF_INET6_PATH = "/proc/net/if_inet6"
+ROUTE_PATH = "/proc/net/route"
+NATPMP_PORT = 5351
+
+# rtnetlink constants (linux/netlink.h, linux/rtnetlink.h, linux/if_addr.h)
+NETLINK_ROUTE = 0
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWADDR = 20
+RTM_GETADDR = 22
+NLM_F_REQUEST = 0x001
+NLM_F_DUMP = 0x300
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_FLAGS = 8
+RT_SCOPE_UNIVERSE = 0
+
+IFA_F_TEMPORARY = 0x01
+IFA_F_DADFAILED = 0x08
+IFA_F_DEPRECATED = 0x20
+IFA_F_TENTATIVE = 0x40
+# Addresses carrying any of these flags are not usable as a source address.
+UNUSABLE_FLAGS = IFA_F_DADFAILED | IFA_F_DEPRECATED | IFA_F_TENTATIVE
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_IFADDRMSG = struct.Struct("=BBBBI")
+_RTATTR = struct.Struct("=HH")
+
+_FAMILIES = {"ipv4": socket.AF_INET, "ipv6": socket.AF_INET6}
+
+
+def is_global(ip_str: str) -> bool:
+    """Whether an address is globally routable.
+
+    Stricter than the detector's validators, which accept e.g. CGNAT
+    (100.64.0.0/10): a remote source reporting such an address is still the
+    best answer available, but an interface holding one sits behind a NAT.
+    """
+    try:
+        return ipaddress.ip_address(ip_str).is_global
+    except ValueError:
+        return False
+
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def iter_messages(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    """Split a netlink datagram into (message type, payload) pairs."""
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            return
+        yield msg_type, data[offset + _NLMSGHDR.size : offset + length]
+        offset += _align(length)
+
+
+def parse_attributes(payload: bytes, offset: int) -> Dict[int, bytes]:
+    """Decode the rtattr list that starts at ``offset`` in a payload."""
+    attrs = {}
+    while offset + _RTATTR.size <= len(payload):
+        attr_len, attr_type = _RTATTR.unpack_from(payload, offset)
+        if attr_len < _RTATTR.size:
+            break
+        attrs[attr_type] = payload[offset + _RTATTR.size : offset + attr_len]
+        offset += _align(attr_len)
+    return attrs
+
+
+def parse_ifaddr(payload: bytes) -> Optional[Tuple[str, int, int]]:
+    """Decode an RTM_NEWADDR/RTM_DELADDR payload to (address, flags, scope)."""
+    if len(payload) < _IFADDRMSG.size:
+        return None
+    family, _, flags, scope, _ = _IFADDRMSG.unpack_from(payload)
+    attrs = parse_attributes(payload, _IFADDRMSG.size)
+    if IFA_FLAGS in attrs and len(attrs[IFA_FLAGS]) == 4:
+        flags = struct.unpack("=I", attrs[IFA_FLAGS])[0]
+    # IFA_LOCAL is the interface's own address on point-to-point links, where
+    # IFA_ADDRESS is the peer.
+    raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+    if not raw:
+        return None
+    return socket.inet_ntop(family, raw), flags, scope
+
+
+def parse_addr_messages(data: bytes) -> Tuple[List[Tuple[str, int]], bool]:
+    """Decode a chunk of an RTM_GETADDR dump.
+
+    Returns ([(address, flags), ...], done) for globally scoped addresses.
+    """
+    found: List[Tuple[str, int]] = []
+    for msg_type, payload in iter_messages(data):
+        if msg_type == NLMSG_DONE:
+            return found, True
+        if msg_type == NLMSG_ERROR:
+            raise OSError("netlink returned an error for RTM_GETADDR")
+        if msg_type == RTM_NEWADDR:
+            parsed = parse_ifaddr(payload)
+            if parsed and parsed[2] == RT_SCOPE_UNIVERSE:
+                found.append((parsed[0], parsed[1]))
+    return found, False
+
+
+def netlink_addresses(family: int, timeout: float = 1.0) -> List[Tuple[str, int]]:
+    """Dump the kernel's global addresses of one family via rtnetlink."""
+    af_netlink = getattr(socket, "AF_NETLINK", None)
+    if af_netlink is None:
+        raise OSError("netlink is not available on this platform")
+    request = _IFADDRMSG.pack(family, 0, 0, 0, 0)
+    header = _NLMSGHDR.pack(
+        _NLMSGHDR.size + len(request), RTM_GETADDR, NLM_F_REQUEST | NLM_F_DUMP, 1, 0
+    )
+    found: List[Tuple[str, int]] = []
+    with socket.socket(af_netlink, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        sock.settimeout(timeout)
+        sock.bind((0, 0))
+        sock.send(header + request)
+        while True:
+            chunk, done = parse_addr_messages(sock.recv(65536))
+            found.extend(chunk)
+            if done:
+                return found
+
+
+def if_inet6_addresses(path: str = IF_INET6_PATH) -> List[Tuple[str, int]]:
+    """Global IPv6 addresses from /proc/net/if_inet6."""
+    found = []
+    with open(path, encoding="ascii") as handle:
+        for line in handle:
+            fields = line.split()
+            if len(fields) < 6 or int(fields[3], 16) != RT_SCOPE_UNIVERSE:
+                continue
+            address = ipaddress.IPv6Address(bytes.fromhex(fields[0]))
+            found.append((str(address), int(fields[4], 16)))
+    return found
+
+
+def default_gateway(path: str = ROUTE_PATH) -> Optional[str]:
+    """IPv4 default gateway from /proc/net/route, or None."""
+    with open(path, encoding="ascii") as handle:
+        next(handle, None)  # header
+        for line in handle:
+            fields = line.split()
+            if len(fields) < 4 or fields[1] != "00000000":
+                continue
+            if int(fields[3], 16) & 0x2:  # RTF_GATEWAY
+                return socket.inet_ntoa(struct.pack("<I", int(fields[2], 16)))
+    return None
+
+
+def natpmp_external_address(
+    gateway: str, port: int = NATPMP_PORT, timeout: float = 0.25
+) -> Optional[str]:
+    """Ask a NAT-PMP gateway for its external IPv4 address."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect((gateway, port))
+        sock.send(b"\x00\x00")  # version 0, opcode 0: external address
+        data = sock.recv(16)
+    if len(data) < 12 or data[0] != 0 or data[1] != 128:
+        return None
+    if struct.unpack_from("!H", data, 2)[0] != 0:  # result code
+        return None
+    return socket.inet_ntoa(data[8:12])
+
+
+class LocalDetector:
+    """Candidate WAN addresses known locally, best candidates first.
+
+    Deprecated, tentative and failed addresses are skipped and IPv6 privacy
+    (temporary) addresses are listed after stable ones. NAT-PMP is only
+    consulted for IPv4, and only when no interface holds a global address;
+    private and CGNAT interface addresses are never candidates.
+    """
+
+    def __init__(
+        self,
+        natpmp: bool = False,
+        timeout: float = 0.25,
+        if_inet6_path: str = IF_INET6_PATH,
+        route_path: str = ROUTE_PATH,
+        natpmp_port: int = NATPMP_PORT,
+    ) -> None:
+        self.natpmp = natpmp
+        self.timeout = timeout
+        self.if_inet6_path = if_inet6_path
+        self.route_path = route_path
+        self.natpmp_port = natpmp_port
+
+    def _kernel_addresses(self, family: str) -> List[Tuple[str, int]]:
+        try:
+            return netlink_addresses(_FAMILIES[family])
+        except OSError as exc:
+            logger.debug("Netlink address dump failed: %s", exc)
+        if family == "ipv6":
+            try:
+                return if_inet6_addresses(self.if_inet6_path)
+            except (OSError, ValueError) as exc:
+                logger.debug("Reading %s failed: %s", self.if_inet6_path, exc)
+        return []
+
+    def _natpmp_address(self) -> Optional[str]:
+        try:
+            gateway = default_gateway(self.route_path)
+            if gateway is None:
+                return None
+            return natpmp_external_address(gateway, self.natpmp_port, self.timeout)
+        except (OSError, ValueError) as exc:
+            logger.debug("NAT-PMP query failed: %s", exc)
+            return None
+
+    def addresses(self, family: str) -> List[str]:
+        usable = [
+            (address, flags)
+            for address, flags in self._kernel_addresses(family)
+            if not flags & UNUSABLE_FLAGS and is_global(address)
+        ]
+        usable.sort(key=lambda item: bool(item[1] & IFA_F_TEMPORARY))
+        result = [address for address, _ in usable]
+        if family == "ipv4" and self.natpmp and not result:
+            external = self._natpmp_address()
+            if external and is_global(external):
+                result.append(external)
+        return result
@@ -1,20 +1,186 @@
 """In-process metrics shared between the main loop and the HTTP API.
 
 A tiny hand-rolled registry that renders the Prometheus text exposition
-format. Counters and gauges only; thread-safe; zero dependencies.
+format. Counters, gauges, histograms and summaries; thread-safe; zero
+dependencies.
+
+Histograms count observations into fixed buckets (declared per metric, or
+the registry's latency buckets). Summaries estimate their quantiles with the
+P² algorithm, which keeps five markers per quantile instead of the
+observations, so their memory use does not grow with the number of samples.
+
+Scrapes are cheap: each series renders its name and labels once, when it is
+created, and every change bumps a generation counter. ``render_bytes``
+serves the previous exposition as-is, without taking the registry lock,
+until the generation moves, so writers on the check loop never wait for a
+scrape that has nothing new to show.
 """
 
+import math
 import threading
 import time
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+LabelSet = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, LabelSet]
+
+# Upper bounds (seconds) of latency histogram buckets; +Inf is implicit.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._prefixes: List[str] = []
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: LabelSet) -> List[str]:
+        if not self._prefixes:
+            for bound in self.buckets:
+                le = labels + (("le", _format_bound(bound)),)
+                self._prefixes.append(f"{name}_bucket{_render_labels(le)} ")
+            inf = labels + (("le", "+Inf"),)
+            self._prefixes.append(f"{name}_bucket{_render_labels(inf)} ")
+            self._prefixes.append(f"{name}_sum{_render_labels(labels)} ")
+            self._prefixes.append(f"{name}_count{_render_labels(labels)} ")
+        values: List[Any] = []
+        cumulative = 0
+        for count in self.counts:
+            cumulative += count
+            values.append(cumulative)
+        values.extend((self.count, self.sum, self.count))
+        return [f"{prefix}{value}" for prefix, value in zip(self._prefixes, values)]
+
+
+class _P2Quantile:
+    """Streaming estimate of one quantile (Jain & Chlamtac's P² algorithm)."""
+
+    def __init__(self, quantile: float) -> None:
+        p = quantile
+        self.quantile = quantile
+        self.heights: List[float] = []  # the first five observations, then markers
+        self.positions = [0.0, 1.0, 2.0, 3.0, 4.0]
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def observe(self, value: float) -> None:
+        q = self.heights
+        if len(q) < 5:
+            q.append(value)
+            q.sort()
+            return
+        if value < q[0]:
+            q[0] = value
+            cell = 0
+        elif value >= q[4]:
+            q[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if q[i] <= value < q[i + 1])
+        n = self.positions
+        for i in range(cell + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = math.copysign(1.0, d)
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    j = i + int(step)
+                    height = q[i] + step * (q[j] - q[i]) / (n[j] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, d: float) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        q = self.heights
+        if not q:
+            return math.nan
+        if len(q) < 5:
+            return q[round(self.quantile * (len(q) - 1))]
+        return q[2]
+
+
+class _Summary:
+    def __init__(self, quantiles: Sequence[float]) -> None:
+        self.estimators = [_P2Quantile(q) for q in quantiles]
+        self.sum = 0.0
+        self.count = 0
+        self._prefixes: List[str] = []
+
+    def observe(self, value: float) -> None:
+        for estimator in self.estimators:
+            estimator.observe(value)
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: LabelSet) -> List[str]:
+        if not self._prefixes:
+            for estimator in self.estimators:
+                quantile = labels + (("quantile", _format_bound(estimator.quantile)),)
+                self._prefixes.append(f"{name}{_render_labels(quantile)} ")
+            self._prefixes.append(f"{name}_sum{_render_labels(labels)} ")
+            self._prefixes.append(f"{name}_count{_render_labels(labels)} ")
+        values: List[Any] = [estimator.value() for estimator in self.estimators]
+        values.extend((self.sum, self.count))
+        return [f"{prefix}{value}" for prefix, value in zip(self._prefixes, values)]
+
+
+_Observed = Union[_Histogram, _Summary]
+# One series in exposition order: the HELP/TYPE block to emit before it (if
+# it is the first series of its metric), its key and the store holding it.
+_Row = Tuple[str, SeriesKey, Mapping[SeriesKey, Union[float, _Observed]]]
+
+
+def _format_bound(value: float) -> str:
+    return repr(float(value))
+
+
+def _render_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return "{" + inner + "}"
 
 
 class Metrics:
-    def __init__(self) -> None:
+    def __init__(self, latency_buckets: Optional[Sequence[float]] = None) -> None:
         self._lock = threading.Lock()
-        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
-        self._gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._counters: Dict[SeriesKey, float] = {}
+        self._gauges: Dict[SeriesKey, float] = {}
+        self._histograms: Dict[SeriesKey, _Histogram] = {}
+        self._summaries: Dict[SeriesKey, _Summary] = {}
         self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help text)
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._quantiles: Dict[str, Tuple[float, ...]] = {}
+        # Counter and gauge series -> "name{labels} ", rendered once.
+        self._prefixes: Dict[SeriesKey, str] = {}
+        self._layout: Optional[List[_Row]] = None  # None after a new series
+        self._generation = 0  # bumped by every change, under _lock
+        self._cache: Tuple[int, bytes] = (-1, b"")
+        self._render_lock = threading.Lock()  # one rebuild at a time
+        self.latency_buckets = tuple(
+            sorted(set(latency_buckets or ())) or DEFAULT_BUCKETS
+        )
         self.started_at = time.time()
         self._declare("wanwatcher_checks_total", "counter", "IP checks performed")
         self._declare(
@@ -45,6 +211,107 @@ class Metrics:
             "gauge",
             "Unix timestamp of the last completed IP check",
         )
+        self._declare(
+            "wanwatcher_detection_duration_seconds",
+            "gauge",
+            "Wall time of the last IP detection by address family",
+        )
+        self._declare(
+            "wanwatcher_detection_deadline_exceeded_total",
+            "counter",
+            "Detections that missed the shared per-check deadline by family",
+        )
+        self._declare(
+            "wanwatcher_pipeline_jobs_total",
+            "counter",
+            "Side-effect pipeline jobs by sink and result (ok, error, dropped)",
+        )
+        self._declare(
+            "wanwatcher_pipeline_queue_depth",
+            "gauge",
+            "Side-effect jobs waiting in each sink queue",
+        )
+        self._declare(
+            "wanwatcher_pipeline_wait_seconds",
+            "gauge",
+            "Time the most recent job of each sink spent queued",
+        )
+        self._declare(
+            "wanwatcher_pipeline_latency_seconds",
+            "gauge",
+            "Time from queueing to completion of the most recent job of each sink",
+        )
+        self._declare(
+            "wanwatcher_outbox_jobs_total",
+            "counter",
+            "Outbox delivery attempts by kind and result "
+            "(delivered, retry, dropped, superseded)",
+        )
+        self._declare(
+            "wanwatcher_outbox_pending",
+            "gauge",
+            "Notification and DDNS jobs waiting in the durable outbox",
+        )
+        self._declare(
+            "wanwatcher_task_deadline_exceeded_total",
+            "counter",
+            "Asyncio engine tasks abandoned after missing their deadline",
+        )
+        self._declare(
+            "wanwatcher_network_change_wakeups_total",
+            "counter",
+            "Checks triggered early by a network change notification",
+        )
+        self._declare(
+            "wanwatcher_detection_hedges_total",
+            "counter",
+            "Extra IP source requests launched because a source was slow",
+        )
+        self._declare(
+            "wanwatcher_source_requests_total",
+            "counter",
+            "IP source queries by family, source and result",
+        )
+        self._declare(
+            "wanwatcher_source_latency_seconds",
+            "gauge",
+            "Moving average latency of successful IP source queries",
+        )
+        self._declare(
+            "wanwatcher_source_success_ratio",
+            "gauge",
+            "Moving average success rate of IP source queries",
+        )
+        self._declare(
+            "wanwatcher_source_quarantined",
+            "gauge",
+            "Whether an IP source is quarantined after repeated failures",
+        )
+        self._declare(
+            "wanwatcher_source_query_duration_seconds",
+            "histogram",
+            "Duration of IP source queries by family",
+        )
+        self._declare(
+            "wanwatcher_geo_lookup_duration_seconds",
+            "histogram",
+            "Duration of ipinfo.io geo lookups",
+        )
+        self._declare(
+            "wanwatcher_ddns_update_duration_seconds",
+            "histogram",
+            "Duration of DDNS record updates by provider",
+        )
+        self._declare(
+            "wanwatcher_notification_fanout_duration_seconds",
+            "histogram",
+            "Duration of a notification fan-out to all providers by action",
+        )
+        self._declare(
+            "wanwatcher_state_save_duration_seconds",
+            "summary",
+            "Duration of state saves",
+        )
         self._declare("wanwatcher_up", "gauge", "Whether the monitor loop is running")
         self._declare(
             "wanwatcher_start_time_seconds", "gauge", "Unix timestamp of process start"
@@ -52,48 +319,135 @@ class Metrics:
         self.set_gauge("wanwatcher_start_time_seconds", self.started_at)
         self.set_gauge("wanwatcher_up", 1)
 
-    def _declare(self, name: str, mtype: str, help_text: str) -> None:
+    def _declare(
+        self,
+        name: str,
+        mtype: str,
+        help_text: str,
+        buckets: Optional[Sequence[float]] = None,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> None:
         self._help[name] = (mtype, help_text)
+        if mtype == "histogram":
+            self._buckets[name] = tuple(sorted(buckets or self.latency_buckets))
+        elif mtype == "summary":
+            self._quantiles[name] = tuple(quantiles)
 
     @staticmethod
-    def _key(
-        name: str, labels: Dict[str, str]
-    ) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    def _key(name: str, labels: Dict[str, str]) -> SeriesKey:
         return (name, tuple(sorted(labels.items())))
 
+    def _add_series(self, key: SeriesKey) -> None:
+        """Note a new counter or gauge series; call with the lock held."""
+        self._prefixes[key] = f"{key[0]}{_render_labels(key[1])} "
+        self._layout = None
+
     def inc(
         self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1
     ) -> None:
         labels = labels or {}
         with self._lock:
             key = self._key(name, labels)
-            self._counters[key] = self._counters.get(key, 0) + value
+            current = self._counters.get(key)
+            if current is None:
+                self._add_series(key)
+                current = 0
+            self._counters[key] = current + value
+            self._generation += 1
 
     def set_gauge(
         self, name: str, value: float, labels: Optional[Dict[str, str]] = None
     ) -> None:
         labels = labels or {}
         with self._lock:
-            self._gauges[self._key(name, labels)] = value
+            key = self._key(name, labels)
+            current = self._gauges.get(key)
+            if current is None:
+                self._add_series(key)
+            elif current == value:
+                return  # keep the cached exposition
+            self._gauges[key] = value
+            self._generation += 1
 
-    @staticmethod
-    def _render_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
-        if not labels:
-            return ""
-        inner = ",".join(f'{k}="{v}"' for k, v in labels)
-        return "{" + inner + "}"
+    def observe(
+        self, name: str, value: float, labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Record ``value`` in a declared histogram or summary.
+
+        Names declared as neither are treated as histograms with the
+        registry's latency buckets.
+        """
+        labels = labels or {}
+        with self._lock:
+            key = self._key(name, labels)
+            self._generation += 1
+            if name in self._quantiles:
+                summary = self._summaries.get(key)
+                if summary is None:
+                    summary = self._summaries[key] = _Summary(self._quantiles[name])
+                    self._layout = None
+                summary.observe(value)
+                return
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(
+                    self._buckets.get(name, self.latency_buckets)
+                )
+                self._layout = None
+            histogram.observe(value)
 
     def render(self) -> str:
         """Render all metrics in the Prometheus text format."""
-        with self._lock:
-            lines = []
-            seen_help = set()
-            for store in (self._counters, self._gauges):
-                for (name, labels), value in sorted(store.items()):
-                    if name not in seen_help and name in self._help:
-                        mtype, help_text = self._help[name]
-                        lines.append(f"# HELP {name} {help_text}")
-                        lines.append(f"# TYPE {name} {mtype}")
-                        seen_help.add(name)
-                    lines.append(f"{name}{self._render_labels(labels)} {value}")
-            return "\n".join(lines) + "\n"
+        return self.render_bytes().decode("utf-8")
+
+    def render_bytes(self) -> bytes:
+        """The exposition as UTF-8, rebuilt only after something changed."""
+        # Reading the cache tuple and the counter needs no lock: both are
+        # replaced in single assignments, and a scrape that races a change
+        # just serves the exposition from an instant earlier.
+        generation, body = self._cache
+        if generation == self._generation:
+            return body
+        with self._render_lock:
+            generation, body = self._cache
+            if generation == self._generation:
+                return body  # another scrape rebuilt it meanwhile
+            # Copy the values under the lock and format them after releasing
+            # it; only histograms and summaries render their lines inside.
+            snapshot: List[Tuple[str, str, Any]] = []
+            with self._lock:
+                generation = self._generation
+                if self._layout is None:
+                    self._layout = self._build_layout()
+                for header, key, store in self._layout:
+                    value = store[key]
+                    if isinstance(value, (_Histogram, _Summary)):
+                        snapshot.append((header, "", "\n".join(value.lines(*key))))
+                    else:
+                        snapshot.append((header, self._prefixes[key], value))
+            body = "".join(
+                f"{header}{prefix}{value}\n" for header, prefix, value in snapshot
+            ).encode("utf-8")
+            self._cache = (generation, body)
+            return body
+
+    def _build_layout(self) -> List[_Row]:
+        """Series in exposition order; call with the lock held."""
+        rows: List[_Row] = []
+        seen_help = set()
+        stores: Tuple[Mapping[SeriesKey, Union[float, _Observed]], ...] = (
+            self._counters,
+            self._gauges,
+            self._histograms,
+            self._summaries,
+        )
+        for store in stores:
+            for key in sorted(store):
+                name = key[0]
+                header = ""
+                if name not in seen_help and name in self._help:
+                    mtype, help_text = self._help[name]
+                    header = f"# HELP {name} {help_text}\n# TYPE {name} {mtype}\n"
+                    seen_help.add(name)
+                rows.append((header, key, store))
+        return rows
@@ -0,0 +1,236 @@
+"""Event-driven change detection from rtnetlink notifications.
+
+A :class:`NetworkWatcher` thread joins the rtnetlink multicast groups for
+IPv4/IPv6 address and route changes and calls ``on_change`` when something
+that could move the public address happens: a global address appears,
+disappears or becomes deprecated, or a default route is added or removed.
+Notifications that only refresh lifetimes of known addresses (every IPv6
+router advertisement does this) are ignored, and bursts are debounced into a
+single callback, so the monitoring loop is woken once per real change.
+
+The watcher only sees the network namespace it runs in; in Docker that means
+``network_mode: host``. Polling stays in place as the safety net.
+
+When a burst of changes overflows the socket buffer the kernel drops
+notifications and ``recv`` fails with ``ENOBUFS``; the watcher then reloads
+the known addresses and default routes and reports a change, since it can no
+longer tell what happened.
+"""
+
+import errno
+import logging
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Optional, Set, Tuple
+
+from wanwatcher.local import (
+    NETLINK_ROUTE,
+    NLM_F_DUMP,
+    NLM_F_REQUEST,
+    NLMSG_DONE,
+    NLMSG_ERROR,
+    RT_SCOPE_UNIVERSE,
+    RTM_NEWADDR,
+    UNUSABLE_FLAGS,
+    iter_messages,
+    netlink_addresses,
+    parse_attributes,
+    parse_ifaddr,
+)
+
+logger = logging.getLogger(__name__)
+
+RTM_DELADDR = 21
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+RTM_GETROUTE = 26
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_ROUTE = 0x400
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RT_TABLE_MAIN = 254
+RTN_UNICAST = 1
+
+_RTMSG = struct.Struct("=BBBBBBBBI")
+_NLMSGHDR = struct.Struct("=IHHII")
+
+_GROUPS = (
+    RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_IFADDR | RTMGRP_IPV6_ROUTE
+)
+
+RouteKey = Tuple[int, bytes, bytes]
+
+
+def default_route_key(payload: bytes) -> Optional[RouteKey]:
+    """(family, gateway, interface) of a main-table default route message."""
+    if len(payload) < _RTMSG.size:
+        return None
+    family, dst_len, _, _, table, _, _, rtype, _ = _RTMSG.unpack_from(payload)
+    if dst_len != 0 or table != RT_TABLE_MAIN or rtype != RTN_UNICAST:
+        return None
+    attrs = parse_attributes(payload, _RTMSG.size)
+    return (family, attrs.get(RTA_GATEWAY, b""), attrs.get(RTA_OIF, b""))
+
+
+def netlink_default_routes(timeout: float = 1.0) -> Set[RouteKey]:
+    """Dump the kernel's default routes of both families via rtnetlink."""
+    af_netlink = getattr(socket, "AF_NETLINK", None)
+    if af_netlink is None:
+        raise OSError("netlink is not available on this platform")
+    request = _RTMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0, 0, 0, 0, 0)
+    header = _NLMSGHDR.pack(
+        _NLMSGHDR.size + len(request), RTM_GETROUTE, NLM_F_REQUEST | NLM_F_DUMP, 1, 0
+    )
+    found: Set[RouteKey] = set()
+    with socket.socket(af_netlink, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        sock.settimeout(timeout)
+        sock.bind((0, 0))
+        sock.send(header + request)
+        while True:
+            for msg_type, payload in iter_messages(sock.recv(65536)):
+                if msg_type == NLMSG_DONE:
+                    return found
+                if msg_type == NLMSG_ERROR:
+                    raise OSError("netlink returned an error for RTM_GETROUTE")
+                if msg_type == RTM_NEWROUTE:
+                    key = default_route_key(payload)
+                    if key is not None:
+                        found.add(key)
+
+
+class NetworkWatcher:
+    """Background thread turning rtnetlink events into ``on_change`` calls."""
+
+    def __init__(self, on_change: Callable[[], None], debounce: float = 2.0) -> None:
+        self.on_change = on_change
+        # Quiet period after the last relevant event before on_change fires.
+        self.debounce = max(0.0, debounce)
+        self.addresses: Set[str] = set()
+        self.routes: Set[RouteKey] = set()
+        self._sock: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- event filtering ---------------------------------------------------
+
+    def _address_event(self, msg_type: int, payload: bytes) -> bool:
+        parsed = parse_ifaddr(payload)
+        if parsed is None or parsed[2] != RT_SCOPE_UNIVERSE:
+            return False
+        address, flags, _ = parsed
+        usable = msg_type == RTM_NEWADDR and not flags & UNUSABLE_FLAGS
+        if usable and address not in self.addresses:
+            self.addresses.add(address)
+            return True
+        if not usable and address in self.addresses:
+            self.addresses.discard(address)
+            return True
+        return False
+
+    def _route_event(self, msg_type: int, payload: bytes) -> bool:
+        key = default_route_key(payload)
+        if key is None:
+            return False
+        if msg_type == RTM_NEWROUTE and key not in self.routes:
+            self.routes.add(key)
+            return True
+        if msg_type == RTM_DELROUTE and key in self.routes:
+            self.routes.discard(key)
+            return True
+        return False
+
+    def handle(self, data: bytes) -> bool:
+        """Process one netlink datagram; True if it holds a relevant change."""
+        changed = False
+        for msg_type, payload in iter_messages(data):
+            if msg_type in (RTM_NEWADDR, RTM_DELADDR):
+                changed = self._address_event(msg_type, payload) or changed
+            elif msg_type in (RTM_NEWROUTE, RTM_DELROUTE):
+                changed = self._route_event(msg_type, payload) or changed
+        return changed
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> bool:
+        """Subscribe and start the thread; False if netlink is unavailable."""
+        af_netlink = getattr(socket, "AF_NETLINK", None)
+        if af_netlink is None:
+            logger.warning("Network change watcher needs Linux netlink; polling only")
+            return False
+        try:
+            sock = socket.socket(af_netlink, socket.SOCK_RAW, NETLINK_ROUTE)
+            sock.bind((0, _GROUPS))
+        except OSError as exc:
+            logger.warning("Network change watcher unavailable: %s", exc)
+            return False
+        sock.settimeout(0.5)
+        self._sock = sock
+        self.resync()
+        self._thread = threading.Thread(
+            target=self._run, name="wanwatcher-netwatch", daemon=True
+        )
+        self._thread.start()
+        logger.info("Watching for network changes (debounce %.1fs)", self.debounce)
+        return True
+
+    def resync(self) -> None:
+        """Reload the known addresses and default routes from the kernel, so
+        their next refresh is not mistaken for a change."""
+        addresses: Set[str] = set()
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                addresses.update(
+                    address
+                    for address, flags in netlink_addresses(family)
+                    if not flags & UNUSABLE_FLAGS
+                )
+            except OSError as exc:
+                logger.debug("Seeding addresses for family %d failed: %s", family, exc)
+        self.addresses = addresses
+        try:
+            self.routes = netlink_default_routes()
+        except OSError as exc:
+            logger.debug("Seeding default routes failed: %s", exc)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._sock is not None:
+            self._sock.close()
+
+    def _run(self) -> None:
+        assert self._sock is not None
+        pending_since: Optional[float] = None
+        while not self._stop.is_set():
+            try:
+                data = self._sock.recv(65536)
+            except socket.timeout:
+                data = b""
+            except OSError as exc:
+                if self._stop.is_set() or exc.errno == errno.EBADF:
+                    return  # closed by stop()
+                if exc.errno == errno.ENOBUFS:
+                    logger.warning("Network change notifications were lost; resyncing")
+                    self.resync()
+                    pending_since = time.monotonic()
+                else:
+                    logger.warning("Network change watcher error: %s", exc)
+                    self._stop.wait(1.0)
+                data = b""
+            if data and self.handle(data):
+                pending_since = time.monotonic()
+            if (
+                pending_since is not None
+                and time.monotonic() - pending_since >= self.debounce
+            ):
+                pending_since = None
+                logger.info("Network change detected")
+                try:
+                    self.on_change()
+                except Exception as exc:  # noqa: BLE001
+                    logger.error("Network change callback failed: %s", exc)
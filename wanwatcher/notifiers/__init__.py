@@ -3,21 +3,34 @@
 Exposes the provider classes, the manager, and build_manager(), which wires
 providers from a Config object. Secrets (webhook URLs, tokens, passwords,
 Apprise URLs) are never logged in full.
+
+The provider classes are loaded on first use (PEP 562), and build_manager()
+imports only the providers that are enabled, so an unused provider never
+costs startup time for its module or its dependencies (smtplib and
+email.mime for Email, the apprise package and its plugins for Apprise).
 """
 
+import importlib
 import logging
+from typing import TYPE_CHECKING, Any, List, Optional
 
 from wanwatcher.config import Config
+from wanwatcher.httpclient import HTTPClient
+from wanwatcher.metrics import Metrics
 
-from .apprise import AppriseNotifier
 from .base import NotificationProvider, retry_with_backoff
-from .discord import DiscordNotifier
-from .email import EmailNotifier
+from .event import ChangeEvent
 from .manager import NotificationManager
-from .telegram import TelegramNotifier
+
+if TYPE_CHECKING:
+    from .apprise import AppriseNotifier
+    from .discord import DiscordNotifier
+    from .email import EmailNotifier
+    from .telegram import TelegramNotifier
 
 __all__ = [
     "AppriseNotifier",
+    "ChangeEvent",
     "DiscordNotifier",
     "EmailNotifier",
     "NotificationManager",
@@ -29,6 +42,27 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+# Lazily exported provider class -> the submodule defining it.
+_PROVIDERS = {
+    "AppriseNotifier": "apprise",
+    "DiscordNotifier": "discord",
+    "EmailNotifier": "email",
+    "TelegramNotifier": "telegram",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _PROVIDERS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_PROVIDERS))
+
 
 def _redact_url(url: str, show_chars: int = 8) -> str:
     """Return a loggable form of a URL: only its last few characters."""
@@ -37,17 +71,34 @@ def _redact_url(url: str, show_chars: int = 8) -> str:
     return f"...{url[-show_chars:]}"
 
 
-def build_manager(config: Config) -> NotificationManager:
-    """Create a NotificationManager with providers enabled in config."""
-    manager = NotificationManager()
+def build_manager(
+    config: Config,
+    http: Optional[HTTPClient] = None,
+    metrics: Optional[Metrics] = None,
+) -> NotificationManager:
+    """Create a NotificationManager with providers enabled in config.
+
+    ``http`` is the shared pooled client for the webhook-based providers.
+    """
+    manager = NotificationManager(
+        deadline=config.notify_deadline,
+        rate_per_minute=config.notify_rate_limit,
+        burst=config.notify_rate_burst,
+        metrics=metrics,
+    )
+    timeout = config.timeout_for("notifiers")
 
     if config.discord.enabled:
         if config.discord.webhook_url:
+            from .discord import DiscordNotifier
+
             manager.add_provider(
                 DiscordNotifier(
                     config.discord.webhook_url,
                     config.bot_name,
                     config.discord.avatar_url,
+                    timeout=timeout,
+                    http=http,
                 )
             )
             logger.info(
@@ -61,11 +112,15 @@ def build_manager(config: Config) -> NotificationManager:
 
     if config.telegram.enabled:
         if config.telegram.bot_token and config.telegram.chat_id:
+            from .telegram import TelegramNotifier
+
             manager.add_provider(
                 TelegramNotifier(
                     config.telegram.bot_token,
                     config.telegram.chat_id,
                     config.telegram.parse_mode,
+                    timeout=timeout,
+                    http=http,
                 )
             )
             logger.info("Telegram notifier enabled")
@@ -84,6 +139,8 @@ def build_manager(config: Config) -> NotificationManager:
             and email.from_addr
             and email.to_addrs
         ):
+            from .email import EmailNotifier
+
             manager.add_provider(
                 EmailNotifier(
                     email.smtp_host,
@@ -95,6 +152,7 @@ def build_manager(config: Config) -> NotificationManager:
                     email.use_tls,
                     email.use_ssl,
                     email.subject_prefix,
+                    email.idle_timeout,
                 )
             )
             logger.info(
@@ -109,6 +167,8 @@ def build_manager(config: Config) -> NotificationManager:
 
     if config.apprise.enabled:
         if config.apprise.urls:
+            from .apprise import AppriseNotifier
+
             try:
                 manager.add_provider(
                     AppriseNotifier(config.apprise.urls, config.bot_name)
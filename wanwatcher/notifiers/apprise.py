@@ -10,9 +10,10 @@ full - only the scheme/service prefix before "://".
 """
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
 from wanwatcher.notifiers.base import NotificationProvider
+from wanwatcher.notifiers.event import ChangeEvent
 
 logger = logging.getLogger(__name__)
 
@@ -57,33 +58,18 @@ class AppriseNotifier(NotificationProvider):
         }
         return mapping.get(severity, notify_type.INFO)
 
-    def send_notification(
-        self,
-        current_ips: Dict[str, Optional[str]],
-        previous_ips: Dict[str, Optional[str]],
-        geo_data: Optional[Dict[str, Any]],
-        is_first_run: bool,
-        server_name: str,
-        version: str = "",
-    ) -> bool:
+    def send_change(self, event: ChangeEvent) -> bool:
         """Send an IP change notification through all configured services."""
+        current_ips, geo_data = event.current_ips, event.geo
         try:
-            if is_first_run:
+            if event.is_first_run:
                 title = "WANwatcher started monitoring"
-                body_lines = [f"Monitoring started for {server_name}", ""]
+                body_lines = [f"Monitoring started for {event.server_name}", ""]
             else:
                 title = "IP address changed"
                 body_lines = ["Changes detected:"]
-                if current_ips.get("ipv4") != previous_ips.get("ipv4"):
-                    body_lines.append(
-                        f"  IPv4: {previous_ips.get('ipv4', 'None')} → "
-                        f"{current_ips.get('ipv4', 'None')}"
-                    )
-                if current_ips.get("ipv6") != previous_ips.get("ipv6"):
-                    body_lines.append(
-                        f"  IPv6: {previous_ips.get('ipv6', 'None')} → "
-                        f"{current_ips.get('ipv6', 'None')}"
-                    )
+                for change in event.changes:
+                    body_lines.append(f"  {change.label}: {change.old} → {change.new}")
                 body_lines.append("")
 
             if current_ips.get("ipv4"):
@@ -93,22 +79,8 @@ class AppriseNotifier(NotificationProvider):
 
             if geo_data:
                 body_lines.append("")
-                if (
-                    geo_data.get("city")
-                    or geo_data.get("region")
-                    or geo_data.get("country")
-                ):
-                    location = ", ".join(
-                        filter(
-                            None,
-                            [
-                                geo_data.get("city"),
-                                geo_data.get("region"),
-                                geo_data.get("country"),
-                            ],
-                        )
-                    )
-                    body_lines.append(f"Location: {location}")
+                if event.location:
+                    body_lines.append(f"Location: {event.location}")
                 if geo_data.get("org"):
                     body_lines.append(f"ISP: {geo_data['org']}")
                 if geo_data.get("timezone"):
@@ -117,8 +89,8 @@ class AppriseNotifier(NotificationProvider):
             body_lines.extend(
                 [
                     "",
-                    f"Server: {server_name}",
-                    f"WANwatcher v{version}",
+                    f"Server: {event.server_name}",
+                    f"WANwatcher v{event.version}",
                 ]
             )
 
@@ -1,18 +1,101 @@
-"""Base class and retry helper shared by all notification providers."""
+"""Base class, delivery result and retry helper shared by all providers."""
 
+import email.utils
 import logging
 import random
 import time
+from dataclasses import dataclass
 from typing import Any, Callable, Dict, Optional
 
+from wanwatcher.notifiers.event import ChangeEvent
+from wanwatcher.notifiers.ratelimit import RateLimitState
+
 logger = logging.getLogger(__name__)
 
+# A server asking us to wait longer than this is not retried in-process; the
+# send fails and the next notification (or the outbox) tries again later.
+MAX_RETRY_AFTER = 120.0
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def parse_retry_after(response: Any) -> Optional[float]:
+    """Seconds the server asked us to wait, or None.
+
+    Understands the ``Retry-After`` header (delta seconds or an HTTP date),
+    Discord's JSON ``retry_after`` and Telegram's ``parameters.retry_after``.
+    """
+    getter = getattr(getattr(response, "headers", None), "get", None)
+    header = getter("Retry-After") if callable(getter) else None
+    if isinstance(header, str):
+        seconds = _number(header.strip())
+        if seconds is not None:
+            return seconds
+        try:
+            when = email.utils.parsedate_to_datetime(header)
+        except (TypeError, ValueError):
+            when = None
+        if when is not None:
+            return max(0.0, when.timestamp() - time.time())
+    try:
+        body = response.json()
+    except Exception:  # noqa: BLE001 - any non-JSON body means "no hint"
+        return None
+    if not isinstance(body, dict):
+        return None
+    seconds = _number(body.get("retry_after"))
+    if seconds is None and isinstance(body.get("parameters"), dict):
+        seconds = _number(body["parameters"].get("retry_after"))
+    return seconds
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    """Outcome of one HTTP delivery attempt.
+
+    ``status`` is None when the request never got a response.
+    ``retry_after`` carries the server's back-off hint, if it sent one.
+    """
+
+    ok: bool
+    status: Optional[int] = None
+    retry_after: Optional[float] = None
+    text: str = ""
+
+    @classmethod
+    def from_response(cls, response: Any, ok_status: int) -> "DeliveryResult":
+        status = response.status_code
+        ok = status == ok_status
+        retry_after = None
+        if not ok and (status == 429 or 500 <= status < 600):
+            retry_after = parse_retry_after(response)
+        text = getattr(response, "text", "")
+        return cls(
+            ok=ok,
+            status=status,
+            retry_after=retry_after,
+            text=text if isinstance(text, str) else "",
+        )
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status == 429
+
 
 def retry_with_backoff(
     func: Callable[[], bool],
     max_retries: int = 3,
     base_delay: float = 1.0,
     jitter: float = 0.0,
+    retry_after: Optional[Callable[[], Optional[float]]] = None,
 ) -> bool:
     """Retry a callable with exponential backoff and optional jitter.
 
@@ -20,9 +103,19 @@ def retry_with_backoff(
     Returns True as soon as one attempt succeeds. When ``jitter`` is greater
     than zero, a random amount in ``[0, jitter)`` seconds is added to each
     delay so concurrent retries do not all fire on the same instant.
+
+    ``retry_after``, when given, is asked after every failed attempt for the
+    delay the server requested; a hint replaces the exponential delay, and a
+    hint above ``MAX_RETRY_AFTER`` ends the retries early.
     """
 
-    def delay_for(attempt: int) -> float:
+    def delay_for(attempt: int) -> Optional[float]:
+        hint = retry_after() if retry_after is not None else None
+        if hint is not None:
+            if hint > MAX_RETRY_AFTER:
+                logger.warning("Server asked to wait %.0fs; not retrying now", hint)
+                return None
+            return hint
         delay = base_delay * (2**attempt)
         if jitter:
             delay += random.uniform(0, jitter)
@@ -34,6 +127,8 @@ def retry_with_backoff(
                 return True
             if attempt < max_retries - 1:
                 delay = delay_for(attempt)
+                if delay is None:
+                    return False
                 logger.warning(
                     "Attempt %d failed, retrying in %.1fs...", attempt + 1, delay
                 )
@@ -43,6 +138,8 @@ def retry_with_backoff(
         ) as exc:  # noqa: BLE001 - provider errors must not crash the loop
             if attempt < max_retries - 1:
                 delay = delay_for(attempt)
+                if delay is None:
+                    return False
                 logger.warning(
                     "Attempt %d failed with error: %s, retrying in %.1fs...",
                     attempt + 1,
@@ -63,10 +160,34 @@ class NotificationProvider:
     send_update_notification(). v2 adds send_event() for generic messages
     (startup, heartbeat, outage, recovery); the base implementation logs and
     reports success so providers without a natural representation still work.
+    IP changes arrive through send_change() as a prebuilt ChangeEvent;
+    providers implement one of send_change() and send_notification() and the
+    base class adapts the other.
     """
 
     name = "base"
 
+    @property
+    def rate_limit(self) -> RateLimitState:
+        """Back-off state from this provider's 429 answers, shared by all
+        sends. Created on first use so subclasses need not call super()."""
+        state = self.__dict__.get("_rate_limit")
+        if state is None:
+            state = self.__dict__.setdefault("_rate_limit", RateLimitState())
+        return state
+
+    def _note_result(self, result: DeliveryResult) -> DeliveryResult:
+        """Remember a server back-off hint; returns ``result`` unchanged."""
+        if result.retry_after is not None:
+            if result.rate_limited:
+                logger.warning(
+                    "%s is rate limited by the server; waiting %.1fs",
+                    self.name,
+                    result.retry_after,
+                )
+            self.rate_limit.block(result.retry_after)
+        return result
+
     def send_notification(
         self,
         current_ips: Dict[str, Optional[str]],
@@ -76,13 +197,27 @@ class NotificationProvider:
         server_name: str,
         version: str = "",
     ) -> bool:
-        raise NotImplementedError
+        """Build the event and send it; kept for callers of the v1 API."""
+        return self.send_change(
+            ChangeEvent.build(
+                current_ips, previous_ips, geo_data, is_first_run, server_name, version
+            )
+        )
+
+    def send_change(self, event: ChangeEvent) -> bool:
+        """Send an IP change notification built once for all providers."""
+        if type(self).send_notification is NotificationProvider.send_notification:
+            raise NotImplementedError
+        return self.send_notification(*event.notification_args())
 
     def send_update_notification(
         self, update_info: Dict[str, str], server_name: str, version: str = ""
     ) -> bool:
         raise NotImplementedError
 
+    def close(self) -> None:
+        """Release long-lived resources such as connections; optional."""
+
     def send_event(
         self,
         title: str,
@@ -4,10 +4,10 @@ import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import requests
-
+from wanwatcher.httpclient import HTTPClient, default_client
 from wanwatcher.notifiers._escape import discord_escape as _esc
-from wanwatcher.notifiers.base import NotificationProvider
+from wanwatcher.notifiers.base import DeliveryResult, NotificationProvider
+from wanwatcher.notifiers.event import ChangeEvent
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +25,16 @@ class DiscordNotifier(NotificationProvider):
     name = "discord"
 
     def __init__(
-        self, webhook_url: str, bot_name: str = "WANwatcher", avatar_url: str = ""
+        self,
+        webhook_url: str,
+        bot_name: str = "WANwatcher",
+        avatar_url: str = "",
+        timeout: int = 10,
+        http: Optional[HTTPClient] = None,
     ):
         self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.http = http or default_client()
         self.bot_name = bot_name
         self.avatar_url = avatar_url
         self.default_avatar_path = "/app/avatar.png"
@@ -44,42 +51,29 @@ class DiscordNotifier(NotificationProvider):
         # Server Settings > Integrations > Webhooks > Edit
         return ""
 
-    def _post(self, payload: Dict[str, Any]) -> requests.Response:
-        """Post a payload to the webhook."""
-        return requests.post(self.webhook_url, json=payload, timeout=10)
+    def _post(self, payload: Dict[str, Any]) -> DeliveryResult:
+        """Post a payload to the webhook; Discord answers 204 on success."""
+        response = self.http.post(self.webhook_url, json=payload, timeout=self.timeout)
+        return self._note_result(DeliveryResult.from_response(response, 204))
 
-    def send_notification(
-        self,
-        current_ips: Dict[str, Optional[str]],
-        previous_ips: Dict[str, Optional[str]],
-        geo_data: Optional[Dict[str, Any]],
-        is_first_run: bool,
-        server_name: str,
-        version: str = "",
-    ) -> bool:
+    def send_change(self, event: ChangeEvent) -> bool:
         """Send Discord webhook notification."""
+        current_ips, geo_data = event.current_ips, event.geo
         try:
             # Determine notification type
-            if is_first_run:
+            if event.is_first_run:
                 title = "✅ Initial IP Detection"
                 color = 0x00FF00  # Green
-                change_info = f"Monitoring started for **{_esc(server_name)}**"
+                change_info = f"Monitoring started for **{_esc(event.server_name)}**"
             else:
                 title = "🔄 IP Address Changed"
                 color = 0xFF9900  # Orange
 
                 # Build change details
-                changes = []
-                if current_ips.get("ipv4") != previous_ips.get("ipv4"):
-                    changes.append(
-                        f"**IPv4:** `{previous_ips.get('ipv4', 'None')}` → "
-                        f"`{current_ips.get('ipv4', 'None')}`"
-                    )
-                if current_ips.get("ipv6") != previous_ips.get("ipv6"):
-                    changes.append(
-                        f"**IPv6:** `{previous_ips.get('ipv6', 'None')}` → "
-                        f"`{current_ips.get('ipv6', 'None')}`"
-                    )
+                changes = [
+                    f"**{change.label}:** `{change.old}` → `{change.new}`"
+                    for change in event.changes
+                ]
 
                 change_info = (
                     "\n".join(changes) if changes else "IP information updated"
@@ -110,22 +104,8 @@ class DiscordNotifier(NotificationProvider):
             # Geographic information
             if geo_data:
                 geo_text = []
-                if (
-                    geo_data.get("city")
-                    or geo_data.get("region")
-                    or geo_data.get("country")
-                ):
-                    location = ", ".join(
-                        filter(
-                            None,
-                            [
-                                geo_data.get("city"),
-                                geo_data.get("region"),
-                                geo_data.get("country"),
-                            ],
-                        )
-                    )
-                    geo_text.append(f"🌍 {_esc(location)}")
+                if event.location:
+                    geo_text.append(f"🌍 {_esc(event.location)}")
 
                 if geo_data.get("org"):
                     geo_text.append(f"🏢 {_esc(geo_data['org'])}")
@@ -146,7 +126,7 @@ class DiscordNotifier(NotificationProvider):
             fields.append(
                 {
                     "name": "⏰ Detected At",
-                    "value": datetime.now().strftime("%A, %B %d, %Y at %H:%M:%S"),
+                    "value": event.detected_text,
                     "inline": False,
                 }
             )
@@ -156,7 +136,7 @@ class DiscordNotifier(NotificationProvider):
             )
 
             fields.append(
-                {"name": "📦 Version", "value": f"v{version}", "inline": True}
+                {"name": "📦 Version", "value": f"v{event.version}", "inline": True}
             )
 
             # Build payload
@@ -168,8 +148,10 @@ class DiscordNotifier(NotificationProvider):
                         "description": f"**{title}**\n\n{change_info}",
                         "color": color,
                         "fields": fields,
-                        "footer": {"text": f"WANwatcher v{version} on {server_name}"},
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "footer": {
+                            "text": f"WANwatcher v{event.version} on {event.server_name}"
+                        },
+                        "timestamp": event.timestamp,
                     }
                 ],
             }
@@ -181,19 +163,19 @@ class DiscordNotifier(NotificationProvider):
                 payload["avatar_url"] = avatar_url
 
             # Send webhook
-            response = self._post(payload)
+            result = self._post(payload)
 
-            if response.status_code == 204:
+            if result.ok:
                 logger.info(
                     "Discord notification sent successfully (Status: %d)",
-                    response.status_code,
+                    result.status,
                 )
                 return True
 
             logger.error(
                 "Discord notification failed (Status: %d): %s",
-                response.status_code,
-                response.text,
+                result.status,
+                result.text,
             )
             return False
 
@@ -291,15 +273,15 @@ class DiscordNotifier(NotificationProvider):
             if avatar_url:
                 payload["avatar_url"] = avatar_url
 
-            response = self._post(payload)
+            result = self._post(payload)
 
-            if response.status_code == 204:
+            if result.ok:
                 logger.info("Discord update notification sent successfully")
                 return True
 
             logger.error(
                 "Discord update notification failed (Status: %d)",
-                response.status_code,
+                result.status,
             )
             return False
 
@@ -335,15 +317,15 @@ class DiscordNotifier(NotificationProvider):
             if avatar_url:
                 payload["avatar_url"] = avatar_url
 
-            response = self._post(payload)
+            result = self._post(payload)
 
-            if response.status_code == 204:
+            if result.ok:
                 logger.info("Discord event notification sent successfully")
                 return True
 
             logger.error(
                 "Discord event notification failed (Status: %d)",
-                response.status_code,
+                result.status,
             )
             return False
 
@@ -1,17 +1,387 @@
-"""Email SMTP notification provider."""
+"""Email SMTP notification provider.
+
+Messages go out over a persistent :class:`SMTPSession`: the EHLO, STARTTLS
+and LOGIN round trips are paid once and the connection is reused for every
+message sent within ``idle_timeout`` seconds of the previous one. A reused
+connection is probed with NOOP first and transparently re-established if the
+server dropped it.
+"""
 
 import logging
 import smtplib
+import socket
+import threading
+import time
 from datetime import datetime
+from email.message import Message
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Any, Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from wanwatcher.notifiers._escape import html_escape as _esc
 from wanwatcher.notifiers.base import NotificationProvider
+from wanwatcher.notifiers.event import ChangeEvent
+from wanwatcher.notifiers.templates import Safe, Template, plain, render_cache
 
 logger = logging.getLogger(__name__)
 
+SMTP_TIMEOUT = 30
+
+# Errors meaning the connection itself went away. Every SMTPException is an
+# OSError too, but a refused recipient, a failed login or a rejected DATA
+# must not be resent: the server may already have accepted the message.
+_CONNECTION_LOST = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+
+class SMTPSession:
+    """One authenticated SMTP connection, reused while it stays fresh.
+
+    ``idle_timeout`` is how long an unused connection may be kept; 0 closes
+    it after every batch, as a connection per message did before.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        use_tls: bool = True,
+        use_ssl: bool = False,
+        idle_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.connects = 0
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        server: smtplib.SMTP
+        if self.use_ssl:
+            # SSL connection (port 465)
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=SMTP_TIMEOUT)
+        else:
+            # TLS connection (port 587) or plain (port 25)
+            server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            if not self.use_ssl:
+                server.ehlo()
+                if self.use_tls:
+                    server.starttls()
+                    server.ehlo()
+            server.login(self.user, self.password)
+        except BaseException:
+            self._quit(server)
+            raise
+        self.connects += 1
+        return server
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:  # noqa: BLE001 - the connection is going away anyway
+            try:
+                server.close()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def _alive(self, server: smtplib.SMTP) -> bool:
+        if self.clock() - self._last_used > self.idle_timeout:
+            return False
+        try:
+            return server.noop()[0] == 250
+        except Exception:  # noqa: BLE001 - any failure means "reconnect"
+            return False
+
+    def _session(self) -> smtplib.SMTP:
+        server = self._server
+        if server is not None and self._alive(server):
+            return server
+        if server is not None:
+            logger.debug("SMTP session to %s is stale; reconnecting", self.host)
+            self._quit(server)
+        self._server = None
+        self._server = self._connect()
+        return self._server
+
+    def send(self, messages: Sequence[Message]) -> None:
+        """Send ``messages`` in order over one session.
+
+        A reused connection that is lost mid-send is re-established once and
+        the failed message retried; other errors propagate to the caller.
+        """
+        with self._lock:
+            try:
+                connects = self.connects
+                server = self._session()
+                reused = self.connects == connects
+                for msg in messages:
+                    try:
+                        server.send_message(msg)
+                    except _CONNECTION_LOST:
+                        if not reused:
+                            raise
+                        self._quit(server)
+                        self._server = None
+                        server = self._session()
+                        server.send_message(msg)
+                    # Only a connection that already carried mail is retried.
+                    reused = True
+                    self._last_used = self.clock()
+            except BaseException:
+                self._drop()
+                raise
+            if self.idle_timeout <= 0:
+                self._drop()
+
+    def _drop(self) -> None:
+        if self._server is not None:
+            self._quit(self._server)
+            self._server = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+
+# -- templates ---------------------------------------------------------------
+# Compiled once at import; fields are HTML-escaped unless passed as Safe.
+
+_CHANGE_HTML = Template("<strong>${family}:</strong> ${old} → ${new}")
+_CHANGE_TEXT = Template("${family}: ${old} → ${new}", escape=plain)
+
+# All inline styles: Gmail strips <style> tags.
+_HTML_HEAD = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; color: #e0e0e0; margin: 0; padding: 10px; background-color: #2c2c2c;">
+    <div style="max-width: 600px; margin: 10px auto; background-color: #1e1e1e; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.3);">
+        <img src="https://raw.githubusercontent.com/noxied/wanwatcher/main/wanwatcher-banner.png" alt="WANwatcher" style="width: 100%; height: auto; display: block;">
+
+        <div style="background: linear-gradient(135deg, ${header_color} 0%, #0099CC 100%); color: white; padding: 20px 15px; text-align: center;">
+            <h1 style="margin: 0 0 8px 0; font-size: 24px; font-weight: 700; color: white;">🌐 WAN IP Monitor Alert</h1>
+            <h2 style="margin: 8px 0 0 0; font-size: 20px; font-weight: 600; color: white;">${title}</h2>
+            <p style="margin: 10px 0 0 0; font-size: 15px; opacity: 0.95; color: white;">${subtitle}</p>
+        </div>
+
+        <div style="padding: 20px 15px; background-color: #1e1e1e;">
+""")
+_SECTION = Template(
+    '<div style="font-size: 17px; font-weight: 700; color: ${color}; margin: 20px 0 12px 0; padding-bottom: 6px; border-bottom: 2px solid ${color};">${label}</div>'
+)
+_TABLE_OPEN = '<table style="width: 100%; border-collapse: collapse; margin: 15px 0; background-color: #252525; border-radius: 6px;">'
+_ROW = Template("""
+            <tr>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">${label}</td>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">${value}</td>
+            </tr>
+""")
+# The last row of a table has no bottom border.
+_LAST_ROW = Template("""
+            <tr>
+                <td style="padding: 12px 15px; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">${label}</td>
+                <td style="padding: 12px 15px; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">${value}</td>
+            </tr>
+""")
+_DETAILS = Template("""
+        <table style="width: 100%; border-collapse: collapse; margin: 15px 0; background-color: #252525; border-radius: 6px;">
+            <tr>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Server Name:</td>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">${server_name}</td>
+            </tr>
+            <tr>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Detected At:</td>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">${detected_at}</td>
+            </tr>
+            <tr>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Environment:</td>
+                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">🐳 Running in Docker</td>
+            </tr>
+            <tr>
+                <td style="padding: 12px 15px; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Version:</td>
+                <td style="padding: 12px 15px; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">📦 v${version}</td>
+            </tr>
+        </table>
+
+        </div>
+
+        <div style="background: linear-gradient(135deg, #1a5f7a 0%, #16213e 100%); padding: 20px 15px; text-align: center; font-size: 13px; color: #e0e0e0;">
+            <p style="margin: 0 0 10px 0;">
+                <span style="display: inline-block; padding: 5px 10px; background-color: rgba(255,255,255,0.15); border-radius: 5px; font-size: 12px; color: white; margin: 0 4px;">🐳 WANwatcher v${version}</span>
+                <span style="display: inline-block; padding: 5px 10px; background-color: rgba(255,255,255,0.15); border-radius: 5px; font-size: 12px; color: white; margin: 0 4px;">📍 ${server_name}</span>
+            </p>
+            <p style="margin: 0; font-size: 14px; color: #e0e0e0;">
+                🌐 Automated WAN IP Monitoring System
+            </p>
+            <p style="margin: 8px 0 0 0; font-size: 11px; opacity: 0.8; color: #e0e0e0;">
+                Multi-Platform Notifications: Discord • Telegram • Email
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+_RULE = "=" * 60
+_TEXT_DETAILS = Template(
+    "\n".join(
+        [
+            "DETECTION DETAILS:",
+            "-" * 60,
+            "Server: ${server_name}",
+            "Detected: ${detected_at}",
+            "Environment: Docker",
+            "Version: v${version}",
+            "",
+            _RULE,
+            "WANwatcher v${version} on ${server_name}",
+            _RULE,
+        ]
+    ),
+    escape=plain,
+)
+
+_UPDATE_TEXT = Template(
+    """
+WANwatcher Update Available!
+
+Current Version: v${current_version}
+Latest Version: v${latest_version}
+
+What's New:
+${changelog}
+
+View Full Changelog:
+${release_url}
+
+How to Update:
+docker pull noxied/wanwatcher:latest
+docker restart wanwatcher
+
+---
+Update check for ${server_name}
+WANwatcher Update Notification
+""",
+    escape=plain,
+)
+_UPDATE_HTML = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; color: #e0e0e0; margin: 0; padding: 10px; background-color: #2c2c2c; }
+        .container { max-width: 600px; margin: 10px auto; background-color: #1e1e1e; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.3); }
+        .banner { width: 100%; height: auto; display: block; }
+        .header { background: linear-gradient(135deg, #00D9FF 0%, #0099CC 100%); color: white; padding: 20px 15px; text-align: center; }
+        .header h1 { margin: 0 0 8px 0; font-size: 24px; font-weight: 700; color: white; }
+        .header p { margin: 10px 0 0 0; font-size: 15px; opacity: 0.95; color: white; }
+        .content { padding: 20px 15px; background-color: #1e1e1e; }
+        .section-title { font-size: 17px; font-weight: 700; color: #00D9FF; margin: 20px 0 12px 0; padding-bottom: 6px; border-bottom: 2px solid #00D9FF; }
+        .version-box { background-color: #252525; border-left: 4px solid #00D9FF; padding: 15px; margin: 15px 0; border-radius: 6px; }
+        .version-box strong { color: #4CAF50; font-size: 15px; }
+        .version-text { color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; }
+        .changelog { background-color: #252525; padding: 15px; border-radius: 6px; margin: 15px 0; border: 1px solid #333; }
+        .changelog h3 { margin-top: 0; color: #00D9FF; font-size: 16px; }
+        .changelog-content { color: #e0e0e0; font-family: Arial, sans-serif; white-space: pre-wrap; font-size: 14px; line-height: 1.8; }
+        .button { display: inline-block; background: linear-gradient(135deg, #00D9FF 0%, #0099CC 100%); color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; margin: 15px 0; font-weight: 600; box-shadow: 0 2px 8px rgba(0,217,255,0.3); }
+        .code-section { margin: 15px 0; }
+        .code-section h3 { color: #e0e0e0; font-size: 16px; margin-bottom: 10px; }
+        .code { background-color: #2d2d2d; color: #00ff00; padding: 15px; border-radius: 6px; font-family: 'Courier New', monospace; margin: 10px 0; font-size: 13px; border: 1px solid #404040; }
+        .footer { background: linear-gradient(135deg, #1a5f7a 0%, #16213e 100%); padding: 20px 15px; text-align: center; font-size: 13px; color: #e0e0e0; }
+        .badge { display: inline-block; padding: 5px 10px; background-color: rgba(255,255,255,0.15); border-radius: 5px; font-size: 12px; color: white; margin: 0 4px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <img src="https://raw.githubusercontent.com/noxied/wanwatcher/main/wanwatcher-banner.png" alt="WANwatcher" class="banner">
+        <div class="header">
+            <h1>🆕 WANwatcher Update Available!</h1>
+            <p>A new version is ready to install</p>
+        </div>
+        <div class="content">
+            <div class="section-title">📦 Version Information</div>
+            <div class="version-box">
+                <strong>Current Version:</strong> <span class="version-text">v${current_version}</span><br><br>
+                <strong>Latest Version:</strong> <span class="version-text">v${latest_version}</span>
+            </div>
+
+            <div class="section-title">📋 What's New</div>
+            <div class="changelog">
+                <div class="changelog-content">${changelog}</div>
+            </div>
+
+            <center>
+                <a href="${release_url}" class="button">🔗 View Full Changelog</a>
+            </center>
+
+            <div class="section-title">💡 How to Update</div>
+            <div class="code">
+docker pull noxied/wanwatcher:latest<br>
+docker restart wanwatcher
+            </div>
+        </div>
+        <div class="footer">
+            <p style="margin: 0 0 10px 0;">
+                <span class="badge">🐳 WANwatcher v${version}</span>
+                <span class="badge">📍 ${server_name}</span>
+            </p>
+            <p style="margin: 0; font-size: 14px; color: #e0e0e0;">
+                🌐 Automated WAN IP Monitoring System
+            </p>
+            <p style="margin: 8px 0 0 0; font-size: 11px; opacity: 0.8; color: #e0e0e0;">
+                Multi-Platform Notifications: Discord • Telegram • Email
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+_EVENT_HTML = Template("""
+<!DOCTYPE html>
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6;">
+    <h2 style="margin: 0 0 12px 0;">${title}</h2>
+    <p style="margin: 0 0 16px 0; white-space: pre-wrap;">${message}</p>
+    <p style="margin: 0; color: #666;"><i>${server_name}</i></p>
+</body>
+</html>
+""")
+
+
+def _changelog_preview(release_body: str) -> str:
+    """Up to five bullet points from the top of the release notes."""
+    changelog_lines = []
+    for line in release_body.split("\n")[:8]:
+        line = line.strip()
+        if line and (
+            line.startswith("- ") or line.startswith("* ") or line.startswith("• ")
+        ):
+            cleaned = line.lstrip("-*• ").strip()
+            if cleaned and not cleaned.startswith("#"):
+                changelog_lines.append(f"  • {cleaned}")
+    return (
+        "\n".join(changelog_lines[:5])
+        if changelog_lines
+        else "See release notes for details"
+    )
+
 
 class EmailNotifier(NotificationProvider):
     """Email SMTP notification provider."""
@@ -29,6 +399,7 @@ class EmailNotifier(NotificationProvider):
         use_tls: bool = True,
         use_ssl: bool = False,
         subject_prefix: str = "[WANwatcher]",
+        idle_timeout: float = 60.0,
     ):
         self.smtp_host = smtp_host
         self.smtp_port = int(smtp_port)
@@ -43,23 +414,22 @@ class EmailNotifier(NotificationProvider):
         self.use_tls = use_tls
         self.use_ssl = use_ssl
         self.subject_prefix = subject_prefix
+        self.session = SMTPSession(
+            self.smtp_host,
+            self.smtp_port,
+            smtp_user,
+            smtp_password,
+            use_tls=use_tls,
+            use_ssl=use_ssl,
+            idle_timeout=idle_timeout,
+        )
 
     def _send_message(self, msg: MIMEMultipart) -> None:
         """Deliver a prepared message over SMTP (SSL, STARTTLS, or plain)."""
-        if self.use_ssl:
-            # SSL connection (port 465)
-            with smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, timeout=30) as server:
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
-        else:
-            # TLS connection (port 587) or plain (port 25)
-            with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30) as server:
-                server.ehlo()
-                if self.use_tls:
-                    server.starttls()
-                    server.ehlo()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+        self.session.send([msg])
+
+    def close(self) -> None:
+        self.session.close()
 
     def _build_message(self, subject: str, text: str, html: str) -> MIMEMultipart:
         """Build a multipart/alternative message with text and HTML parts."""
@@ -72,202 +442,102 @@ class EmailNotifier(NotificationProvider):
         msg.attach(MIMEText(html, "html", "utf-8"))
         return msg
 
-    def _build_html_email(
-        self,
-        current_ips: Dict[str, Optional[str]],
-        previous_ips: Dict[str, Optional[str]],
-        geo_data: Optional[Dict[str, Any]],
-        is_first_run: bool,
-        server_name: str,
-        version: str = "",
-    ) -> str:
+    def _build_html_email(self, event: ChangeEvent) -> str:
         """Build HTML email content with Gmail-compatible inline styles."""
+        current_ips, geo_data = event.current_ips, event.geo
 
         # Determine colors and title
-        if is_first_run:
+        if event.is_first_run:
             header_color = "#4CAF50"  # Green
             title = "✅ Initial IP Detection"
-            subtitle = f"Monitoring started for {_esc(server_name)}"
+            subtitle = Safe(f"Monitoring started for {_esc(event.server_name)}")
         else:
             header_color = "#FF9800"  # Orange
             title = "🔄 IP Address Changed"
 
             # Build change details
-            changes = []
-            if current_ips.get("ipv4") != previous_ips.get("ipv4"):
-                changes.append(
-                    f"<strong>IPv4:</strong> {_esc(previous_ips.get('ipv4', 'None'))} → "
-                    f"{_esc(current_ips.get('ipv4', 'None'))}"
-                )
-            if current_ips.get("ipv6") != previous_ips.get("ipv6"):
-                changes.append(
-                    f"<strong>IPv6:</strong> {_esc(previous_ips.get('ipv6', 'None'))} → "
-                    f"{_esc(current_ips.get('ipv6', 'None'))}"
-                )
-
-            subtitle = "<br>".join(changes) if changes else "IP information updated"
-
-        # Build HTML with ALL INLINE STYLES (Gmail strips <style> tags)
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; color: #e0e0e0; margin: 0; padding: 10px; background-color: #2c2c2c;">
-    <div style="max-width: 600px; margin: 10px auto; background-color: #1e1e1e; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.3);">
-        <img src="https://raw.githubusercontent.com/noxied/wanwatcher/main/wanwatcher-banner.png" alt="WANwatcher" style="width: 100%; height: auto; display: block;">
-
-        <div style="background: linear-gradient(135deg, {header_color} 0%, #0099CC 100%); color: white; padding: 20px 15px; text-align: center;">
-            <h1 style="margin: 0 0 8px 0; font-size: 24px; font-weight: 700; color: white;">🌐 WAN IP Monitor Alert</h1>
-            <h2 style="margin: 8px 0 0 0; font-size: 20px; font-weight: 600; color: white;">{title}</h2>
-            <p style="margin: 10px 0 0 0; font-size: 15px; opacity: 0.95; color: white;">{subtitle}</p>
-        </div>
+            changes = [
+                _CHANGE_HTML.render(family=change.label, old=change.old, new=change.new)
+                for change in event.changes
+            ]
+            subtitle = Safe(
+                "<br>".join(changes) if changes else "IP information updated"
+            )
 
-        <div style="padding: 20px 15px; background-color: #1e1e1e;">
-"""
+        html = [
+            _HTML_HEAD.render(header_color=header_color, title=title, subtitle=subtitle)
+        ]
 
         # Current IPs section
-        html += f'<div style="font-size: 17px; font-weight: 700; color: {header_color}; margin: 20px 0 12px 0; padding-bottom: 6px; border-bottom: 2px solid {header_color};">📍 Current IP Addresses</div>'
-        html += '<table style="width: 100%; border-collapse: collapse; margin: 15px 0; background-color: #252525; border-radius: 6px;">'
-
+        html.append(
+            _SECTION.render(color=header_color, label="📍 Current IP Addresses")
+        )
+        html.append(_TABLE_OPEN)
         if current_ips.get("ipv4"):
-            html += f"""
-            <tr>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">IPv4 Address:</td>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">{_esc(current_ips['ipv4'])}</td>
-            </tr>
-"""
-
+            html.append(_ROW.render(label="IPv4 Address:", value=current_ips["ipv4"]))
         if current_ips.get("ipv6"):
-            html += f"""
-            <tr>
-                <td style="padding: 12px 15px; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">IPv6 Address:</td>
-                <td style="padding: 12px 15px; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">{_esc(current_ips['ipv6'])}</td>
-            </tr>
-"""
-
-        html += "</table>"
+            html.append(
+                _LAST_ROW.render(label="IPv6 Address:", value=current_ips["ipv6"])
+            )
+        html.append("</table>")
 
         # Geographic information
         if geo_data:
-            html += f'<div style="font-size: 17px; font-weight: 700; color: {header_color}; margin: 20px 0 12px 0; padding-bottom: 6px; border-bottom: 2px solid {header_color};">📍 Location Information</div>'
-            html += '<table style="width: 100%; border-collapse: collapse; margin: 15px 0; background-color: #252525; border-radius: 6px;">'
-
-            if (
-                geo_data.get("city")
-                or geo_data.get("region")
-                or geo_data.get("country")
-            ):
-                location = ", ".join(
-                    filter(
-                        None,
-                        [
-                            geo_data.get("city"),
-                            geo_data.get("region"),
-                            geo_data.get("country"),
-                        ],
-                    )
+            html.append(
+                _SECTION.render(color=header_color, label="📍 Location Information")
+            )
+            html.append(_TABLE_OPEN)
+            if event.location:
+                html.append(
+                    _ROW.render(label="Location:", value=f"🌍 {event.location}")
                 )
-                html += f"""
-            <tr>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Location:</td>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">🌍 {_esc(location)}</td>
-            </tr>
-"""
-
             if geo_data.get("org"):
-                html += f"""
-            <tr>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">ISP / Organization:</td>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">🏢 {_esc(geo_data['org'])}</td>
-            </tr>
-"""
-
+                html.append(
+                    _ROW.render(
+                        label="ISP / Organization:", value=f"🏢 {geo_data['org']}"
+                    )
+                )
             if geo_data.get("timezone"):
-                html += f"""
-            <tr>
-                <td style="padding: 12px 15px; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Timezone:</td>
-                <td style="padding: 12px 15px; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">🕐 {_esc(geo_data['timezone'])}</td>
-            </tr>
-"""
-
-            html += "</table>"
+                html.append(
+                    _LAST_ROW.render(
+                        label="Timezone:", value=f"🕐 {geo_data['timezone']}"
+                    )
+                )
+            html.append("</table>")
 
         # Metadata
-        html += f'<div style="font-size: 17px; font-weight: 700; color: {header_color}; margin: 20px 0 12px 0; padding-bottom: 6px; border-bottom: 2px solid {header_color};">ℹ️ Detection Details</div>'
-        html += f"""
-        <table style="width: 100%; border-collapse: collapse; margin: 15px 0; background-color: #252525; border-radius: 6px;">
-            <tr>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Server Name:</td>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">{_esc(server_name)}</td>
-            </tr>
-            <tr>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Detected At:</td>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">{datetime.now().strftime('%A, %B %d, %Y at %H:%M:%S')}</td>
-            </tr>
-            <tr>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Environment:</td>
-                <td style="padding: 12px 15px; border-bottom: 1px solid #333; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">🐳 Running in Docker</td>
-            </tr>
-            <tr>
-                <td style="padding: 12px 15px; font-weight: 600; color: #4CAF50; width: 40%; background-color: #2a2a2a;">Version:</td>
-                <td style="padding: 12px 15px; color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; background-color: #252525;">📦 v{version}</td>
-            </tr>
-        </table>
-
-        </div>
-
-        <div style="background: linear-gradient(135deg, #1a5f7a 0%, #16213e 100%); padding: 20px 15px; text-align: center; font-size: 13px; color: #e0e0e0;">
-            <p style="margin: 0 0 10px 0;">
-                <span style="display: inline-block; padding: 5px 10px; background-color: rgba(255,255,255,0.15); border-radius: 5px; font-size: 12px; color: white; margin: 0 4px;">🐳 WANwatcher v{version}</span>
-                <span style="display: inline-block; padding: 5px 10px; background-color: rgba(255,255,255,0.15); border-radius: 5px; font-size: 12px; color: white; margin: 0 4px;">📍 {_esc(server_name)}</span>
-            </p>
-            <p style="margin: 0; font-size: 14px; color: #e0e0e0;">
-                🌐 Automated WAN IP Monitoring System
-            </p>
-            <p style="margin: 8px 0 0 0; font-size: 11px; opacity: 0.8; color: #e0e0e0;">
-                Multi-Platform Notifications: Discord • Telegram • Email
-            </p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-        return html
+        html.append(_SECTION.render(color=header_color, label="ℹ️ Detection Details"))
+        html.append(
+            _DETAILS.render(
+                server_name=event.server_name,
+                detected_at=event.detected_text,
+                version=event.version,
+            )
+        )
+        return "".join(html)
 
-    def _build_text_email(
-        self,
-        current_ips: Dict[str, Optional[str]],
-        previous_ips: Dict[str, Optional[str]],
-        geo_data: Optional[Dict[str, Any]],
-        is_first_run: bool,
-        server_name: str,
-        version: str = "",
-    ) -> str:
+    def _build_text_email(self, event: ChangeEvent) -> str:
         """Build plain text email content."""
+        current_ips, geo_data = event.current_ips, event.geo
 
-        lines = ["=" * 60, "WAN IP MONITOR ALERT", "=" * 60, ""]
+        lines = [_RULE, "WAN IP MONITOR ALERT", _RULE, ""]
 
-        if is_first_run:
+        if event.is_first_run:
             lines.extend(
-                ["✅ Initial IP Detection", f"Monitoring started for {server_name}", ""]
+                [
+                    "✅ Initial IP Detection",
+                    f"Monitoring started for {event.server_name}",
+                    "",
+                ]
             )
         else:
             lines.extend(["🔄 IP Address Changed", ""])
-
-            if current_ips.get("ipv4") != previous_ips.get("ipv4"):
+            for change in event.changes:
                 lines.append(
-                    f"IPv4: {previous_ips.get('ipv4', 'None')} → "
-                    f"{current_ips.get('ipv4', 'None')}"
-                )
-            if current_ips.get("ipv6") != previous_ips.get("ipv6"):
-                lines.append(
-                    f"IPv6: {previous_ips.get('ipv6', 'None')} → "
-                    f"{current_ips.get('ipv6', 'None')}"
+                    _CHANGE_TEXT.render(
+                        family=change.label, old=change.old, new=change.new
+                    )
                 )
-
             lines.append("")
 
         # Current IPs
@@ -283,22 +553,8 @@ class EmailNotifier(NotificationProvider):
         if geo_data:
             lines.append("LOCATION INFORMATION:")
             lines.append("-" * 60)
-            if (
-                geo_data.get("city")
-                or geo_data.get("region")
-                or geo_data.get("country")
-            ):
-                location = ", ".join(
-                    filter(
-                        None,
-                        [
-                            geo_data.get("city"),
-                            geo_data.get("region"),
-                            geo_data.get("country"),
-                        ],
-                    )
-                )
-                lines.append(f"Location: {location}")
+            if event.location:
+                lines.append(f"Location: {event.location}")
             if geo_data.get("org"):
                 lines.append(f"ISP: {geo_data['org']}")
             if geo_data.get("timezone"):
@@ -306,45 +562,30 @@ class EmailNotifier(NotificationProvider):
             lines.append("")
 
         # Metadata
-        lines.extend(
-            [
-                "DETECTION DETAILS:",
-                "-" * 60,
-                f"Server: {server_name}",
-                f"Detected: {datetime.now().strftime('%A, %B %d, %Y at %H:%M:%S')}",
-                "Environment: Docker",
-                f"Version: v{version}",
-                "",
-                "=" * 60,
-                f"WANwatcher v{version} on {server_name}",
-                "=" * 60,
-            ]
+        lines.append(
+            _TEXT_DETAILS.render(
+                server_name=event.server_name,
+                detected_at=event.detected_text,
+                version=event.version,
+            )
         )
 
         return "\n".join(lines)
 
-    def send_notification(
-        self,
-        current_ips: Dict[str, Optional[str]],
-        previous_ips: Dict[str, Optional[str]],
-        geo_data: Optional[Dict[str, Any]],
-        is_first_run: bool,
-        server_name: str,
-        version: str = "",
-    ) -> bool:
+    def send_change(self, event: ChangeEvent) -> bool:
         """Send email notification via SMTP."""
         try:
             # Build subject
-            if is_first_run:
-                subject = f"{self.subject_prefix} Initial IP Detection - {server_name}"
+            if event.is_first_run:
+                subject = f"{self.subject_prefix} Initial IP Detection"
             else:
-                subject = f"{self.subject_prefix} IP Address Changed - {server_name}"
+                subject = f"{self.subject_prefix} IP Address Changed"
+            subject += f" - {event.server_name}"
 
-            text_content = self._build_text_email(
-                current_ips, previous_ips, geo_data, is_first_run, server_name, version
-            )
-            html_content = self._build_html_email(
-                current_ips, previous_ips, geo_data, is_first_run, server_name, version
+            text_content, html_content = render_cache.get_or_render(
+                "email.change",
+                event.as_payload(),
+                lambda: (self._build_text_email(event), self._build_html_email(event)),
             )
 
             msg = self._build_message(subject, text_content, html_content)
@@ -369,123 +610,26 @@ class EmailNotifier(NotificationProvider):
                 f"v{update_info['latest_version']}"
             )
 
-            # Extract changelog highlights
-            changelog = update_info.get("release_body", "")
-            changelog_lines = []
-            for line in changelog.split("\n")[:8]:
-                line = line.strip()
-                if line and (
-                    line.startswith("- ")
-                    or line.startswith("* ")
-                    or line.startswith("• ")
-                ):
-                    cleaned = line.lstrip("-*• ").strip()
-                    if cleaned and not cleaned.startswith("#"):
-                        changelog_lines.append(f"  • {cleaned}")
-
-            changelog_preview = (
-                "\n".join(changelog_lines[:5])
-                if changelog_lines
-                else "See release notes for details"
-            )
-
-            # Plain text version
-            text_content = f"""
-WANwatcher Update Available!
-
-Current Version: v{update_info['current_version']}
-Latest Version: v{update_info['latest_version']}
-
-What's New:
-{changelog_preview}
-
-View Full Changelog:
-{update_info['release_url']}
-
-How to Update:
-docker pull noxied/wanwatcher:latest
-docker restart wanwatcher
-
----
-Update check for {server_name}
-WANwatcher Update Notification
-"""
-
-            # HTML version (Dark theme matching IP detection notification)
-            html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; color: #e0e0e0; margin: 0; padding: 10px; background-color: #2c2c2c; }}
-        .container {{ max-width: 600px; margin: 10px auto; background-color: #1e1e1e; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.3); }}
-        .banner {{ width: 100%; height: auto; display: block; }}
-        .header {{ background: linear-gradient(135deg, #00D9FF 0%, #0099CC 100%); color: white; padding: 20px 15px; text-align: center; }}
-        .header h1 {{ margin: 0 0 8px 0; font-size: 24px; font-weight: 700; color: white; }}
-        .header p {{ margin: 10px 0 0 0; font-size: 15px; opacity: 0.95; color: white; }}
-        .content {{ padding: 20px 15px; background-color: #1e1e1e; }}
-        .section-title {{ font-size: 17px; font-weight: 700; color: #00D9FF; margin: 20px 0 12px 0; padding-bottom: 6px; border-bottom: 2px solid #00D9FF; }}
-        .version-box {{ background-color: #252525; border-left: 4px solid #00D9FF; padding: 15px; margin: 15px 0; border-radius: 6px; }}
-        .version-box strong {{ color: #4CAF50; font-size: 15px; }}
-        .version-text {{ color: #e0e0e0; font-family: 'Courier New', monospace; font-weight: 500; }}
-        .changelog {{ background-color: #252525; padding: 15px; border-radius: 6px; margin: 15px 0; border: 1px solid #333; }}
-        .changelog h3 {{ margin-top: 0; color: #00D9FF; font-size: 16px; }}
-        .changelog-content {{ color: #e0e0e0; font-family: Arial, sans-serif; white-space: pre-wrap; font-size: 14px; line-height: 1.8; }}
-        .button {{ display: inline-block; background: linear-gradient(135deg, #00D9FF 0%, #0099CC 100%); color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; margin: 15px 0; font-weight: 600; box-shadow: 0 2px 8px rgba(0,217,255,0.3); }}
-        .code-section {{ margin: 15px 0; }}
-        .code-section h3 {{ color: #e0e0e0; font-size: 16px; margin-bottom: 10px; }}
-        .code {{ background-color: #2d2d2d; color: #00ff00; padding: 15px; border-radius: 6px; font-family: 'Courier New', monospace; margin: 10px 0; font-size: 13px; border: 1px solid #404040; }}
-        .footer {{ background: linear-gradient(135deg, #1a5f7a 0%, #16213e 100%); padding: 20px 15px; text-align: center; font-size: 13px; color: #e0e0e0; }}
-        .badge {{ display: inline-block; padding: 5px 10px; background-color: rgba(255,255,255,0.15); border-radius: 5px; font-size: 12px; color: white; margin: 0 4px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <img src="https://raw.githubusercontent.com/noxied/wanwatcher/main/wanwatcher-banner.png" alt="WANwatcher" class="banner">
-        <div class="header">
-            <h1>🆕 WANwatcher Update Available!</h1>
-            <p>A new version is ready to install</p>
-        </div>
-        <div class="content">
-            <div class="section-title">📦 Version Information</div>
-            <div class="version-box">
-                <strong>Current Version:</strong> <span class="version-text">v{update_info['current_version']}</span><br><br>
-                <strong>Latest Version:</strong> <span class="version-text">v{update_info['latest_version']}</span>
-            </div>
-
-            <div class="section-title">📋 What's New</div>
-            <div class="changelog">
-                <div class="changelog-content">{_esc(changelog_preview if changelog_preview.strip() else 'See release notes for details')}</div>
-            </div>
-
-            <center>
-                <a href="{_esc(update_info['release_url'])}" class="button">🔗 View Full Changelog</a>
-            </center>
+            def render() -> Tuple[str, str]:
+                changelog_preview = _changelog_preview(
+                    update_info.get("release_body", "")
+                )
+                fields = {
+                    "current_version": update_info["current_version"],
+                    "latest_version": update_info["latest_version"],
+                    "release_url": update_info["release_url"],
+                    "server_name": server_name,
+                    "version": version,
+                }
+                # HTML version: dark theme matching the IP detection notification
+                return (
+                    _UPDATE_TEXT.render(changelog=changelog_preview, **fields),
+                    _UPDATE_HTML.render(changelog=changelog_preview, **fields),
+                )
 
-            <div class="section-title">💡 How to Update</div>
-            <div class="code">
-docker pull noxied/wanwatcher:latest<br>
-docker restart wanwatcher
-            </div>
-        </div>
-        <div class="footer">
-            <p style="margin: 0 0 10px 0;">
-                <span class="badge">🐳 WANwatcher v{version}</span>
-                <span class="badge">📍 {_esc(server_name)}</span>
-            </p>
-            <p style="margin: 0; font-size: 14px; color: #e0e0e0;">
-                🌐 Automated WAN IP Monitoring System
-            </p>
-            <p style="margin: 8px 0 0 0; font-size: 11px; opacity: 0.8; color: #e0e0e0;">
-                Multi-Platform Notifications: Discord • Telegram • Email
-            </p>
-        </div>
-    </div>
-</body>
-</html>
-"""
+            text_content, html_content = render_cache.get_or_render(
+                "email.update", [update_info, server_name, version], render
+            )
 
             msg = self._build_message(subject, text_content, html_content)
             self._send_message(msg)
@@ -512,17 +656,9 @@ docker restart wanwatcher
             subject = f"{self.subject_prefix} {title}"
 
             text_content = "\n".join([title, "", message, "", f"-- {server_name}"])
-
-            html_content = f"""
-<!DOCTYPE html>
-<html>
-<body style="font-family: Arial, sans-serif; line-height: 1.6;">
-    <h2 style="margin: 0 0 12px 0;">{_esc(title)}</h2>
-    <p style="margin: 0 0 16px 0; white-space: pre-wrap;">{_esc(message)}</p>
-    <p style="margin: 0; color: #666;"><i>{_esc(server_name)}</i></p>
-</body>
-</html>
-"""
+            html_content = _EVENT_HTML.render(
+                title=title, message=message, server_name=server_name
+            )
 
             msg = self._build_message(subject, text_content, html_content)
             self._send_message(msg)
@@ -0,0 +1,139 @@
+"""The immutable description of one IP change, shared by every provider.
+
+:meth:`Application.observe` builds a :class:`ChangeEvent` once per change:
+the per-family diff, the location summary and the timestamps are computed
+there instead of once per provider. Providers read it through
+:meth:`NotificationProvider.send_change`; the address and geo mappings are
+read-only views, so one provider cannot alter what the next one sends.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+DETECTED_FORMAT = "%A, %B %d, %Y at %H:%M:%S"
+
+FAMILIES = (("ipv4", "IPv4"), ("ipv6", "IPv6"))
+
+
+@dataclass(frozen=True)
+class AddressChange:
+    """One address family whose value differs from the previous check."""
+
+    family: str  # "ipv4" / "ipv6"
+    label: str  # "IPv4" / "IPv6"
+    # A family missing from previous_ips reads as the string "None", as the
+    # providers have always shown it.
+    old: Optional[str]
+    new: Optional[str]
+
+
+def location_of(geo: Optional[Mapping[str, Any]]) -> str:
+    """The geo location as city, region and country, skipping missing parts."""
+    if not geo:
+        return ""
+    parts = [geo.get("city"), geo.get("region"), geo.get("country")]
+    return ", ".join(str(part) for part in parts if part)
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """One IP change (or the first detection), ready for every provider."""
+
+    current_ips: Mapping[str, Optional[str]]
+    previous_ips: Mapping[str, Optional[str]]
+    geo: Optional[Mapping[str, Any]]
+    is_first_run: bool
+    server_name: str
+    version: str
+    detected_at: float  # epoch seconds
+    changes: Tuple[AddressChange, ...]
+    location: str
+    detected_text: str  # local time, DETECTED_FORMAT
+    timestamp: str  # UTC ISO 8601
+
+    @classmethod
+    def build(
+        cls,
+        current_ips: Mapping[str, Optional[str]],
+        previous_ips: Mapping[str, Optional[str]],
+        geo: Optional[Mapping[str, Any]],
+        is_first_run: bool,
+        server_name: str,
+        version: str = "",
+        detected_at: Optional[float] = None,
+    ) -> "ChangeEvent":
+        moment = (
+            datetime.now(timezone.utc)
+            if detected_at is None
+            else datetime.fromtimestamp(detected_at, timezone.utc)
+        )
+        changes = tuple(
+            AddressChange(
+                key, label, previous_ips.get(key, "None"), current_ips.get(key, "None")
+            )
+            for key, label in FAMILIES
+            if current_ips.get(key) != previous_ips.get(key)
+        )
+        return cls(
+            current_ips=MappingProxyType(dict(current_ips)),
+            previous_ips=MappingProxyType(dict(previous_ips)),
+            geo=None if geo is None else MappingProxyType(dict(geo)),
+            is_first_run=is_first_run,
+            server_name=server_name,
+            version=version,
+            detected_at=moment.timestamp(),
+            changes=changes,
+            location=location_of(geo),
+            detected_text=moment.astimezone().strftime(DETECTED_FORMAT),
+            timestamp=moment.isoformat(),
+        )
+
+    def notification_args(
+        self,
+    ) -> Tuple[
+        Dict[str, Optional[str]],
+        Dict[str, Optional[str]],
+        Optional[Dict[str, Any]],
+        bool,
+        str,
+        str,
+    ]:
+        """The arguments of the older ``send_notification`` call."""
+        return (
+            dict(self.current_ips),
+            dict(self.previous_ips),
+            None if self.geo is None else dict(self.geo),
+            self.is_first_run,
+            self.server_name,
+            self.version,
+        )
+
+    def as_payload(self) -> Dict[str, Any]:
+        """A JSON-serialisable form, e.g. for the outbox journal."""
+        current, previous, geo, is_first_run, server_name, version = (
+            self.notification_args()
+        )
+        return {
+            "current_ips": current,
+            "previous_ips": previous,
+            "geo": geo,
+            "is_first_run": is_first_run,
+            "server_name": server_name,
+            "version": version,
+            "detected_at": self.detected_at,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "ChangeEvent":
+        # Jobs journaled before detected_at was recorded get the replay time.
+        return cls.build(
+            payload["current_ips"],
+            payload["previous_ips"],
+            payload["geo"],
+            payload["is_first_run"],
+            payload["server_name"],
+            payload["version"],
+            payload.get("detected_at"),
+        )
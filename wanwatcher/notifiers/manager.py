@@ -1,44 +1,146 @@
-"""Aggregates notification providers and fans messages out with retries."""
+"""Aggregates notification providers and fans messages out with retries.
+
+Providers are dispatched concurrently, each on its own worker thread with its
+own retry budget, so one slow or failing channel no longer delays the others:
+a fan-out takes as long as its slowest provider, capped by ``deadline``.
+
+Results map each provider to True (sent), False (failed) or None: still
+running at the deadline. The send may yet go through, so callers must not
+treat None as a failure to retry.
+"""
 
-import functools
 import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Any, Callable, Dict, List, Optional
 
+from wanwatcher.metrics import Metrics
 from wanwatcher.notifiers.base import NotificationProvider, retry_with_backoff
+from wanwatcher.notifiers.event import ChangeEvent
+from wanwatcher.notifiers.ratelimit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
 
 class NotificationManager:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        deadline: Optional[float] = None,
+        rate_per_minute: float = 0,
+        burst: int = 5,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
         self.providers: List[NotificationProvider] = []
+        self.metrics = metrics
+        # Overall seconds a fan-out waits for its providers; None waits for
+        # all of them.
+        self.deadline = deadline
+        # Send attempts allowed per provider and minute; 0 disables the limit.
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
 
     def add_provider(self, provider: NotificationProvider) -> None:
         self.providers.append(provider)
+        if self.rate_per_minute > 0:
+            self._buckets[provider.__class__.__name__] = TokenBucket(
+                self.rate_per_minute / 60.0, self.burst
+            )
+
+    def acquire(self, provider_name: str, timeout: Optional[float] = None) -> bool:
+        """Take a send token for a provider, waiting up to ``timeout``.
+
+        Always True for providers without a rate limit.
+        """
+        bucket = self._buckets.get(provider_name)
+        if bucket is None or bucket.acquire(timeout):
+            return True
+        logger.warning("%s is rate limited; deferring the send", provider_name)
+        return False
+
+    def provider_named(self, name: str) -> Optional[NotificationProvider]:
+        """The provider whose class name is ``name``, as used in results."""
+        for provider in self.providers:
+            if provider.__class__.__name__ == name:
+                return provider
+        return None
+
+    def _send(
+        self,
+        action_name: str,
+        call: Callable[[NotificationProvider], bool],
+        provider: NotificationProvider,
+    ) -> bool:
+        provider_name = provider.__class__.__name__
+        logger.info("Sending %s via %s...", action_name, provider_name)
+
+        def attempt() -> bool:
+            # Honour a Retry-After the provider got earlier, from any fan-out,
+            # then spend a rate-limit token; retries included.
+            if not provider.rate_limit.wait(self.deadline):
+                logger.warning(
+                    "%s asked to back off beyond the deadline; skipping", provider_name
+                )
+                return False
+            return self.acquire(provider_name, self.deadline) and call(provider)
+
+        success = retry_with_backoff(
+            attempt,
+            max_retries=3,
+            base_delay=2.0,
+            jitter=1.0,
+            retry_after=lambda: provider.rate_limit.remaining() or None,
+        )
+        if success:
+            logger.info("%s %s sent successfully", provider_name, action_name)
+        else:
+            logger.error("%s %s failed after all retries", provider_name, action_name)
+        return success
 
     def _fan_out(
         self, action_name: str, call: Callable[[NotificationProvider], bool]
-    ) -> Dict[str, bool]:
-        """Run `call(provider)` for each provider with retry; collect results."""
-        results: Dict[str, bool] = {}
-        for provider in self.providers:
+    ) -> Dict[str, Optional[bool]]:
+        """Run `call(provider)` for every provider concurrently; collect results.
+
+        A provider still running when the deadline passes is reported as
+        None (outcome unknown); its thread is left to finish in the
+        background.
+        """
+        if not self.providers:
+            return {}
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(
+            max_workers=len(self.providers), thread_name_prefix="wanwatcher-notify"
+        )
+        try:
+            futures: List[Future[bool]] = [
+                executor.submit(self._send, action_name, call, provider)
+                for provider in self.providers
+            ]
+            wait(futures, timeout=self.deadline)
+        finally:
+            executor.shutdown(wait=False)
+
+        results: Dict[str, Optional[bool]] = {}
+        for provider, future in zip(self.providers, futures):
             provider_name = provider.__class__.__name__
-            logger.info("Sending %s via %s...", action_name, provider_name)
-            # functools.partial binds the current provider, avoiding the
-            # late-binding closure trap of a bare lambda in the loop.
-            success = retry_with_backoff(
-                functools.partial(call, provider),
-                max_retries=3,
-                base_delay=2.0,
-                jitter=1.0,
-            )
-            results[provider_name] = success
-            if success:
-                logger.info("%s %s sent successfully", provider_name, action_name)
-            else:
+            if not future.done():
                 logger.error(
-                    "%s %s failed after all retries", provider_name, action_name
+                    "%s %s did not finish within %.0fs; no longer waiting for it, "
+                    "it may still be delivered",
+                    provider_name,
+                    action_name,
+                    self.deadline,
                 )
+                results[provider_name] = None
+            else:
+                results[provider_name] = future.result()
+        if self.metrics is not None:
+            self.metrics.observe(
+                "wanwatcher_notification_fanout_duration_seconds",
+                time.monotonic() - started,
+                {"action": action_name},
+            )
         return results
 
     def send_to_all(
@@ -49,7 +151,7 @@ class NotificationManager:
         is_first_run: bool,
         server_name: str,
         version: str = "",
-    ) -> Dict[str, bool]:
+    ) -> Dict[str, Optional[bool]]:
         return self._fan_out(
             "notification",
             lambda p: p.send_notification(
@@ -57,9 +159,13 @@ class NotificationManager:
             ),
         )
 
+    def send_change(self, event: ChangeEvent) -> Dict[str, Optional[bool]]:
+        """Fan one prebuilt change event out to every provider."""
+        return self._fan_out("notification", lambda p: p.send_change(event))
+
     def notify_update(
         self, update_info: Dict[str, str], server_name: str, version: str = ""
-    ) -> Dict[str, bool]:
+    ) -> Dict[str, Optional[bool]]:
         return self._fan_out(
             "update notification",
             lambda p: p.send_update_notification(update_info, server_name, version),
@@ -67,7 +173,7 @@ class NotificationManager:
 
     def notify_event(
         self, title: str, message: str, server_name: str, severity: str = "info"
-    ) -> Dict[str, bool]:
+    ) -> Dict[str, Optional[bool]]:
         return self._fan_out(
             f"event ({title})",
             lambda p: p.send_event(title, message, server_name, severity),
@@ -82,10 +188,18 @@ class NotificationManager:
         is_first_run: bool,
         server_name: str,
         version: str = "",
-    ) -> Dict[str, bool]:
+    ) -> Dict[str, Optional[bool]]:
         return self.send_to_all(
             current_ips, previous_ips, geo_data, is_first_run, server_name, version
         )
 
+    def close(self) -> None:
+        """Close every provider's persistent connections."""
+        for provider in self.providers:
+            try:
+                provider.close()
+            except Exception as exc:  # noqa: BLE001
+                logger.debug("Closing %s failed: %s", provider.__class__.__name__, exc)
+
     def notify_error(self, error_msg: str, server_name: str) -> None:
         logger.error("Error notification: %s", error_msg)
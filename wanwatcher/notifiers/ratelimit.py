@@ -0,0 +1,177 @@
+"""Per-provider rate limiting and change coalescing for notifications.
+
+Three mechanisms keep an unstable connection from turning into a
+burst of webhook calls (and the 429 retry storms that follow):
+
+* :class:`TokenBucket` limits how often a single provider is called. Every
+  send attempt, including retries, takes a token; tokens refill at a steady
+  rate up to a small burst allowance.
+* :class:`RateLimitState` remembers a provider's own rate-limit answer
+  (HTTP 429 with ``Retry-After``) so every later send to that provider, from
+  any fan-out, waits it out instead of being rejected again.
+* :class:`ChangeCoalescer` holds IP-change notifications for a short window
+  and merges the changes seen in it into one message whose previous address
+  lists every intermediate state, e.g. ``A → B`` followed by ``C``.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ARROW = " → "
+
+Deliver = Callable[[Dict[str, Optional[str]], Dict[str, Optional[str]], bool], None]
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``burst``."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self._sleeper = threading.Event()  # never set; used for waiting
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available.
+
+        Returns 0.0 on success, otherwise the seconds until the next token.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a token; False if none is available within ``timeout``."""
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining < wait:
+                    return False
+            self._sleeper.wait(wait)
+
+
+class RateLimitState:
+    """When a provider told us to back off, shared by all its sends."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._sleeper = threading.Event()  # never set; used for waiting
+
+    def block(self, seconds: float) -> None:
+        """Hold back sends for ``seconds`` (never shortens an earlier block)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+
+    def remaining(self) -> float:
+        """Seconds until sends are allowed again; 0.0 when not blocked."""
+        with self._lock:
+            return max(0.0, self._blocked_until - self.clock())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait out the block; False if it outlasts ``timeout``."""
+        remaining = self.remaining()
+        if not remaining:
+            return True
+        if timeout is not None and remaining > timeout:
+            return False
+        self._sleeper.wait(remaining)
+        return True
+
+
+class ChangeCoalescer:
+    """Merge the IP changes seen within ``window`` seconds into one message.
+
+    The first change opens the window and later ones are folded into it; when
+    it closes, ``deliver`` runs once on the timer thread with the addresses
+    from before the first change (joined with every intermediate address) and
+    the newest ones. First-run notifications are never held back.
+    """
+
+    def __init__(
+        self,
+        deliver: Deliver,
+        window: float,
+        timer_factory: Callable[..., threading.Timer] = threading.Timer,
+    ) -> None:
+        self.deliver = deliver
+        self.window = window
+        self.timer_factory = timer_factory
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # Per family: the address before the window, then each new address.
+        self._chain: Dict[str, List[Optional[str]]] = {}
+        self._current: Dict[str, Optional[str]] = {}
+        self._merged = 0
+
+    def submit(
+        self,
+        current_ips: Dict[str, Optional[str]],
+        previous_ips: Dict[str, Optional[str]],
+        is_first_run: bool,
+    ) -> None:
+        if is_first_run or self.window <= 0:
+            self.deliver(current_ips, previous_ips, is_first_run)
+            return
+        with self._lock:
+            for family, address in current_ips.items():
+                chain = self._chain.setdefault(family, [previous_ips.get(family)])
+                if chain[-1] != address:
+                    chain.append(address)
+            self._current = dict(current_ips)
+            self._merged += 1
+            if self._timer is None:
+                self._timer = self.timer_factory(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            elif self._merged == 2:
+                logger.info(
+                    "Another IP change within %.0fs; merging notifications",
+                    self.window,
+                )
+
+    def flush(self) -> None:
+        """Deliver the pending merged change now, if there is one."""
+        with self._lock:
+            if self._timer is None:
+                return
+            self._timer.cancel()
+            self._timer = None
+            chain, current, merged = self._chain, self._current, self._merged
+            self._chain, self._current, self._merged = {}, {}, 0
+        previous: Dict[str, Optional[str]] = {}
+        for family, states in chain.items():
+            # Everything but the newest address is history.
+            history = states[:-1] if len(states) > 1 else states
+            if len(history) == 1:
+                previous[family] = history[0]
+            else:
+                previous[family] = ARROW.join(str(state) for state in history)
+        if merged > 1:
+            logger.info("Sending %d merged IP changes as one notification", merged)
+        self.deliver(current, previous, False)
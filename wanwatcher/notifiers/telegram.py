@@ -5,13 +5,14 @@ so the token never appears in attributes, logs, or exception messages.
 """
 
 import logging
-from datetime import datetime
 from typing import Any, Dict, Optional
 
 import requests
 
+from wanwatcher.httpclient import HTTPClient, default_client
 from wanwatcher.notifiers._escape import telegram_escape as _esc
-from wanwatcher.notifiers.base import NotificationProvider
+from wanwatcher.notifiers.base import DeliveryResult, NotificationProvider
+from wanwatcher.notifiers.event import ChangeEvent
 
 logger = logging.getLogger(__name__)
 
@@ -21,24 +22,33 @@ class TelegramNotifier(NotificationProvider):
 
     name = "telegram"
 
-    def __init__(self, bot_token: str, chat_id: str, parse_mode: str = "HTML"):
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        parse_mode: str = "HTML",
+        timeout: int = 10,
+        http: Optional[HTTPClient] = None,
+    ):
         self._bot_token = bot_token
+        self.timeout = timeout
+        self.http = http or default_client()
         self.chat_id = chat_id
         self.parse_mode = parse_mode
 
-    def _post(self, payload: Dict[str, Any]) -> Optional[requests.Response]:
+    def _post(self, payload: Dict[str, Any]) -> DeliveryResult:
         """Post a payload to the Telegram API.
 
         The URL embeds the bot token, so it is built here and never stored.
-        Returns None on a transport error; never lets the token leak into
-        log output (requests exceptions include the full request URL).
+        A transport error yields a failed result without a status; the token
+        never leaks into log output (requests exceptions include the full
+        request URL).
         """
         api_url = f"https://api.telegram.org/bot{self._bot_token}/sendMessage"
         try:
-            return requests.post(api_url, json=payload, timeout=10)
+            response = self.http.post(api_url, json=payload, timeout=self.timeout)
         except requests.RequestException as exc:
-            response = getattr(exc, "response", None)
-            status = getattr(response, "status_code", None)
+            status = getattr(getattr(exc, "response", None), "status_code", None)
             if status is not None:
                 logger.error(
                     "Telegram request failed: %s (Status: %s)",
@@ -47,21 +57,15 @@ class TelegramNotifier(NotificationProvider):
                 )
             else:
                 logger.error("Telegram request failed: %s", type(exc).__name__)
-            return None
+            return DeliveryResult(ok=False)
+        return self._note_result(DeliveryResult.from_response(response, 200))
 
-    def send_notification(
-        self,
-        current_ips: Dict[str, Optional[str]],
-        previous_ips: Dict[str, Optional[str]],
-        geo_data: Optional[Dict[str, Any]],
-        is_first_run: bool,
-        server_name: str,
-        version: str = "",
-    ) -> bool:
+    def send_change(self, event: ChangeEvent) -> bool:
         """Send Telegram notification."""
+        current_ips, geo_data = event.current_ips, event.geo
         try:
             # Determine notification type
-            if is_first_run:
+            if event.is_first_run:
                 title = "✅ Initial IP Detection"
                 emoji = "🟢"
             else:
@@ -72,22 +76,17 @@ class TelegramNotifier(NotificationProvider):
             message_lines = [
                 f"{emoji} <b>WAN IP Monitor Alert</b>",
                 f"<b>{title}</b>",
-                f"Monitoring for <b>{_esc(server_name)}</b>",
+                f"Monitoring for <b>{_esc(event.server_name)}</b>",
                 "",
             ]
 
             # IP Change details (if not first run)
-            if not is_first_run:
+            if not event.is_first_run:
                 message_lines.append("<b>📊 Changes Detected:</b>")
-                if current_ips.get("ipv4") != previous_ips.get("ipv4"):
+                for change in event.changes:
                     message_lines.append(
-                        f"  • IPv4: <code>{_esc(previous_ips.get('ipv4', 'None'))}</code>"
-                        f" → <code>{_esc(current_ips.get('ipv4', 'None'))}</code>"
-                    )
-                if current_ips.get("ipv6") != previous_ips.get("ipv6"):
-                    message_lines.append(
-                        f"  • IPv6: <code>{_esc(previous_ips.get('ipv6', 'None'))}</code>"
-                        f" → <code>{_esc(current_ips.get('ipv6', 'None'))}</code>"
+                        f"  • {change.label}: <code>{_esc(change.old)}</code>"
+                        f" → <code>{_esc(change.new)}</code>"
                     )
                 message_lines.append("")
 
@@ -107,22 +106,8 @@ class TelegramNotifier(NotificationProvider):
             # Geographic information
             if geo_data:
                 message_lines.append("<b>📍 Location Information</b>")
-                if (
-                    geo_data.get("city")
-                    or geo_data.get("region")
-                    or geo_data.get("country")
-                ):
-                    location = ", ".join(
-                        filter(
-                            None,
-                            [
-                                geo_data.get("city"),
-                                geo_data.get("region"),
-                                geo_data.get("country"),
-                            ],
-                        )
-                    )
-                    message_lines.append(f"🌍 {_esc(location)}")
+                if event.location:
+                    message_lines.append(f"🌍 {_esc(event.location)}")
 
                 if geo_data.get("org"):
                     message_lines.append(f"🏢 {_esc(geo_data['org'])}")
@@ -133,12 +118,11 @@ class TelegramNotifier(NotificationProvider):
                 message_lines.append("")
 
             # Metadata
-            detected_at = datetime.now().strftime("%A, %B %d, %Y at %H:%M:%S")
             message_lines.extend(
                 [
-                    f"<b>⏰ Detected At:</b> {detected_at}",
+                    f"<b>⏰ Detected At:</b> {event.detected_text}",
                     "<b>🐳 Environment:</b> Running in Docker",
-                    f"<b>📦 Version:</b> v{version}",
+                    f"<b>📦 Version:</b> v{event.version}",
                 ]
             )
 
@@ -151,18 +135,18 @@ class TelegramNotifier(NotificationProvider):
                 "parse_mode": self.parse_mode,
             }
 
-            response = self._post(payload)
-            if response is None:
+            result = self._post(payload)
+            if result.status is None:
                 return False
 
-            if response.status_code == 200:
+            if result.ok:
                 logger.info("Telegram notification sent successfully")
                 return True
 
             logger.error(
                 "Telegram notification failed (Status: %d): %s",
-                response.status_code,
-                response.text,
+                result.status,
+                result.text,
             )
             return False
 
@@ -228,17 +212,17 @@ class TelegramNotifier(NotificationProvider):
                 "disable_web_page_preview": False,
             }
 
-            response = self._post(payload)
-            if response is None:
+            result = self._post(payload)
+            if result.status is None:
                 return False
 
-            if response.status_code == 200:
+            if result.ok:
                 logger.info("Telegram update notification sent successfully")
                 return True
 
             logger.error(
                 "Telegram update notification failed (Status: %d)",
-                response.status_code,
+                result.status,
             )
             return False
 
@@ -268,17 +252,17 @@ class TelegramNotifier(NotificationProvider):
                 "parse_mode": self.parse_mode,
             }
 
-            response = self._post(payload)
-            if response is None:
+            result = self._post(payload)
+            if result.status is None:
                 return False
 
-            if response.status_code == 200:
+            if result.ok:
                 logger.info("Telegram event notification sent successfully")
                 return True
 
             logger.error(
                 "Telegram event notification failed (Status: %d)",
-                response.status_code,
+                result.status,
             )
             return False
 
@@ -0,0 +1,111 @@
+"""Precompiled notification templates and a shared render cache.
+
+A :class:`Template` is parsed once, when the provider module is imported,
+into its literal chunks and ``${field}`` slots. Rendering escapes each field
+once with the template's escaper and joins the chunks; values wrapped in
+:class:`Safe` are markup built by the caller and are inserted as is.
+
+:class:`RenderCache` keeps recently rendered bodies keyed by event type and
+a hash of everything that went into them, so the same content rendered for
+several providers or recipients (or re-rendered on a retry) is built once.
+Neither needs a provider instance, which keeps rendering benchmarkable on
+its own.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from wanwatcher.notifiers._escape import html_escape
+
+T = TypeVar("T")
+
+_FIELD = re.compile(r"\$\{(\w+)\}")
+
+
+def plain(value: Optional[Any]) -> str:
+    """The escaper for plain text: ``str()``, as an f-string would."""
+    return str(value)
+
+
+class Safe(str):
+    """Markup that is already escaped; rendered without escaping again."""
+
+
+class Template:
+    """A layout with ``${name}`` fields, parsed once and rendered many times."""
+
+    def __init__(self, source: str, escape: Callable[[Any], str] = html_escape):
+        self.escape = escape
+        parts = _FIELD.split(source)
+        self._literals = parts[0::2]
+        self._fields = parts[1::2]
+        self.fields = frozenset(self._fields)
+
+    def render(self, **values: Any) -> str:
+        missing = self.fields.difference(values)
+        if missing:
+            raise KeyError(f"template fields not given: {', '.join(sorted(missing))}")
+        escaped = {
+            name: value if isinstance(value, Safe) else self.escape(value)
+            for name, value in values.items()
+            if name in self.fields
+        }
+        out = [self._literals[0]]
+        for name, literal in zip(self._fields, self._literals[1:]):
+            out.append(escaped[name])
+            out.append(literal)
+        return "".join(out)
+
+
+def payload_hash(payload: Any) -> str:
+    """A stable digest of a JSON-like payload (dict key order ignored)."""
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """A small thread-safe LRU of rendered bodies."""
+
+    def __init__(self, size: int = 64) -> None:
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, event: str, payload: Any, render: Callable[[], T]) -> T:
+        """Return the cached body for ``(event, payload)`` or render it."""
+        key = (event, payload_hash(payload))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]  # type: ignore[no-any-return]
+            self.misses += 1
+        body = render()
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared by every provider so identical content is rendered once per process.
+render_cache = RenderCache()
@@ -0,0 +1,389 @@
+"""Durable outbox for notifications and DDNS updates (``OUTBOX_ENABLED``).
+
+Without it an IP-change notification lives only in memory: if the process
+restarts while a provider is being retried, or every retry fails, the message
+is gone. With the outbox each delivery becomes a job -- one per notification
+provider, one per DDNS provider -- appended to a JSON-lines journal next to
+the state file before anything is sent. A background thread drains due jobs
+on a small worker pool; a job is marked done in the journal only after it was
+delivered, so delivery is at least once. Failed attempts are rescheduled with
+exponential backoff, survive restarts and are dropped only once they are older
+than ``max_age``. A newer DDNS job replaces a pending older one for the same
+provider, so a stale address is never pushed after a fresh one.
+
+Journal records are ``add`` (a new job), ``retry`` (attempt count and next
+due time), ``done`` and ``drop``. A torn last line from a crash mid-append is
+skipped on replay. Once enough finished records pile up the journal is
+compacted: rewritten atomically with only the pending jobs.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from wanwatcher.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Finished records tolerated in the journal before it is compacted.
+COMPACT_THRESHOLD = 100
+# Longest the drain thread sleeps when nothing is due.
+POLL_INTERVAL = 5.0
+
+
+class UndeliverableJob(Exception):
+    """Raised by a handler for a job that can never succeed (e.g. its
+    provider is no longer configured); the job is dropped, not retried."""
+
+
+@dataclass
+class OutboxJob:
+    id: str
+    kind: str  # "notify" or "ddns"
+    target: str  # provider name
+    payload: Dict[str, Any] = field(default_factory=dict)
+    created: float = 0.0
+    attempts: int = 0
+    next_at: float = 0.0
+
+
+Handler = Callable[[OutboxJob], bool]
+
+
+class Outbox:
+    """Journal-backed job queue drained by a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        metrics: Optional[Metrics] = None,
+        concurrency: int = 2,
+        max_age: float = 86400.0,
+        retry_base: float = 10.0,
+        retry_max: float = 900.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.metrics = metrics
+        self.concurrency = max(1, concurrency)
+        self.max_age = max_age
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.clock = clock
+        self._handlers: Dict[str, Handler] = {}
+        self._jobs: Dict[str, OutboxJob] = {}
+        self._in_flight: Set[str] = set()
+        self._finished = 0  # done/drop records in the journal
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """Deliver jobs of ``kind`` with ``handler``.
+
+        The handler returns True once delivered and False (or raises) to
+        retry later; raising :class:`UndeliverableJob` drops the job.
+        """
+        self._handlers[kind] = handler
+
+    # -- journal -------------------------------------------------------------
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _compact(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".outbox-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                for job in self._jobs.values():
+                    record = {"op": "add", **asdict(job)}
+                    fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._finished = 0
+        logger.debug("Outbox compacted to %d pending job(s)", len(self._jobs))
+
+    def _finish(self, job: OutboxJob, op: str) -> None:
+        """Record a done/drop; caller holds the lock."""
+        self._jobs.pop(job.id, None)
+        self._append({"op": op, "id": job.id})
+        self._finished += 1
+        if self._finished >= COMPACT_THRESHOLD:
+            self._compact()
+
+    def open(self) -> int:
+        """Replay the journal and compact it; returns the pending job count."""
+        jobs: Dict[str, OutboxJob] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                lines = fh.readlines()
+        except FileNotFoundError:
+            lines = []
+        for number, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+                op = record.pop("op")
+                if op == "add":
+                    job = OutboxJob(**record)
+                    jobs[job.id] = job
+                elif op == "retry" and record["id"] in jobs:
+                    jobs[record["id"]].attempts = record["attempts"]
+                    jobs[record["id"]].next_at = record["next_at"]
+                elif op in ("done", "drop"):
+                    jobs.pop(record["id"], None)
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning(
+                    "Skipping unreadable outbox record at %s:%d: %s",
+                    self.path,
+                    number,
+                    exc,
+                )
+        with self._lock:
+            self._jobs = jobs
+            if lines:
+                self._compact()
+            self._export()
+        if jobs:
+            logger.info("Outbox: %d undelivered job(s) to replay", len(jobs))
+        return len(jobs)
+
+    # -- queueing ------------------------------------------------------------
+
+    def enqueue(
+        self,
+        kind: str,
+        target: str,
+        payload: Dict[str, Any],
+        supersede: bool = False,
+    ) -> OutboxJob:
+        """Journal a new job and wake the drain thread.
+
+        With ``supersede``, a pending job of the same kind and target carrying
+        the same payload is returned as is, and ones with another payload that
+        are not being delivered right now are discarded in its favour.
+        """
+        now = self.clock()
+        job = OutboxJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            target=target,
+            payload=payload,
+            created=now,
+            next_at=now,
+        )
+        with self._lock:
+            if supersede:
+                for old in list(self._jobs.values()):
+                    if old.kind != kind or old.target != target:
+                        continue
+                    if old.payload == payload:
+                        return old
+                    if old.id not in self._in_flight:
+                        self._finish(old, "drop")
+                        self._record(kind, "superseded")
+            self._append({"op": "add", **asdict(job)})
+            self._jobs[job.id] = job
+            self._export()
+        self._wake.set()
+        return job
+
+    def cancel(self, kind: str, target: str) -> int:
+        """Drop pending jobs of ``kind`` for ``target`` that are not being
+        delivered right now; returns how many were dropped."""
+        dropped = 0
+        with self._lock:
+            for job in list(self._jobs.values()):
+                if (
+                    job.kind == kind
+                    and job.target == target
+                    and job.id not in self._in_flight
+                ):
+                    self._finish(job, "drop")
+                    self._record(kind, "superseded")
+                    dropped += 1
+            if dropped:
+                self._export()
+        return dropped
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    # -- delivery ------------------------------------------------------------
+
+    def _record(self, kind: str, result: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc(
+                "wanwatcher_outbox_jobs_total", {"kind": kind, "result": result}
+            )
+
+    def _export(self) -> None:
+        if self.metrics is not None:
+            self.metrics.set_gauge("wanwatcher_outbox_pending", len(self._jobs))
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.retry_max, self.retry_base * (2 ** (attempts - 1)))
+
+    def _deliver(self, job: OutboxJob) -> None:
+        handler = self._handlers.get(job.kind)
+        result = "retry"
+        try:
+            if handler is None:
+                raise UndeliverableJob(f"no handler for {job.kind!r} jobs")
+            if handler(job):
+                result = "delivered"
+        except UndeliverableJob as exc:
+            logger.error(
+                "Outbox: dropping %s job for %s: %s", job.kind, job.target, exc
+            )
+            result = "dropped"
+        except Exception as exc:  # noqa: BLE001 - delivery must not kill the drain
+            logger.error(
+                "Outbox: %s job for %s failed: %s",
+                job.kind,
+                job.target,
+                exc,
+                exc_info=True,
+            )
+
+        now = self.clock()
+        if result == "retry" and now - job.created >= self.max_age:
+            logger.error(
+                "Outbox: giving up on %s job for %s after %d attempt(s)",
+                job.kind,
+                job.target,
+                job.attempts + 1,
+            )
+            result = "dropped"
+
+        try:
+            with self._lock:
+                self._in_flight.discard(job.id)
+                if job.id not in self._jobs:
+                    return
+                if result == "delivered":
+                    self._finish(job, "done")
+                elif result == "dropped":
+                    self._finish(job, "drop")
+                else:
+                    job.attempts += 1
+                    job.next_at = now + self._backoff(job.attempts)
+                    self._append(
+                        {
+                            "op": "retry",
+                            "id": job.id,
+                            "attempts": job.attempts,
+                            "next_at": job.next_at,
+                        }
+                    )
+                    logger.warning(
+                        "Outbox: %s job for %s will be retried in %.0fs",
+                        job.kind,
+                        job.target,
+                        job.next_at - now,
+                    )
+                self._export()
+        except OSError as exc:
+            logger.error("Outbox journal write failed: %s", exc)
+        self._record(job.kind, result)
+        self._wake.set()
+
+    def _startable(self) -> List[OutboxJob]:
+        """The oldest job of every kind and target with nothing in flight --
+        the only jobs that may start, due or not; caller holds the lock."""
+        busy = {
+            (job.kind, job.target)
+            for job in self._jobs.values()
+            if job.id in self._in_flight
+        }
+        heads: List[OutboxJob] = []
+        for job in sorted(self._jobs.values(), key=lambda job: job.created):
+            key = (job.kind, job.target)
+            if key in busy:
+                continue
+            busy.add(key)
+            heads.append(job)
+        return heads
+
+    def _due(self) -> List[OutboxJob]:
+        """Claim the due jobs, oldest first, at most one per kind and target
+        so jobs for the same provider are delivered in order."""
+        now = self.clock()
+        with self._lock:
+            free = self.concurrency - len(self._in_flight)
+            due = [job for job in self._startable() if job.next_at <= now][:free]
+            self._in_flight.update(job.id for job in due)
+        return due
+
+    def _next_wake(self) -> float:
+        """Seconds until a job can start. Jobs held back by a delivery in
+        flight do not count: its completion sets ``_wake``."""
+        now = self.clock()
+        with self._lock:
+            if len(self._in_flight) >= self.concurrency:
+                return POLL_INTERVAL
+            waiting = [job.next_at - now for job in self._startable()]
+        return max(0.0, min(waiting + [POLL_INTERVAL]))
+
+    def drain_once(self) -> int:
+        """Deliver the due jobs on the calling thread; returns how many ran."""
+        due = self._due()
+        for job in due:
+            self._deliver(job)
+        return len(due)
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="wanwatcher-outbox"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="wanwatcher-outbox-drain", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop draining; undelivered jobs stay in the journal for next start."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        remaining = self.pending()
+        if remaining:
+            logger.info("Outbox: %d job(s) kept for the next start", remaining)
+
+    def _run(self) -> None:
+        assert self._executor is not None
+        while not self._stop.is_set():
+            # Cleared before looking, so a delivery finishing in between
+            # still cuts the wait short.
+            self._wake.clear()
+            for job in self._due():
+                self._executor.submit(self._deliver, job)
+            self._wake.wait(timeout=self._next_wake())
@@ -0,0 +1,184 @@
+"""Asynchronous side-effect pipeline for the threaded monitoring loop.
+
+With ``PIPELINE_ENABLED`` the loop no longer runs notifications, DDNS
+updates and MQTT publishes inline: :meth:`Application.check_ip` hands each
+one to a :class:`SideEffectPipeline` and returns as soon as detection and
+persistence are done. Every sink ("notify", "ddns", "mqtt") has its own
+bounded FIFO queue drained by a fixed number of worker threads, which is the
+sink's concurrency limit. With the default of one worker per sink, jobs of
+the same sink run strictly in submission order, so an older DDNS update can
+never overwrite a newer one.
+
+Backpressure: when a sink's queue is full, :meth:`SideEffectPipeline.submit`
+blocks the loop for up to ``submit_timeout`` seconds and then drops the job,
+counting it in ``wanwatcher_pipeline_jobs_total{result="dropped"}``.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from wanwatcher.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Side effects produced by Application.side_effects().
+SINKS = ("notify", "ddns", "mqtt")
+
+Job = Callable[[], None]
+
+
+class _Sink:
+    def __init__(self, name: str, queue_size: int) -> None:
+        self.name = name
+        # None is the stop marker for one worker.
+        self.queue: "queue.Queue[Optional[Tuple[float, Job]]]" = queue.Queue(
+            maxsize=queue_size
+        )
+        self.threads: List[threading.Thread] = []
+
+
+class SideEffectPipeline:
+    """Bounded per-sink work queues with dedicated worker threads."""
+
+    def __init__(
+        self,
+        metrics: Optional[Metrics] = None,
+        queue_size: int = 100,
+        submit_timeout: float = 5.0,
+        concurrency: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.metrics = metrics
+        self.queue_size = max(1, queue_size)
+        self.submit_timeout = max(0.0, submit_timeout)
+        # Worker threads per sink; sinks not listed get one.
+        self.concurrency = dict(concurrency or {})
+        self._sinks: Dict[str, _Sink] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _sink(self, name: str) -> _Sink:
+        with self._lock:
+            sink = self._sinks.get(name)
+            if sink is None:
+                workers = max(1, self.concurrency.get(name, 1))
+                sink = self._sinks[name] = _Sink(name, self.queue_size)
+                for index in range(workers):
+                    thread = threading.Thread(
+                        target=self._work,
+                        args=(sink,),
+                        name=f"wanwatcher-{name}-{index}",
+                        daemon=True,
+                    )
+                    sink.threads.append(thread)
+                    thread.start()
+            return sink
+
+    def _record(self, sink: str, result: str) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.inc(
+            "wanwatcher_pipeline_jobs_total", {"sink": sink, "result": result}
+        )
+
+    def _set_depth(self, sink: _Sink) -> None:
+        if self.metrics is not None:
+            self.metrics.set_gauge(
+                "wanwatcher_pipeline_queue_depth",
+                sink.queue.qsize(),
+                {"sink": sink.name},
+            )
+
+    def submit(self, sink_name: str, job: Job) -> bool:
+        """Queue ``job`` for ``sink_name``; False if it had to be dropped."""
+        if self._closed:
+            logger.warning("Pipeline is stopped; dropping %s job", sink_name)
+            self._record(sink_name, "dropped")
+            return False
+        sink = self._sink(sink_name)
+        try:
+            sink.queue.put((time.monotonic(), job), timeout=self.submit_timeout)
+        except queue.Full:
+            logger.error(
+                "%s queue is full (%d jobs); dropping the new job",
+                sink_name,
+                self.queue_size,
+            )
+            self._record(sink_name, "dropped")
+            return False
+        self._set_depth(sink)
+        return True
+
+    def _work(self, sink: _Sink) -> None:
+        labels = {"sink": sink.name}
+        while True:
+            item = sink.queue.get()
+            try:
+                if item is None:
+                    return
+                queued_at, job = item
+                self._set_depth(sink)
+                started = time.monotonic()
+                try:
+                    job()
+                    result = "ok"
+                except Exception as exc:  # noqa: BLE001
+                    logger.error("%s job failed: %s", sink.name, exc, exc_info=True)
+                    result = "error"
+                finished = time.monotonic()
+                self._record(sink.name, result)
+                if self.metrics is not None:
+                    self.metrics.set_gauge(
+                        "wanwatcher_pipeline_wait_seconds",
+                        round(started - queued_at, 3),
+                        labels,
+                    )
+                    self.metrics.set_gauge(
+                        "wanwatcher_pipeline_latency_seconds",
+                        round(finished - queued_at, 3),
+                        labels,
+                    )
+            finally:
+                sink.queue.task_done()
+
+    def depths(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: sink.queue.qsize() for name, sink in self._sinks.items()}
+
+    def join(self, timeout: float) -> bool:
+        """Wait until every queued job has run; False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            sinks = list(self._sinks.values())
+        for sink in sinks:
+            while sink.queue.unfinished_tasks:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop accepting jobs, let queued ones finish, stop the workers.
+
+        Jobs still queued when ``timeout`` runs out are abandoned; the worker
+        threads are daemons and never block interpreter exit.
+        """
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            sinks = list(self._sinks.values())
+        pending: List[Tuple[_Sink, threading.Thread]] = []
+        for sink in sinks:
+            for thread in sink.threads:
+                try:
+                    sink.queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Full:
+                    break
+                pending.append((sink, thread))
+        for sink, thread in pending:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        leftover = {name: depth for name, depth in self.depths().items() if depth}
+        if leftover:
+            logger.warning("Pipeline stopped with jobs still queued: %s", leftover)
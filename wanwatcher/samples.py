@@ -0,0 +1,216 @@
+"""Per-check samples in a fixed-size ring buffer (``SAMPLES_ENABLED``).
+
+Every detection of an address family appends one 16-byte record --
+completion time, duration, answering source, result and family -- packed with
+:mod:`struct` into a preallocated buffer. Appending is O(1) and never
+allocates; once the buffer is full the oldest sample is overwritten, so the
+memory use is fixed at ``capacity * 16`` bytes (64k samples, about six weeks
+of one-minute checks of one family, take 1 MiB).
+
+With ``SAMPLES_PERSIST`` the buffer is a memory-mapped file,
+``<IP_DB_FILE>.samples``, and survives restarts; the kernel writes dirty
+pages back on its own schedule, so a check does not wait for the disk. The
+file starts with a header (magic, record size, capacity, samples written)
+and a table of source names, which records refer to by index.
+
+Records are stamped when they are appended and timestamps never decrease
+from one record to the next (a clock stepping back is clamped), so range
+queries can binary-search the ring even though IPv4 and IPv6 detections
+finish in any order.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+RESULTS = ("ok", "changed", "failed", "timeout")
+FAMILIES = {"ipv4": 4, "ipv6": 6}
+
+_MAGIC = b"WWSMPL01"
+_HEADER = struct.Struct("<8sIIQ")  # magic, record size, capacity, written
+_RECORD = struct.Struct("<dfBBBx")  # ts, duration, source, result, family
+_NAME_SIZE = 32
+_MAX_SOURCES = 64
+_NAMES_AT = _HEADER.size
+_RECORDS_AT = _NAMES_AT + _NAME_SIZE * _MAX_SOURCES
+NO_SOURCE = 255
+
+_FAMILY_NAMES = {number: name for name, number in FAMILIES.items()}
+
+
+class CheckSamples:
+    """A ring buffer of per-family check samples, optionally file-backed."""
+
+    def __init__(self, capacity: int = 65536, path: Optional[str] = None) -> None:
+        self.capacity = max(1, capacity)
+        self.path = path
+        self._lock = threading.Lock()
+        self._names: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._written = 0
+        self._last_ts = float("-inf")
+        self._file: Optional[Any] = None
+        size = _RECORDS_AT + self.capacity * _RECORD.size
+        self._buffer: Union[bytearray, mmap.mmap] = bytearray(size)
+        if path is not None:
+            self._buffer = self._map(path, size)
+
+    def _map(self, path: str, size: int) -> mmap.mmap:
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fh = open(path, "a+b")
+        try:
+            fresh = os.fstat(fh.fileno()).st_size != size
+            if fresh:
+                fh.truncate(0)
+                fh.truncate(size)
+            buffer = mmap.mmap(fh.fileno(), size)
+        except OSError:
+            fh.close()
+            raise
+        self._file = fh
+        magic, record_size, capacity, written = _HEADER.unpack_from(buffer, 0)
+        if fresh or (magic, record_size, capacity) != (
+            _MAGIC,
+            _RECORD.size,
+            self.capacity,
+        ):
+            if not fresh:
+                logger.info("Check sample file %s has another layout; resetting", path)
+            buffer[:_RECORDS_AT] = bytes(_RECORDS_AT)
+            _HEADER.pack_into(buffer, 0, _MAGIC, _RECORD.size, self.capacity, 0)
+            return buffer
+        self._written = written
+        if written:
+            offset = _RECORDS_AT + ((written - 1) % self.capacity) * _RECORD.size
+            self._last_ts = _RECORD.unpack_from(buffer, offset)[0]
+        for slot in range(_MAX_SOURCES):
+            start = _NAMES_AT + slot * _NAME_SIZE
+            raw = bytes(buffer[start : start + _NAME_SIZE]).rstrip(b"\0")
+            if not raw:
+                break
+            self._index[raw.decode("utf-8", "replace")] = slot
+            self._names.append(raw.decode("utf-8", "replace"))
+        return buffer
+
+    def close(self) -> None:
+        with self._lock:
+            if isinstance(self._buffer, mmap.mmap):
+                self._buffer.flush()
+                self._buffer.close()
+                self._buffer = bytearray(0)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    # -- writing -----------------------------------------------------------
+
+    def append(
+        self,
+        ts: Optional[float],
+        duration: float,
+        family: str,
+        result: str,
+        source: Optional[str] = None,
+    ) -> None:
+        """Record one detection; the oldest sample goes once the ring is full.
+
+        ``ts`` None stamps the sample now; an earlier time than the previous
+        sample's is raised to it to keep the ring in time order.
+        """
+        with self._lock:
+            if not len(self._buffer):
+                return  # closed
+            ts = max(time.time() if ts is None else ts, self._last_ts)
+            self._last_ts = ts
+            offset = _RECORDS_AT + (self._written % self.capacity) * _RECORD.size
+            _RECORD.pack_into(
+                self._buffer,
+                offset,
+                ts,
+                duration,
+                self._source_index(source),
+                RESULTS.index(result),
+                FAMILIES[family],
+            )
+            self._written += 1
+            _HEADER.pack_into(
+                self._buffer, 0, _MAGIC, _RECORD.size, self.capacity, self._written
+            )
+
+    def _source_index(self, name: Optional[str]) -> int:
+        if not isinstance(name, str):
+            return NO_SOURCE
+        slot = self._index.get(name)
+        if slot is not None:
+            return slot
+        if len(self._names) >= _MAX_SOURCES:
+            return NO_SOURCE
+        slot = len(self._names)
+        encoded = name.encode("utf-8")[:_NAME_SIZE]
+        start = _NAMES_AT + slot * _NAME_SIZE
+        self._buffer[start : start + _NAME_SIZE] = encoded.ljust(_NAME_SIZE, b"\0")
+        self._names.append(name)
+        self._index[name] = slot
+        return slot
+
+    # -- reading -----------------------------------------------------------
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        family: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Samples in ``[since, until]``, oldest first; the newest ``limit``."""
+        with self._lock:
+            matches = self._iter(since, until, family)
+            if limit is None:
+                return list(matches)
+            return list(deque(matches, maxlen=max(0, limit)))
+
+    def _iter(
+        self, since: Optional[float], until: Optional[float], family: Optional[str]
+    ) -> Iterator[Dict[str, Any]]:
+        first = self._written - len(self)
+        start = first if since is None else self._bisect(first, since)
+        wanted = FAMILIES.get(family) if family is not None else None
+        for n in range(start, self._written):
+            ts, duration, source, result, number = self._record(n)
+            if until is not None and ts > until:
+                return
+            if wanted is not None and number != wanted:
+                continue
+            yield {
+                "ts": ts,
+                "duration": round(duration, 4),
+                "family": _FAMILY_NAMES.get(number),
+                "result": RESULTS[result] if result < len(RESULTS) else None,
+                "source": self._names[source] if source < len(self._names) else None,
+            }
+
+    def _record(self, n: int) -> tuple:
+        offset = _RECORDS_AT + (n % self.capacity) * _RECORD.size
+        return _RECORD.unpack_from(self._buffer, offset)
+
+    def _bisect(self, lo: int, since: float) -> int:
+        """First sample number with ``ts >= since`` (timestamps ascend)."""
+        hi = self._written
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
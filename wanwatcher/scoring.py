@@ -0,0 +1,217 @@
+"""Health tracking and adaptive ordering for IP sources.
+
+Every query result is recorded per (family, source): an exponentially
+weighted moving average (EWMA) of latency for successful answers, an EWMA of
+the success rate, and the run of consecutive failures. Sources are ordered by
+their expected time to a valid answer (latency divided by success rate), so
+the fastest healthy source is asked first. A source that fails several times
+in a row is quarantined with an exponentially growing cooldown: it moves to
+the end of the order (a last resort, never dropped) until the cooldown ends.
+
+The most recent successful latencies are also kept as raw samples so callers
+can ask for a latency percentile, e.g. to decide when a request is slow
+enough to be worth hedging.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from wanwatcher.metrics import Metrics
+
+EWMA_ALPHA = 0.3  # weight of the newest observation
+QUARANTINE_AFTER = 3  # consecutive failures before a source is quarantined
+QUARANTINE_BASE = 60.0  # seconds, first cooldown
+QUARANTINE_MAX = 3600.0  # seconds, cooldown cap
+MIN_SUCCESS_RATIO = 0.05  # floor so a bad source still gets a finite score
+LATENCY_WINDOW = 50  # successful latencies kept per source for percentiles
+MIN_PERCENTILE_SAMPLES = 5  # fewer samples than this give no percentile
+
+
+class _Named(Protocol):
+    name: str
+
+
+S = TypeVar("S", bound=_Named)
+
+
+@dataclass
+class SourceStats:
+    """Running health figures for one source in one address family."""
+
+    name: str
+    family: str
+    attempts: int = 0
+    successes: int = 0
+    latency_ewma: Optional[float] = None
+    success_ewma: float = 1.0
+    consecutive_failures: int = 0
+    quarantined_until: float = 0.0
+    last_latency: Optional[float] = None
+    recent_latencies: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_WINDOW), repr=False
+    )
+
+    def expected_time(self, fallback: float) -> float:
+        """Expected seconds to a valid answer; unknown sources score 0.
+
+        Scoring never-tried sources as 0 lets every source be measured once
+        before the ordering settles.
+        """
+        if self.attempts == 0:
+            return 0.0
+        latency = self.latency_ewma if self.latency_ewma is not None else fallback
+        return latency / max(self.success_ewma, MIN_SUCCESS_RATIO)
+
+
+class SourceScoreboard:
+    """Thread-safe registry of :class:`SourceStats` keyed by family and name."""
+
+    def __init__(
+        self,
+        metrics: Optional[Metrics] = None,
+        clock: Callable[[], float] = time.monotonic,
+        fallback_latency: float = 10.0,
+    ) -> None:
+        self.metrics = metrics
+        self._clock = clock
+        # Latency assumed for a source that has never answered successfully.
+        self.fallback_latency = fallback_latency
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], SourceStats] = {}
+
+    def _get(self, family: str, name: str) -> SourceStats:
+        key = (family, name)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = SourceStats(name=name, family=family)
+        return stats
+
+    def record(self, family: str, name: str, latency: float, ok: bool) -> None:
+        """Record the outcome and wall time of one query."""
+        with self._lock:
+            stats = self._get(family, name)
+            stats.attempts += 1
+            stats.last_latency = latency
+            sample = 1.0 if ok else 0.0
+            stats.success_ewma += EWMA_ALPHA * (sample - stats.success_ewma)
+            if ok:
+                stats.successes += 1
+                stats.consecutive_failures = 0
+                stats.quarantined_until = 0.0
+                stats.recent_latencies.append(latency)
+                if stats.latency_ewma is None:
+                    stats.latency_ewma = latency
+                else:
+                    stats.latency_ewma += EWMA_ALPHA * (latency - stats.latency_ewma)
+            else:
+                stats.consecutive_failures += 1
+                if stats.consecutive_failures >= QUARANTINE_AFTER:
+                    exponent = stats.consecutive_failures - QUARANTINE_AFTER
+                    cooldown = min(QUARANTINE_MAX, QUARANTINE_BASE * (2**exponent))
+                    stats.quarantined_until = self._clock() + cooldown
+            quarantined = self._is_quarantined(stats)
+            snapshot = (stats.latency_ewma, stats.success_ewma, quarantined)
+        self._export(family, name, ok, *snapshot)
+
+    def _is_quarantined(self, stats: SourceStats) -> bool:
+        return stats.quarantined_until > self._clock()
+
+    def latency_percentile(
+        self, family: str, name: str, percentile: float
+    ) -> Optional[float]:
+        """Nearest-rank percentile of recent successful latencies, in seconds.
+
+        Returns None until the source has MIN_PERCENTILE_SAMPLES successes.
+        """
+        with self._lock:
+            stats = self._stats.get((family, name))
+            if stats is None or len(stats.recent_latencies) < MIN_PERCENTILE_SAMPLES:
+                return None
+            samples = sorted(stats.recent_latencies)
+        rank = math.ceil(percentile / 100.0 * len(samples))
+        return samples[min(len(samples), max(1, rank)) - 1]
+
+    def order(self, family: str, sources: Sequence[S]) -> List[S]:
+        """Sort sources by expected time to answer; quarantined ones last.
+
+        The sort is stable, so the incoming (rotated) order breaks ties and
+        still spreads load across equally good sources.
+        """
+        with self._lock:
+            keys = {}
+            for source in sources:
+                stats = self._get(family, source.name)
+                keys[source.name] = (
+                    self._is_quarantined(stats),
+                    stats.expected_time(self.fallback_latency),
+                )
+        return sorted(sources, key=lambda source: keys[source.name])
+
+    def snapshot(self) -> Dict[str, List[Dict[str, object]]]:
+        """JSON-friendly per-family view for the status API."""
+        now = self._clock()
+        result: Dict[str, List[Dict[str, object]]] = {}
+        with self._lock:
+            for (family, _name), stats in sorted(self._stats.items()):
+                result.setdefault(family, []).append(
+                    {
+                        "source": stats.name,
+                        "attempts": stats.attempts,
+                        "successes": stats.successes,
+                        "latency_ewma_seconds": (
+                            round(stats.latency_ewma, 3)
+                            if stats.latency_ewma is not None
+                            else None
+                        ),
+                        "success_ratio": round(stats.success_ewma, 3),
+                        "consecutive_failures": stats.consecutive_failures,
+                        "quarantined_for_seconds": round(
+                            max(0.0, stats.quarantined_until - now)
+                        ),
+                        "expected_seconds": round(
+                            stats.expected_time(self.fallback_latency), 3
+                        ),
+                    }
+                )
+        return result
+
+    def _export(
+        self,
+        family: str,
+        name: str,
+        ok: bool,
+        latency_ewma: Optional[float],
+        success_ewma: float,
+        quarantined: bool,
+    ) -> None:
+        if self.metrics is None:
+            return
+        labels = {"family": family, "source": name}
+        self.metrics.inc(
+            "wanwatcher_source_requests_total",
+            {**labels, "result": "ok" if ok else "error"},
+        )
+        if latency_ewma is not None:
+            self.metrics.set_gauge(
+                "wanwatcher_source_latency_seconds", round(latency_ewma, 4), labels
+            )
+        self.metrics.set_gauge(
+            "wanwatcher_source_success_ratio", round(success_ewma, 4), labels
+        )
+        self.metrics.set_gauge(
+            "wanwatcher_source_quarantined", 1 if quarantined else 0, labels
+        )
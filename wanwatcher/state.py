@@ -4,14 +4,20 @@ import json
 import logging
 import os
 import tempfile
+import time
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+from wanwatcher.metrics import Metrics
+
 logger = logging.getLogger(__name__)
 
 HISTORY_LIMIT = 20
 
+# "json": the state file itself; "sqlite": wanwatcher.statedb.
+STATE_BACKENDS = ("json", "sqlite")
+
 
 @dataclass
 class State:
@@ -33,11 +39,24 @@ class StateStore:
     os.replace(), so a crash mid-write can never corrupt the state.
     Old formats (plain-text IPv4, bare JSON string, v1 dict) are migrated
     transparently on first read.
+
+    The store remembers the content it last read or wrote. Saving a state
+    whose content is unchanged only touches the file's mtime (the liveness
+    signal the healthcheck falls back to) instead of rewriting it, which
+    keeps per-check writes off SD cards and flash; ``last_updated`` is the
+    time the content was last written.
     """
 
-    def __init__(self, path: str, legacy_update_file: Optional[str] = None):
+    def __init__(
+        self,
+        path: str,
+        legacy_update_file: Optional[str] = None,
+        metrics: Optional[Metrics] = None,
+    ):
         self.path = path
         self.legacy_update_file = legacy_update_file
+        self.metrics = metrics
+        self._saved: Optional[Dict[str, Any]] = None
 
     def load(self) -> State:
         if not os.path.exists(self.path):
@@ -78,11 +97,31 @@ class StateStore:
             update_notified_version=data.get("update_notified_version"),
             history=data.get("history") or [],
         )
+        # Only a file already in the current shape counts as saved; anything
+        # a migration adds makes the content differ and is written out.
+        if data == asdict(state):
+            self._saved = self._content(state)
         if state.update_notified_version is None:
             state = self._with_legacy_update_version(state)
         return state
 
-    def save(self, state: State) -> None:
+    def save(self, state: State) -> bool:
+        """Persist ``state``; return False when only the mtime was touched."""
+        started = time.monotonic()
+        try:
+            return self._save(state)
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe(
+                    "wanwatcher_state_save_duration_seconds",
+                    time.monotonic() - started,
+                )
+
+    def _save(self, state: State) -> bool:
+        content = self._content(state)
+        if content == self._saved and self.touch():
+            return False
+
         state.last_updated = datetime.now(timezone.utc).isoformat()
         directory = os.path.dirname(self.path) or "."
         os.makedirs(directory, exist_ok=True)
@@ -99,7 +138,26 @@ class StateStore:
             except OSError:
                 pass
             raise
+        self._saved = content
         logger.debug("State saved: ipv4=%s ipv6=%s", state.ipv4, state.ipv6)
+        return True
+
+    def touch(self) -> bool:
+        """Refresh the file's mtime; False if it is missing (rewrite it)."""
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def close(self) -> None:
+        """Nothing to release; every save is already on disk."""
+
+    @staticmethod
+    def _content(state: State) -> Dict[str, Any]:
+        content = asdict(state)
+        del content["last_updated"]
+        return content
 
     def record_change(
         self,
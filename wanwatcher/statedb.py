@@ -0,0 +1,388 @@
+"""SQLite state backend (``STATE_BACKEND=sqlite``).
+
+Keeps the current state, the full change history, one sample per check and
+the result of every notification delivery in ``<IP_DB_FILE>.sqlite``, using
+only the standard library ``sqlite3``. The database runs in WAL mode with
+``synchronous=NORMAL``, so a write is an append to the WAL instead of a
+rewrite of the whole state: the state row is updated only when its content
+changes, and check samples and delivery records are buffered and inserted
+with one ``executemany`` per batch (``COMMIT_EVERY`` rows, or sooner when
+the state changes or the store is closed). SQL text is constant, so
+``sqlite3``'s statement cache reuses the prepared statements.
+
+The JSON state file stays the default backend and is the migration source:
+on first start the state is read from it (with all of its own migrations)
+and the change history from ``<IP_DB_FILE>.history`` or, without that log,
+from the state file. The JSON file is left untouched.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from wanwatcher.history import HistoryLog, legacy_records
+from wanwatcher.metrics import Metrics
+from wanwatcher.state import State, StateStore
+
+logger = logging.getLogger(__name__)
+
+# Buffered check samples / delivery records written per transaction.
+COMMIT_EVERY = 10
+# How often rows past the retention are deleted.
+PRUNE_INTERVAL = 86400
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    ipv4 TEXT,
+    ipv6 TEXT,
+    last_updated TEXT,
+    last_change TEXT,
+    update_notified_version TEXT,
+    recent TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS history (
+    ts REAL NOT NULL,
+    family TEXT NOT NULL,
+    old TEXT,
+    new TEXT
+);
+CREATE INDEX IF NOT EXISTS history_ts ON history (ts);
+CREATE INDEX IF NOT EXISTS history_family_ts ON history (family, ts);
+CREATE TABLE IF NOT EXISTS checks (
+    ts REAL NOT NULL,
+    ipv4 TEXT,
+    ipv6 TEXT
+);
+CREATE INDEX IF NOT EXISTS checks_ts ON checks (ts);
+CREATE TABLE IF NOT EXISTS deliveries (
+    ts REAL NOT NULL,
+    provider TEXT NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deliveries_ts ON deliveries (ts);
+"""
+
+_SELECT_STATE = (
+    "SELECT ipv4, ipv6, last_updated, last_change, update_notified_version, "
+    "recent FROM state WHERE id = 1"
+)
+_UPSERT_STATE = (
+    "INSERT OR REPLACE INTO state (id, ipv4, ipv6, last_updated, last_change, "
+    "update_notified_version, recent) VALUES (1, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_HISTORY = "INSERT INTO history (ts, family, old, new) VALUES (?, ?, ?, ?)"
+_INSERT_CHECK = "INSERT INTO checks (ts, ipv4, ipv6) VALUES (?, ?, ?)"
+_INSERT_DELIVERY = "INSERT INTO deliveries (ts, provider, ok) VALUES (?, ?, ?)"
+_PRUNE = {
+    "history": "DELETE FROM history WHERE ts < ?",
+    "checks": "DELETE FROM checks WHERE ts < ?",
+    "deliveries": "DELETE FROM deliveries WHERE ts < ?",
+}
+
+
+class SQLiteStateStore(StateStore):
+    """A :class:`StateStore` kept in SQLite instead of a JSON file.
+
+    ``path`` is still the JSON state file, read once as the migration
+    source; the database is ``path + ".sqlite"``. Errors surface as
+    ``OSError`` (``sqlite3.Error`` is re-raised as one) so callers handle
+    both backends alike.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        legacy_update_file: Optional[str] = None,
+        retention_days: int = 365,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        super().__init__(path, legacy_update_file=legacy_update_file, metrics=metrics)
+        self.db_path = path + ".sqlite"
+        self.retention = retention_days * 86400
+        self.history = SQLiteHistory(self)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._checks: List[Tuple[float, Optional[str], Optional[str]]] = []
+        self._deliveries: List[Tuple[float, str, int]] = []
+        self._pruned_at = 0.0
+
+    # -- connection ----------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    def _write(self, state_row: Optional[Tuple[Any, ...]] = None) -> None:
+        """Write the buffered rows (and ``state_row``) in one transaction."""
+        conn = self._db()
+        conn.execute("BEGIN")
+        try:
+            if state_row is not None:
+                conn.execute(_UPSERT_STATE, state_row)
+            if self._checks:
+                conn.executemany(_INSERT_CHECK, self._checks)
+            if self._deliveries:
+                conn.executemany(_INSERT_DELIVERY, self._deliveries)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._checks.clear()
+        self._deliveries.clear()
+
+    def close(self) -> None:
+        """Write out buffered rows and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._write()
+            except sqlite3.Error as exc:
+                logger.error("Could not write buffered state rows: %s", exc)
+            self._conn.close()
+            self._conn = None
+
+    # -- StateStore ----------------------------------------------------------
+
+    def load(self) -> State:
+        try:
+            with self._lock:
+                row = self._db().execute(_SELECT_STATE).fetchone()
+        except sqlite3.Error as exc:
+            raise OSError(f"state database {self.db_path}: {exc}") from exc
+        if row is None:
+            logger.info("Migrating state into %s", self.db_path)
+            state = super().load()
+            self._saved = None  # not in the database yet
+            return state
+
+        ipv4, ipv6, last_updated, last_change, notified, recent = row
+        state = State(
+            ipv4=ipv4,
+            ipv6=ipv6,
+            last_updated=last_updated,
+            last_change=last_change,
+            update_notified_version=notified,
+            history=json.loads(recent),
+        )
+        self._saved = self._content(state)
+        return state
+
+    def _save(self, state: State) -> bool:
+        """Queue a check sample; write the state row only when it changed."""
+        now = time.time()
+        content = self._content(state)
+        changed = content != self._saved
+        try:
+            with self._lock:
+                self._checks.append((now, state.ipv4, state.ipv6))
+                if changed:
+                    state.last_updated = datetime.fromtimestamp(
+                        now, timezone.utc
+                    ).isoformat()
+                    self._write(
+                        (
+                            state.ipv4,
+                            state.ipv6,
+                            state.last_updated,
+                            state.last_change,
+                            state.update_notified_version,
+                            json.dumps(state.history, separators=(",", ":")),
+                        )
+                    )
+                    self._saved = content
+                elif len(self._checks) + len(self._deliveries) >= COMMIT_EVERY:
+                    self._write()
+                if now - self._pruned_at >= PRUNE_INTERVAL:
+                    self.prune(now)
+        except sqlite3.Error as exc:
+            raise OSError(f"state database {self.db_path}: {exc}") from exc
+        return changed
+
+    def touch(self) -> bool:
+        return True  # the heartbeat file carries liveness
+
+    # -- extra records -------------------------------------------------------
+
+    def record_delivery(self, provider: str, ok: bool) -> None:
+        """Queue the result of one notification delivery."""
+        with self._lock:
+            self._deliveries.append((time.time(), provider, int(ok)))
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete rows past the retention; return how many went."""
+        if self.retention <= 0:
+            return 0
+        current = time.time() if now is None else now
+        cutoff = current - self.retention
+        removed = 0
+        with self._lock:
+            conn = self._db()
+            for statement in _PRUNE.values():
+                removed += conn.execute(statement, (cutoff,)).rowcount
+            self._pruned_at = current
+        if removed:
+            logger.info("Removed %d expired row(s) from the state database", removed)
+        return removed
+
+    def checks(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Check samples in ``[since, until]``, oldest first."""
+        return self._select(
+            "SELECT ts, ipv4, ipv6 FROM checks", since, until, ("ts", "ipv4", "ipv6")
+        )
+
+    def deliveries(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Delivery records in ``[since, until]``, oldest first."""
+        rows = self._select(
+            "SELECT ts, provider, ok FROM deliveries",
+            since,
+            until,
+            ("ts", "provider", "ok"),
+        )
+        for row in rows:
+            row["ok"] = bool(row["ok"])
+        return rows
+
+    def _select(
+        self,
+        select: str,
+        since: Optional[float],
+        until: Optional[float],
+        columns: Tuple[str, ...],
+        family: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        where, args = _range(since, until, family)
+        sql = f"{select}{where} ORDER BY ts DESC, rowid DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(max(0, limit))
+        try:
+            with self._lock:
+                self._write()  # include buffered rows
+                rows = self._db().execute(sql, args).fetchall()
+        except sqlite3.Error as exc:
+            raise OSError(f"state database {self.db_path}: {exc}") from exc
+        return [dict(zip(columns, row)) for row in reversed(rows)]
+
+
+def _range(
+    since: Optional[float], until: Optional[float], family: Optional[str]
+) -> Tuple[str, List[Any]]:
+    clauses: List[str] = []
+    args: List[Any] = []
+    if family is not None:
+        clauses.append("family = ?")
+        args.append(family)
+    if since is not None:
+        clauses.append("ts >= ?")
+        args.append(since)
+    if until is not None:
+        clauses.append("ts <= ?")
+        args.append(until)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+
+class SQLiteHistory:
+    """The :class:`HistoryLog` interface over the ``history`` table."""
+
+    def __init__(self, store: SQLiteStateStore) -> None:
+        self.store = store
+        self.path = store.db_path
+
+    def open(self) -> None:
+        try:
+            self.store.prune()
+        except sqlite3.Error as exc:
+            raise OSError(f"state database {self.path}: {exc}") from exc
+
+    def record_change(
+        self,
+        old_ipv4: Optional[str],
+        new_ipv4: Optional[str],
+        old_ipv6: Optional[str],
+        new_ipv6: Optional[str],
+        ts: Optional[float] = None,
+    ) -> None:
+        at = time.time() if ts is None else ts
+        self.append(
+            [
+                {"ts": at, "family": family, "old": old, "new": new}
+                for family, old, new in (
+                    ("ipv4", old_ipv4, new_ipv4),
+                    ("ipv6", old_ipv6, new_ipv6),
+                )
+                if old != new
+            ]
+        )
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        rows = [(r["ts"], r["family"], r["old"], r["new"]) for r in records]
+        try:
+            with self.store._lock:
+                conn = self.store._db()
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(_INSERT_HISTORY, rows)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as exc:
+            raise OSError(f"state database {self.path}: {exc}") from exc
+
+    def import_legacy(self, entries: List[Dict[str, Any]]) -> int:
+        """Seed an empty table from the JSON history log or the state file."""
+        try:
+            with self.store._lock:
+                if self.store._db().execute("SELECT 1 FROM history LIMIT 1").fetchone():
+                    return 0
+        except sqlite3.Error as exc:
+            raise OSError(f"state database {self.path}: {exc}") from exc
+        log = HistoryLog(self.store.path + ".history", retention_days=0)
+        records = list(log.iter_range())
+        if not records:
+            records = list(legacy_records(entries))
+        self.append(records)
+        return len(records)
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        family: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Changes in ``[since, until]``, oldest first; the newest ``limit``."""
+        return self.store._select(
+            "SELECT ts, family, old, new FROM history",
+            since,
+            until,
+            ("ts", "family", "old", "new"),
+            family=family,
+            limit=limit,
+        )
@@ -5,6 +5,8 @@ from typing import Dict, Optional, Tuple
 
 import requests
 
+from wanwatcher.httpclient import HTTPClient, default_client
+
 logger = logging.getLogger(__name__)
 
 GITHUB_API_URL = "https://api.github.com/repos/noxied/wanwatcher/releases/latest"
@@ -24,11 +26,12 @@ def check_for_updates(
     current_version: str,
     already_notified: Optional[str] = None,
     timeout: int = 10,
+    http: Optional[HTTPClient] = None,
 ) -> Optional[Dict[str, str]]:
     """Return release info when a newer version exists and was not yet notified."""
     try:
         logger.info("Checking for updates...")
-        response = requests.get(GITHUB_API_URL, timeout=timeout)
+        response = (http or default_client()).get(GITHUB_API_URL, timeout=timeout)
         response.raise_for_status()
         release_data = response.json()
     except (requests.exceptions.RequestException, ValueError) as exc:
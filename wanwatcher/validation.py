@@ -15,6 +15,14 @@ from typing import List, Tuple
 from urllib.parse import urlparse
 
 from wanwatcher.config import Config, redact
+from wanwatcher.detector import (
+    DETECTION_MODES,
+    DNS_SOURCE_MODES,
+    max_detection_duration,
+)
+from wanwatcher.engine import CHECK_ENGINES
+from wanwatcher.pipeline import SINKS
+from wanwatcher.state import STATE_BACKENDS
 
 logger = logging.getLogger(__name__)
 
@@ -224,6 +232,17 @@ class ConfigValidator:
                 "EMAIL_SMTP_PORT 465 is typically used with EMAIL_USE_SSL=true"
             )
 
+        if email.idle_timeout < 0:
+            self.errors.append(
+                f"EMAIL_SMTP_IDLE_TIMEOUT must be 0 or more, got {email.idle_timeout}"
+            )
+            ok = False
+        elif email.idle_timeout > 300:
+            self.warnings.append(
+                "EMAIL_SMTP_IDLE_TIMEOUT above 300s exceeds most servers' own idle "
+                "limit; the session will usually be reopened anyway"
+            )
+
         return ok
 
     def validate_apprise(self) -> bool:
@@ -414,6 +433,10 @@ class ConfigValidator:
         if not self.validate_port(api.port, "API_PORT"):
             return False
 
+        if any(bound <= 0 for bound in api.latency_buckets):
+            self.errors.append("METRICS_LATENCY_BUCKETS must all be greater than 0")
+            return False
+
         if api.port < 1024:
             self.warnings.append(
                 f"API_PORT {api.port} is a privileged port (< 1024) - "
@@ -471,6 +494,125 @@ class ConfigValidator:
 
         return ok
 
+    def validate_pipeline(self) -> bool:
+        """Validate the asynchronous side-effect pipeline."""
+        pipeline = self.config.pipeline
+        if not pipeline.enabled:
+            return True
+        ok = True
+
+        if pipeline.queue_size < 1:
+            self.errors.append(
+                "PIPELINE_QUEUE_SIZE: Must be at least 1, " f"got {pipeline.queue_size}"
+            )
+            ok = False
+
+        if not 0 <= pipeline.submit_timeout <= 60:
+            self.errors.append(
+                "PIPELINE_SUBMIT_TIMEOUT: Must be between 0 and 60 seconds, "
+                f"got {pipeline.submit_timeout}"
+            )
+            ok = False
+
+        for sink, workers in pipeline.concurrency.items():
+            if sink not in SINKS:
+                self.warnings.append(
+                    f"PIPELINE_CONCURRENCY: Unknown sink {sink!r} "
+                    f"(known: {', '.join(SINKS)})"
+                )
+            elif workers < 1:
+                self.errors.append(
+                    f"PIPELINE_CONCURRENCY: {sink} needs at least 1 worker, "
+                    f"got {workers}"
+                )
+                ok = False
+            elif sink == "ddns" and workers > 1:
+                self.warnings.append(
+                    "PIPELINE_CONCURRENCY: more than one ddns worker lets an "
+                    "older update finish after a newer one"
+                )
+
+        if self.config.check_engine == "asyncio":
+            self.warnings.append(
+                "PIPELINE_ENABLED has no effect with CHECK_ENGINE=asyncio, which "
+                "already runs side effects as separate tasks"
+            )
+
+        return ok
+
+    def validate_outbox(self) -> bool:
+        """Validate the durable notification/DDNS outbox."""
+        outbox = self.config.outbox
+        if not outbox.enabled:
+            return True
+        ok = True
+
+        if not 1 <= outbox.concurrency <= 16:
+            self.errors.append(
+                "OUTBOX_CONCURRENCY: Must be between 1 and 16, "
+                f"got {outbox.concurrency}"
+            )
+            ok = False
+
+        if outbox.max_age < 60:
+            self.errors.append(
+                "OUTBOX_MAX_AGE: Must be at least 60 seconds, " f"got {outbox.max_age}"
+            )
+            ok = False
+
+        if outbox.retry_base < 1:
+            self.errors.append(
+                "OUTBOX_RETRY_BASE: Must be at least 1 second, "
+                f"got {outbox.retry_base}"
+            )
+            ok = False
+        elif outbox.retry_max < outbox.retry_base:
+            self.errors.append(
+                "OUTBOX_RETRY_MAX: Must not be shorter than OUTBOX_RETRY_BASE "
+                f"({outbox.retry_base}), got {outbox.retry_max}"
+            )
+            ok = False
+
+        return ok
+
+    def validate_history(self) -> bool:
+        """Validate the long-term change history log."""
+        history = self.config.history
+        if not history.enabled:
+            return True
+        ok = True
+
+        if history.retention_days < 1:
+            self.errors.append(
+                "HISTORY_RETENTION_DAYS: Must be at least 1 day, "
+                f"got {history.retention_days}"
+            )
+            ok = False
+
+        if not 16 <= history.segment_kb <= 65536:
+            self.errors.append(
+                "HISTORY_SEGMENT_KB: Must be between 16 and 65536, "
+                f"got {history.segment_kb}"
+            )
+            ok = False
+
+        return ok
+
+    def validate_samples(self) -> bool:
+        """Validate the per-check sample ring buffer."""
+        samples = self.config.samples
+        if not samples.enabled:
+            return True
+
+        if not 16 <= samples.capacity <= 4194304:
+            self.errors.append(
+                "SAMPLES_CAPACITY: Must be between 16 and 4194304, "
+                f"got {samples.capacity}"
+            )
+            return False
+
+        return True
+
     # -- general -------------------------------------------------------------
 
     def validate_general(self) -> bool:
@@ -491,6 +633,46 @@ class ConfigValidator:
                 "API calls"
             )
 
+        if config.check_engine not in CHECK_ENGINES:
+            self.errors.append(
+                f"CHECK_ENGINE: Must be one of {', '.join(CHECK_ENGINES)}, "
+                f"got {config.check_engine!r}"
+            )
+            ok = False
+
+        if config.state_backend not in STATE_BACKENDS:
+            self.errors.append(
+                f"STATE_BACKEND: Must be one of {', '.join(STATE_BACKENDS)}, "
+                f"got {config.state_backend!r}"
+            )
+            ok = False
+
+        if config.task_deadline < 1:
+            self.errors.append(
+                "CHECK_TASK_DEADLINE: Must be at least 1 second, "
+                f"got {config.task_deadline}"
+            )
+            ok = False
+        elif config.check_engine == "asyncio" and config.task_deadline < (
+            config.detection_deadline
+            or max_detection_duration(
+                config.timeout_for("detector"),
+                config.dns_sources,
+                config.local_detection,
+            )
+        ):
+            self.warnings.append(
+                "CHECK_TASK_DEADLINE is shorter than IP_DETECTION_DEADLINE - "
+                "checks may be abandoned before detection gives up"
+            )
+
+        if not 0 <= config.network_change_debounce <= 60:
+            self.errors.append(
+                "CHECK_NETWORK_DEBOUNCE: Must be between 0 and 60 seconds, "
+                f"got {config.network_change_debounce}"
+            )
+            ok = False
+
         if config.http_timeout < 1 or config.http_timeout > 120:
             self.errors.append(
                 "HTTP_TIMEOUT: Must be between 1 and 120 seconds, "
@@ -498,6 +680,111 @@ class ConfigValidator:
             )
             ok = False
 
+        http = config.http
+        if http.pool_connections < 1 or http.pool_maxsize < 1:
+            self.errors.append(
+                "HTTP_POOL_CONNECTIONS and HTTP_POOL_MAXSIZE must be at least 1, "
+                f"got {http.pool_connections} and {http.pool_maxsize}"
+            )
+            ok = False
+
+        for name, value in (
+            ("HTTP_TIMEOUT_DETECTOR", http.detector_timeout),
+            ("HTTP_TIMEOUT_DDNS", http.ddns_timeout),
+            ("HTTP_TIMEOUT_GEO", http.geo_timeout),
+            ("HTTP_TIMEOUT_NOTIFIERS", http.notifier_timeout),
+        ):
+            if value < 0 or value > 120:
+                self.errors.append(
+                    f"{name}: Must be between 1 and 120 seconds (0 uses "
+                    f"HTTP_TIMEOUT), got {value}"
+                )
+                ok = False
+
+        if config.detection_mode not in DETECTION_MODES:
+            self.errors.append(
+                f"IP_DETECTION_MODE: Must be one of {', '.join(DETECTION_MODES)}, "
+                f"got {config.detection_mode!r}"
+            )
+            ok = False
+
+        if config.dns_sources not in DNS_SOURCE_MODES:
+            self.errors.append(
+                f"IP_DNS_SOURCES: Must be one of {', '.join(DNS_SOURCE_MODES)}, "
+                f"got {config.dns_sources!r}"
+            )
+            ok = False
+
+        if config.detection_fanout < 1:
+            self.errors.append(
+                "IP_DETECTION_FANOUT: Must be at least 1, "
+                f"got {config.detection_fanout}"
+            )
+            ok = False
+
+        if not 50 <= config.hedge_percentile <= 99:
+            self.errors.append(
+                "IP_HEDGE_PERCENTILE: Must be between 50 and 99, "
+                f"got {config.hedge_percentile}"
+            )
+            ok = False
+
+        if config.hedge_delay_ms < 50:
+            self.errors.append(
+                "IP_HEDGE_DELAY_MS: Must be at least 50 milliseconds, "
+                f"got {config.hedge_delay_ms}"
+            )
+            ok = False
+
+        if config.detection_deadline < 0:
+            self.errors.append(
+                "IP_DETECTION_DEADLINE: Must be 0 (automatic) or a number of "
+                f"seconds, got {config.detection_deadline}"
+            )
+            ok = False
+        elif 0 < config.detection_deadline < config.http_timeout:
+            self.warnings.append(
+                "IP_DETECTION_DEADLINE is shorter than HTTP_TIMEOUT - a single "
+                "slow source can make a check miss its deadline"
+            )
+
+        if config.notify_deadline < 1:
+            self.errors.append(
+                "NOTIFY_DEADLINE: Must be at least 1 second, "
+                f"got {config.notify_deadline}"
+            )
+            ok = False
+        elif config.notify_deadline < config.timeout_for("notifiers"):
+            self.warnings.append(
+                "NOTIFY_DEADLINE is shorter than the notifier HTTP timeout - "
+                "a slow provider will be given up on before its first attempt ends"
+            )
+
+        if not 0 <= config.notify_coalesce_window <= 3600:
+            self.errors.append(
+                "NOTIFY_COALESCE_WINDOW: Must be between 0 and 3600 seconds, "
+                f"got {config.notify_coalesce_window}"
+            )
+            ok = False
+
+        if config.notify_rate_limit < 0:
+            self.errors.append(
+                "NOTIFY_RATE_LIMIT: Must be 0 (unlimited) or more, "
+                f"got {config.notify_rate_limit}"
+            )
+            ok = False
+        if config.notify_rate_burst < 1:
+            self.errors.append(
+                "NOTIFY_RATE_BURST: Must be at least 1, "
+                f"got {config.notify_rate_burst}"
+            )
+            ok = False
+        elif config.notify_rate_limit and config.notify_rate_burst < 3:
+            self.warnings.append(
+                "NOTIFY_RATE_BURST below 3 leaves no room for retries - a "
+                "failed send will wait for a token before it is retried"
+            )
+
         # Check that at least one protocol is enabled
         if not config.monitor_ipv4 and not config.monitor_ipv6:
             self.errors.append(
@@ -547,6 +834,10 @@ class ConfigValidator:
         self.validate_api()
         self.validate_mqtt()
         self.validate_events()
+        self.validate_pipeline()
+        self.validate_outbox()
+        self.validate_history()
+        self.validate_samples()
         self.validate_general()
         self.validate_updates()
 